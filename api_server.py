@@ -0,0 +1,435 @@
+# Local JSON API for vendors' tooling, run next to the Streamlit app:
+#
+#     python api_server.py --port 8502
+#
+# The HTTP side (HTTP/1.1 with keep-alive) runs on an asyncio event loop; every db_utils call
+# runs on a bounded thread pool (--workers, default $TENDER_API_WORKERS or 8), so a slow query
+# never stalls other connections and the database never sees more than `workers` callers at once.
+# Requests are authenticated with HTTP Basic auth using the vendor's email and password; the
+# /admin endpoints take the user name "admin" and the admin dashboard's password.
+#
+#   GET    /tenders                 open tenders; ?location= &search= &org_id= &limit= &after=<next>
+#   GET    /tenders/{ref}           one tender
+#   POST   /tenders/{ref}/bids      submit a bid      {"technical_spec": ..., "financial_spec": ...}
+#   PUT    /tenders/{ref}/bids      edit your bid     {"technical_spec": ..., "financial_spec": ...}
+#   DELETE /tenders/{ref}/bids      withdraw your bid
+#   GET    /bids                    your bids, active and archived
+#   GET    /notifications           your inbox; ?unread=1 for unread only
+#   POST   /notifications/read      mark read         {"ids": [...]} (all if omitted)
+#   GET    /admin/bids/export       every bid, streamed; ?format=csv|csv.gz|jsonl &org_id= &tender_ref=
+#                                   &status= &source=Active|Log (admin)
+#   GET    /metrics                 OpenMetrics text of the statement / helper metrics (no auth)
+#   GET    /health                  liveness (no auth)
+#
+# Errors are {"error": message} with a matching status code.
+
+import argparse
+import asyncio
+import base64
+import binascii
+import functools
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from database import db_utils as db
+from database.models import NOT_FOUND, CONFLICT, DB_ERROR
+from database.export import FORMATS
+from setup_db import ensure_schema
+
+MAX_BODY = 1024 * 1024      # bytes
+MAX_HEADERS = 100
+IDLE_TIMEOUT = 30           # seconds a keep-alive connection may sit between requests
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Outcome.error -> status code of a failed write
+ERROR_STATUS = {NOT_FOUND: 404, CONFLICT: 409, DB_ERROR: 503}
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+STREAM_CHUNK = 64 * 1024    # bytes per write when streaming a file body
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class Request:
+    __slots__ = ("method", "path", "query", "headers", "body", "keep_alive")
+
+    def __init__(self, method, path, query, headers, body, keep_alive):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+        self.keep_alive = keep_alive
+
+    def arg(self, name, default=None):
+        values = self.query.get(name)
+        return values[0] if values else default
+
+    def json(self):
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise HTTPError(400, "Request body is not valid JSON.")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Request body must be a JSON object.")
+        return data
+
+
+def _head(status, headers):
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"] + [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def _records(df):
+    # DataFrame -> JSON-ready list of dicts (NaN -> null, timestamps -> ISO 8601)
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+def _encode_cursor(cursor):
+    if cursor is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(list(cursor)).encode()).decode()
+
+
+def _decode_cursor(token):
+    # (sort key, tender_id); the key is a rank or a publishing date, bound into the query as is
+    try:
+        key, tender_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+        if isinstance(key, bool) or not isinstance(key, (str, int, float)):
+            raise TypeError(key)
+        return key, int(tender_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPError(400, "Invalid 'after' cursor.")
+
+
+def _int_arg(request, name, default=None, low=None, high=None):
+    value = request.arg(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise HTTPError(400, f"'{name}' must be an integer.")
+    if (low is not None and value < low) or (high is not None and value > high):
+        raise HTTPError(400, f"'{name}' must be between {low} and {high}.")
+    return value
+
+
+def _checked(outcome):
+    # a failed write's Outcome -> HTTPError with the status of its error kind
+    if not outcome.ok:
+        raise HTTPError(ERROR_STATUS.get(outcome.error, 409), outcome.message)
+    return outcome
+
+
+CHALLENGE = {"WWW-Authenticate": 'Basic realm="tenders"'}
+
+
+def _credentials(request):
+    # HTTP Basic auth -> (user, password)
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "basic":
+        raise HTTPError(401, "Authentication required.", CHALLENGE)
+    try:
+        user, _, password = base64.b64decode(token).decode().partition(":")
+    except (binascii.Error, UnicodeDecodeError):
+        raise HTTPError(401, "Malformed credentials.", CHALLENGE)
+    return user, password
+
+
+def _bid_fields(request):
+    data = request.json()
+    fields = {}
+    for name in ("technical_spec", "financial_spec"):
+        value = data.get(name)
+        if not isinstance(value, str) or not value.strip():
+            raise HTTPError(400, f"'{name}' is required.")
+        fields[name] = value.strip()
+    return fields["technical_spec"], fields["financial_spec"]
+
+
+class ApiServer:
+
+    def __init__(self, workers):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-db")
+        # (method, path, handler, authenticator or None)
+        self.routes = [
+            ("GET", re.compile(r"/health"), self.health, None),
+            ("GET", re.compile(r"/metrics"), self.metrics, None),
+            ("GET", re.compile(r"/tenders"), self.list_tenders, self.authenticate),
+            ("GET", re.compile(r"/tenders/(?P<ref>[^/]+)"), self.tender_detail, self.authenticate),
+            ("POST", re.compile(r"/tenders/(?P<ref>[^/]+)/bids"), self.submit_bid, self.authenticate),
+            ("PUT", re.compile(r"/tenders/(?P<ref>[^/]+)/bids"), self.update_bid, self.authenticate),
+            ("DELETE", re.compile(r"/tenders/(?P<ref>[^/]+)/bids"), self.withdraw_bid, self.authenticate),
+            ("GET", re.compile(r"/bids"), self.list_bids, self.authenticate),
+            ("GET", re.compile(r"/notifications"), self.list_notifications, self.authenticate),
+            ("POST", re.compile(r"/notifications/read"), self.mark_read, self.authenticate),
+            ("GET", re.compile(r"/admin/bids/export"), self.export_bids, self.authenticate_admin),
+        ]
+
+    async def db(self, fn, *args, **kwargs):
+        # every database call goes through the bounded pool, never onto the event loop, and runs
+        # in its own unit of work (one snapshot, and it sees the dashboards' writes right away)
+        loop = asyncio.get_running_loop()
+        call = functools.partial(db.call_in_unit_of_work, fn, *args, **kwargs)
+        return await loop.run_in_executor(self.pool, call)
+
+    # --- connection handling ---
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self.read_request(reader), IDLE_TIMEOUT)
+                except HTTPError as e:
+                    await self.respond(writer, e.status, {"error": e.message}, e.headers, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                status, payload, headers = await self.dispatch(request)
+                await self.respond(writer, status, payload, headers, request.keep_alive)
+                if not request.keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        try:
+            line = await reader.readline()
+        except (ValueError, asyncio.LimitOverrunError):  # line longer than the stream limit
+            raise HTTPError(414, "Request line too long.")
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line.")
+
+        headers = {}
+        while True:
+            try:
+                line = await reader.readline()
+            except (ValueError, asyncio.LimitOverrunError):
+                raise HTTPError(431, "Request header too long.")
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(431, "Too many headers.")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length.")
+        if length > MAX_BODY:
+            raise HTTPError(413, "Request body too large.")
+        body = await reader.readexactly(length) if length else b""
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        url = urlsplit(target)
+        return Request(method.upper(), unquote(url.path).rstrip("/") or "/",
+                       parse_qs(url.query), headers, body, keep_alive)
+
+    async def respond(self, writer, status, payload, headers=None, keep_alive=True):
+        headers = dict(headers or {})
+        if hasattr(payload, "read"):
+            await self.send_file(writer, status, payload, headers, keep_alive)
+            return
+        if isinstance(payload, str):
+            body = payload.encode()
+        else:
+            body = json.dumps(payload, default=str).encode()
+            headers.setdefault("Content-Type", "application/json")
+        headers["Content-Length"] = str(len(body))
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        writer.write(_head(status, headers) + body)
+        await writer.drain()
+
+    async def send_file(self, writer, status, file, headers, keep_alive):
+        # a (spooled) file body is sent STREAM_CHUNK bytes at a time, read off the event loop,
+        # so a large export never sits in memory as a whole; the file is closed afterwards
+        loop = asyncio.get_running_loop()
+        try:
+            size = file.seek(0, os.SEEK_END)
+            file.seek(0)
+            headers["Content-Length"] = str(size)
+            headers["Connection"] = "keep-alive" if keep_alive else "close"
+            writer.write(_head(status, headers))
+            while chunk := await loop.run_in_executor(None, file.read, STREAM_CHUNK):
+                writer.write(chunk)
+                await writer.drain()
+        finally:
+            file.close()
+
+    async def dispatch(self, request):
+        # returns (status, payload, headers)
+        allowed = []
+        for method, pattern, handler, authenticate in self.routes:
+            match = pattern.fullmatch(request.path)
+            if not match:
+                continue
+            if method != request.method:
+                allowed.append(method)
+                continue
+            try:
+                principal = await authenticate(request) if authenticate else None
+                result = await handler(request, principal, **match.groupdict())
+            except HTTPError as e:
+                return e.status, {"error": e.message}, e.headers
+            except Exception as e:
+                print("API error:", request.method, request.path, e)
+                return 500, {"error": "Internal server error."}, {}
+            status, payload = result[:2]
+            return status, payload, (result[2] if len(result) > 2 else {})
+        if allowed:
+            return 405, {"error": "Method not allowed."}, {"Allow": ", ".join(allowed)}
+        return 404, {"error": "Not found."}, {}
+
+    async def authenticate(self, request):
+        email, password = _credentials(request)
+        vendor = await self.db(db.authenticate_vendor, email, password)
+        if not vendor:
+            raise HTTPError(401, "Invalid credentials.", CHALLENGE)
+        return vendor
+
+    async def authenticate_admin(self, request):
+        if db.ADMIN_PASSWORD is None:
+            raise HTTPError(503, "Admin endpoints are disabled: TENDER_ADMIN_PASSWORD is not set.")
+        user, password = _credentials(request)
+        admin = db.authenticate_admin(password) if user == "admin" else None
+        if not admin:
+            raise HTTPError(401, "Invalid credentials.", CHALLENGE)
+        return admin
+
+    # --- endpoints ---
+
+    async def health(self, request, vendor):
+        return 200, {"status": "ok"}
+
+    async def metrics(self, request, vendor):
+        text = await self.db(db.metrics.render_openmetrics)
+        return 200, text, {"Content-Type": OPENMETRICS_TYPE}
+
+    async def list_tenders(self, request, vendor):
+        limit = _int_arg(request, "limit", PAGE_SIZE, 1, MAX_PAGE_SIZE)
+        after = request.arg("after")
+        df = await self.db(db.get_open_tenders,
+                           location=request.arg("location") or None,
+                           search=request.arg("search") or None,
+                           org_id=_int_arg(request, "org_id"),
+                           limit=limit,
+                           after=_decode_cursor(after) if after else None)
+        next_page = _encode_cursor(db.open_tenders_cursor(df)) if len(df) == limit else None
+        return 200, {"tenders": _records(df), "next": next_page}
+
+    async def _tender(self, ref):
+        tender = await self.db(db.get_tender_by_ref, ref)
+        if not tender:
+            raise HTTPError(404, f"Tender {ref} not found.")
+        return tender
+
+    async def tender_detail(self, request, vendor, ref):
+        return 200, await self._tender(ref)
+
+    async def submit_bid(self, request, vendor, ref):
+        technical_spec, financial_spec = _bid_fields(request)
+        result = _checked(await self.db(db.submit_bid, vendor["id"], ref, technical_spec, financial_spec))
+        return 201, {"message": result.message}
+
+    async def update_bid(self, request, vendor, ref):
+        technical_spec, financial_spec = _bid_fields(request)
+        tender = await self._tender(ref)
+        result = _checked(await self.db(db.update_bid, vendor["id"], tender["tender_id"],
+                                        technical_spec, financial_spec))
+        return 200, {"message": result.message}
+
+    async def withdraw_bid(self, request, vendor, ref):
+        tender = await self._tender(ref)
+        result = _checked(await self.db(db.delete_bid, tender["tender_id"], vendor["id"]))
+        return 200, {"message": result.message}
+
+    async def list_bids(self, request, vendor):
+        df = await self.db(db.get_vendor_bids, vendor["id"])
+        return 200, {"bids": _records(df)}
+
+    async def list_notifications(self, request, vendor):
+        rows = await self.db(db.get_vendor_notifications, vendor["id"])
+        unread_only = request.arg("unread") in ("1", "true")
+        notifications = [
+            {"id": r[0], "title": r[1], "message": r[2], "timestamp": r[3], "is_read": bool(r[4])}
+            for r in rows if not (unread_only and r[4])
+        ]
+        unread = await self.db(db.get_vendor_unread_count, vendor["id"])
+        return 200, {"notifications": notifications, "unread": unread}
+
+    async def mark_read(self, request, vendor):
+        ids = request.json().get("ids")
+        if ids is not None and not (isinstance(ids, list) and all(isinstance(i, int) for i in ids)):
+            raise HTTPError(400, "'ids' must be a list of notification ids.")
+        result = _checked(await self.db(db.mark_vendor_notifications_read, vendor["id"], ids))
+        return 200, {"message": result.message, "marked": result.marked}
+
+    async def export_bids(self, request, admin):
+        fmt = request.arg("format", "csv")
+        if fmt not in FORMATS:
+            raise HTTPError(400, f"'format' must be one of {', '.join(FORMATS)}.")
+        source = request.arg("source")
+        if source not in (None, "Active", "Log"):
+            raise HTTPError(400, "'source' must be Active or Log.")
+        out, rows = await self.db(db.export_bid_history, fmt,
+                                  org_id=_int_arg(request, "org_id"),
+                                  tender_ref=request.arg("tender_ref") or None,
+                                  status=request.arg("status") or None,
+                                  source=source)
+        ext, mime = FORMATS[fmt]
+        return 200, out, {"Content-Type": mime, "X-Row-Count": str(rows),
+                          "Content-Disposition": f'attachment; filename="bids_export.{ext}"'}
+
+
+async def serve(host, port, workers):
+    api = ApiServer(workers)
+    server = await asyncio.start_server(api.handle_client, host, port)
+    print(f"Tender API listening on http://{host}:{port} ({workers} database workers)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        api.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON API for tenders, bids and notifications.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("TENDER_API_WORKERS", "8")),
+                        help="size of the database thread pool")
+    args = parser.parse_args()
+
+    ensure_schema()
+    # queued notifications and tender closing are handled here too (both are safe to run in
+    # several processes: delivery and transitions are idempotent)
+    db.start_notification_worker()
+    db.start_scheduler()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,31 @@
+import os
 import streamlit as st
 import pandas as pd
+from datetime import datetime
+from urllib.parse import urlencode
 from database.db_utils import *
+from database.export import FORMATS
+from dashboards.panels import panel, rerun_panel
+from database.prefetch import call, prefetch
 
-def admin_login():
-    correct_password = "admin123"  # hardcoded admin password
+BID_PREVIEW_ROWS = 500
+IN_APP_EXPORT_ROWS = 100_000
+API_URL = os.environ.get("TENDER_API_URL", "http://127.0.0.1:8502")
 
+def admin_login():
     if "admin_logged_in" not in st.session_state:
         st.session_state.admin_logged_in = False
 
     # If not logged in, show login form
     if not st.session_state.admin_logged_in:
         st.title(f"**Admin Login**")
+        if ADMIN_PASSWORD is None:
+            st.error("Admin login is disabled: set the TENDER_ADMIN_PASSWORD environment variable and restart the app.")
+            return
         password = st.text_input("Enter Admin Password", type="password")
 
         if st.button("Login"):
-            if password == correct_password:
+            if authenticate_admin(password):
                 st.success("Login successful!")
                 st.session_state.admin_logged_in = True
                 st.rerun()
@@ -31,7 +42,10 @@ def show_admin_dashboard():
     st.title(f"**Admin Dashboard**")
 
 
-    tab1, tab2, tab3, tab4 = st.tabs([f"**Manage Organisations**", f"**Manage Vendors**", f"**Manage Bids**", f"**Log Out**"])
+    # every tab renders on each run: load what their selected actions show concurrently first
+    prefetch(dashboard_reads())
+
+    tab1, tab2, tab3, tab5, tab4 = st.tabs([f"**Manage Organisations**", f"**Manage Vendors**", f"**Manage Bids**", f"**Metrics**", f"**Log Out**"])
 
     with tab1:
         manage_orgs()
@@ -39,6 +53,8 @@ def show_admin_dashboard():
         manage_vendors()
     with tab3:
         manage_bids()
+    with tab5:
+        show_metrics()
     with tab4:
         if st.button("Log Out"):
             st.session_state.admin_logged_in = False
@@ -46,6 +62,22 @@ def show_admin_dashboard():
             st.rerun()
 
 
+# the read calls of the actions currently selected in the tabs (see prefetch.py)
+def dashboard_reads():
+    ss = st.session_state
+    reads = []
+    if ss.get("admin_org_action") == "View All Organisations":
+        reads.append(call(get_all_orgs))
+    if ss.get("admin_vendor_action") == "View All Vendors":
+        reads.append(call(get_all_vendors))
+    if ss.get("admin_bid_action") == "View Logs":
+        reads.append(call(get_award_logs))
+    elif ss.get("admin_bid_action") == "View All Bids":
+        reads.append(call(get_org_names))
+    return reads
+
+
+@panel
 def manage_orgs():
     option = st.selectbox(
         "Select an action:",
@@ -53,7 +85,8 @@ def manage_orgs():
             "— Select —",
             "View All Organisations",
             "Delete Organisation",
-        ]
+        ],
+        key="admin_org_action",
     )
 
     if option == "View All Organisations":
@@ -72,6 +105,7 @@ def manage_orgs():
             st.warning(f"Organisation with email '{email}' has been deleted (if existed).")
         # pass
 
+@panel
 def manage_vendors():
     option = st.selectbox(
         "Select an action:",
@@ -80,7 +114,8 @@ def manage_vendors():
             "View All Vendors",
             "Add a Vendor",
             "Delete a Vendor",
-        ]
+        ],
+        key="admin_vendor_action",
     )
 
     if option == "View All Vendors":
@@ -100,8 +135,11 @@ def manage_vendors():
         password = st.text_input("Set Temporary Password", type="password")
 
         if st.button("Add Vendor"):
-            add_vendor(name, email, phone, address, password)
-            st.success(f"Vendor '{name}' added successfully!")
+            result = register_vendor(name, email, phone, address, password)
+            if result.ok:
+                st.success(f"Vendor '{name}' added successfully!")
+            else:
+                st.error(result.message)
 
     elif option == "Delete a Vendor":
         st.subheader("Delete Vendor")
@@ -112,6 +150,48 @@ def manage_vendors():
             st.warning(f"Vendor with email '{email}' has been deleted (if existed).")
 
 
+@panel
+def show_metrics():
+    st.subheader("Database Metrics")
+    snap = metrics.snapshot()
+    st.caption(f"Since {datetime.fromtimestamp(metrics.started):%Y-%m-%d %H:%M:%S} (this server process). "
+               f"Statements slower than {metrics.slow_query_ms:g} ms are logged with their query plan.")
+
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        if st.button("Reset metrics"):
+            metrics.reset()
+            rerun_panel()
+    with c2:
+        st.download_button("Download OpenMetrics", metrics.render_openmetrics(),
+                           file_name="tender_metrics.txt", mime="application/openmetrics-text")
+    if METRICS_FILE:
+        c3.caption(f"Also written to `{METRICS_FILE}`.")
+
+    cols = ["name", "calls", "rows", "errors", "total_ms", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+
+    st.markdown("**Helper functions** (slowest total first)")
+    functions = pd.DataFrame(snap["functions"], columns=cols).drop(columns=["rows"])
+    st.dataframe(functions.sort_values("total_ms", ascending=False), use_container_width=True, hide_index=True)
+
+    st.markdown("**SQL statements** (slowest total first)")
+    statements = pd.DataFrame(snap["statements"], columns=cols).drop(columns=["errors"])
+    st.dataframe(statements.sort_values("total_ms", ascending=False), use_container_width=True, hide_index=True)
+
+    st.markdown("**Recent page renders**")
+    reruns = pd.DataFrame(snap["reruns"], columns=["at", "statements", "functions", "db_ms", "total_ms"])
+    st.dataframe(reruns.iloc[::-1], use_container_width=True, hide_index=True)
+
+    st.markdown(f"**Slow queries** ({len(snap['slow_log'])})")
+    if not snap["slow_log"]:
+        st.info("No slow queries logged.")
+    for entry in reversed(snap["slow_log"]):
+        with st.expander(f"{entry['ms']:.1f} ms · {entry['rows']} rows · {entry['at']} · {entry['sql'][:80]}"):
+            st.code(entry["sql"], language="sql")
+            st.code(entry["plan"] or "(no plan captured)")
+
+
+@panel
 def manage_bids():
     option = st.selectbox(
         "Select an action:",
@@ -119,7 +199,8 @@ def manage_bids():
             "— Select —",
             "View All Bids",
             "View Logs",
-        ]
+        ],
+        key="admin_bid_action",
     )
 
     if option == "View All Bids":
@@ -128,16 +209,33 @@ def manage_bids():
         view_logs()
 
 
+def view_logs():
+    st.header("View Awarded Tender Logs")
+
+    logs = get_award_logs()
+    if logs.empty:
+        st.info("No logs available.")
+        return
+
+    tender_groups = logs.groupby(['tender_id', 'tender_ref_no', 'tender_title'])
+
+    for (tender_id, ref, title), group in tender_groups:
+        st.subheader(f"Tender {ref} — {title}")
+
+        group_display = group.copy()
+        group_display['Winner'] = group_display['is_winner'].apply(lambda x: "Winner" if x == 'Yes' else "No")
+        st.dataframe(group_display[['vendor_id', 'vendor_name', 'technical_score',
+                                    'financial_score', 'final_score', 'remarks', 'closed_timestamp', 'Winner']],
+                     use_container_width=True)
+
+
 def view_all_bids():
     st.subheader("View All Bids")
 
-    conn = get_connection()
-
     # org selector
-    orgs = pd.read_sql_query("SELECT org_id, name FROM Organisation ORDER BY name", conn)
+    orgs = get_org_names()
     if orgs.empty:
         st.info("No organisations found.")
-        conn.close()
         return
 
     org_options = ["All"] + orgs["name"].tolist()
@@ -148,11 +246,7 @@ def view_all_bids():
         org_id = int(orgs.loc[orgs["name"] == selected_org, "org_id"].values[0])
 
     # tender selector
-    if org_id:
-        tenders_q = "SELECT tender_id, tender_ref_no, title FROM Tender WHERE org_id = ? ORDER BY publishing_date DESC"
-        tenders = pd.read_sql_query(tenders_q, conn, params=(org_id,))
-    else:
-        tenders = pd.read_sql_query("SELECT tender_id, tender_ref_no, title FROM Tender ORDER BY publishing_date DESC", conn)
+    tenders = get_tender_refs(org_id)
 
     tender_opts = ["All"] + (tenders["tender_ref_no"].tolist() if not tenders.empty else [])
     selected_tender_ref = st.selectbox(
@@ -167,121 +261,55 @@ def view_all_bids():
 
     include_logs = st.checkbox("Include historical bids (BidLog)", value=True)
 
-    params = []
-    sql_active = """
-        SELECT
-            b.vendor_id,
-            v.name AS vendor_name,
-            v.email AS vendor_email,
-            b.tender_id,
-            t.tender_ref_no,
-            t.title AS tender_title,
-            o.org_id,
-            o.name AS organisation,
-            b.submission_date,
-            b.technical_spec,
-            b.financial_spec,
-            b.status,
-            b.technical_score,
-            b.financial_score,
-            b.final_score,
-            b.remarks
-        FROM Bid b
-        JOIN Vendor v ON b.vendor_id = v.vendor_id
-        JOIN Tender t ON b.tender_id = t.tender_id
-        LEFT JOIN Organisation o ON t.org_id = o.org_id
-        WHERE 1=1
-    """
-
-    if org_id:
-        sql_active += " AND o.org_id = ?"
-        params.append(org_id)
-
-    if selected_tender_ref != "All":
-        sql_active += " AND t.tender_ref_no = ?"
-        params.append(selected_tender_ref)
-
-    active_params = list(params)
-    if selected_status != "All":
-        sql_active += " AND b.status = ?"
-        active_params.append(selected_status)
-
-    sql_active += " ORDER BY t.tender_ref_no, b.submission_date DESC"
-    df_active = pd.read_sql_query(sql_active, conn, params=active_params)
-
-    df_list = []
-    if df_active is not None and not df_active.empty:
-        df_active["record_source"] = "Active"
-        df_active["is_winner"] = None
-        df_list.append(df_active)
-
-    if include_logs:
-        params_log = []
-        sql_log = """
-            SELECT
-                l.vendor_id,
-                v.name AS vendor_name,
-                v.email AS vendor_email,
-                l.tender_id,
-                t.tender_ref_no,
-                t.title AS tender_title,
-                o.org_id,
-                o.name AS organisation,
-                l.submission_date,
-                l.technical_spec,
-                l.financial_spec,
-                l.status,
-                l.technical_score,
-                l.financial_score,
-                l.final_score,
-                l.remarks,
-                l.is_winner
-            FROM BidLog l
-            JOIN Vendor v ON l.vendor_id = v.vendor_id
-            JOIN Tender t ON l.tender_id = t.tender_id
-            LEFT JOIN Organisation o ON t.org_id = o.org_id
-            WHERE 1=1
-        """
-        if org_id:
-            sql_log += " AND o.org_id = ?"
-            params_log.append(org_id)
-        if selected_tender_ref != "All":
-            sql_log += " AND t.tender_ref_no = ?"
-            params_log.append(selected_tender_ref)
-        if selected_status != "All":
-            sql_log += " AND l.status = ?"
-            params_log.append(selected_status)
-
-        sql_log += " ORDER BY t.tender_ref_no, l.submission_date DESC"
-        df_log = pd.read_sql_query(sql_log, conn, params=params_log)
-        if df_log is not None and not df_log.empty:
-            df_log["record_source"] = "Log"
-            # normalize is_winner to Yes/No strings
-            df_log["is_winner"] = df_log["is_winner"].fillna("No").replace({1: "Yes", 0: "No", "1": "Yes", "0": "No"})
-            df_list.append(df_log)
-
-    if not df_list:
+    filters = {
+        "org_id": org_id,
+        "tender_ref": None if selected_tender_ref == "All" else selected_tender_ref,
+        "status": None if selected_status == "All" else selected_status,
+        "source": None if include_logs else "Active",
+    }
+
+    total = count_bid_history(**filters)
+    if not total:
         st.info("No bids found for the selected filters.")
-        conn.close()
         return
 
-    df = pd.concat(df_list, ignore_index=True, sort=False)
+    # preview one page at a time; the export streams every row
+    pages = (total - 1) // BID_PREVIEW_ROWS + 1
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key="admin_bids_page")
+    df = get_bid_history(**filters, order="tender", limit=BID_PREVIEW_ROWS, offset=(page - 1) * BID_PREVIEW_ROWS)
 
     display_cols = [
-        "organisation", "tender_ref_no", "tender_title",
+        "org_name", "tender_ref_no", "title",
         "vendor_name", "vendor_email", "submission_date",
-        "record_source", "status", "is_winner", "technical_score", "financial_score", "final_score",
-        "technical_spec", "financial_spec", "remarks"
+        "record_type", "status", "is_winner", "technical_score", "financial_score", "final_score",
+        "amount", "technical_spec", "financial_spec", "remarks"
     ]
-    display_cols = [c for c in display_cols if c in df.columns]
-    st.dataframe(df[display_cols].reset_index(drop=True), use_container_width=True)
-
-    # CSV download
-    csv = df.to_csv(index=False)
-    st.download_button("Download CSV", csv, file_name="bids_export.csv", mime="text/csv")
-
-    conn.close()
-
-
-
-    
\ No newline at end of file
+    st.dataframe(df[display_cols], use_container_width=True, hide_index=True)
+    st.caption(f"{total} bid(s) in total.")
+
+    fmt = st.selectbox("Export format", list(FORMATS), key="admin_export_format",
+                       format_func=lambda f: {"csv": "CSV", "csv.gz": "CSV (gzip)", "jsonl": "JSON Lines"}[f])
+    ext, mime = FORMATS[fmt]
+
+    # the API server streams the export from disk, so any size works (log in as "admin")
+    params = {"format": fmt, **{k: v for k, v in filters.items() if v is not None}}
+    st.link_button("Download export (API)", f"{API_URL}/admin/bids/export?{urlencode(params)}")
+
+    # Streamlit keeps a download's whole content in memory, so in-app exports are capped
+    if total <= IN_APP_EXPORT_ROWS:
+        st.download_button(
+            "Download export",
+            data=lambda: _export_bids(fmt, filters),
+            file_name=f"bids_export.{ext}",
+            mime=mime,
+        )
+    st.caption(f"In-app downloads are limited to {IN_APP_EXPORT_ROWS:,} bids, as Streamlit holds the whole "
+               f"file in memory; larger exports need the API server (`python api_server.py`).")
+
+
+
+def _export_bids(fmt, filters):
+    # runs on Streamlit's download thread, which reads the whole content anyway
+    out, _ = export_bid_history(fmt, **filters)
+    with out:
+        return out.read()
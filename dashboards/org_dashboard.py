@@ -1,6 +1,10 @@
 import streamlit as st
-import pandas as pd
 from database.db_utils import *
+from database import scoring
+from database.money import format_amount
+from database.models import Evaluation, TenderEdit
+from dashboards.panels import panel
+from database.prefetch import call, prefetch
 
 def org_login():
 
@@ -22,21 +26,15 @@ def org_login():
         password = st.text_input("Password", type="password", key="login_password")
 
         if st.button("Login"):
-            conn = get_connection()
-            cur = conn.cursor()
-            cur.execute(
-                "SELECT org_id, name, password FROM Organisation WHERE email=?",
-                (email,)
-            )
-            org = cur.fetchone()
-            conn.close()
-
-            if org and password == org[2]:
+            org = authenticate_org(email, password)
+
+            if org:
                 st.session_state.org_logged_in = True
                 st.session_state.org_email = email
-                st.session_state['org_id'] = org[0]
-                st.session_state['org_name'] = org[1]
-                st.success(f"Showing dashboard for {org[1]}!")
+                st.session_state.org_principal = org
+                st.session_state['org_id'] = org["id"]
+                st.session_state['org_name'] = org["name"]
+                st.success(f"Showing dashboard for {org['name']}!")
                 st.rerun()
             else:
                 st.error("Invalid credentials.")
@@ -54,21 +52,11 @@ def org_login():
             if not name or not email_signup or not password_signup:
                 st.warning("Please fill all required fields.")
             else:
-                conn = get_connection()
-                cur = conn.cursor()
-                cur.execute("SELECT 1 FROM Organisation WHERE email=?", (email_signup,))
-                existing = cur.fetchone()
-
-                if existing:
-                    st.warning("Email already registered. Please log in instead.")
+                result = register_org(name, email_signup, phone, address, password_signup)
+                if result.ok:
+                    st.success(result.message)
                 else:
-                    cur.execute(
-                        "INSERT INTO Organisation (name, email, phone, address, password) VALUES (?, ?, ?, ?, ?)",
-                        (name, email_signup, phone, address, password_signup),
-                    )
-                    conn.commit()
-                    st.success("Signup successful! You can now log in.")
-                conn.close()
+                    st.warning(result.message)
 
 
 
@@ -83,6 +71,9 @@ def show_org_dashboard():
     org_email = st.session_state.get("org_email")
     st.success(f"Logged in as: {org_email}")
 
+    # both tabs render on every run: load what their selected actions show concurrently first
+    prefetch(dashboard_reads(st.session_state.get("org_id")))
+
     tab1, tab2, tab3 = st.tabs([f"**Manage Tenders**", f"**Manage Bids**", f"**Log Out**"])
 
     with tab1:
@@ -92,10 +83,28 @@ def show_org_dashboard():
     with tab3:
         if st.button("Log Out"):
             st.session_state.org_logged_in = False
+            st.session_state.org_principal = None
             st.success("Logged out successfully.")
             st.rerun()
 
 
+# the read calls of the actions currently selected in the tabs (see prefetch.py)
+def dashboard_reads(org_id):
+    if org_id is None:
+        return []
+    tender_action = st.session_state.get("org_tender_action")
+    bid_action = st.session_state.get("org_bid_action")
+    reads = []
+    if tender_action == "View All Tenders":
+        reads.append(call(get_org_tenders, org_id))
+    elif tender_action in ("Delete Tenders", "Edit Tenders"):
+        reads.append(call(get_org_open_tenders, org_id))
+    if bid_action in ("View and Evaluate a Bid", "Award Bids"):
+        reads.append(call(get_tenders_awaiting_award, org_id))
+    return reads
+
+
+@panel
 def manage_bids():
     option = st.selectbox(
         "Select an action:",
@@ -103,7 +112,8 @@ def manage_bids():
             "— Select —",
             "View and Evaluate a Bid",
             "Award Bids",
-        ]
+        ],
+        key="org_bid_action",
     )
 
 
@@ -112,10 +122,10 @@ def manage_bids():
             st.error("Session expired. Please log in again.")
             st.stop()
         org_id = st.session_state.get('org_id')
-        vievaluate_bids(org_id)
+        evaluate_bids(org_id)
 
     elif option == "Award Bids":
-        award()
+        award_form(st.session_state.get("org_id"))
 
 # def manage_vendors():
 #     option = st.selectbox(
@@ -158,6 +168,7 @@ def manage_bids():
 #
 
 
+@panel
 def manage_tenders():
     option = st.selectbox(
         "Select an action:",
@@ -167,7 +178,8 @@ def manage_tenders():
             "View All Tenders",
             "Delete Tenders",
             "Edit Tenders",
-        ]
+        ],
+        key="org_tender_action",
     )
 
     if option == "Create Tender":
@@ -178,7 +190,7 @@ def manage_tenders():
             st.error("Session expired. Please log in again.")
             st.stop()
         org_id = st.session_state.get('org_id')
-        get_all_tenders(org_id)
+        show_all_tenders(org_id)
 
     elif option == "Delete Tenders":
         st.subheader("Delete Tender")
@@ -186,7 +198,7 @@ def manage_tenders():
             st.error("Session expired. Please log in again.")
             st.stop()
         org_id = st.session_state.get('org_id')
-        delete_tender(org_id)
+        delete_tender_form(org_id)
 
     elif option == "Edit Tenders":
         st.subheader("Update Tender Details")
@@ -194,7 +206,7 @@ def manage_tenders():
             st.error("Session expired. Please log in again.")
             st.stop()
         org_id = st.session_state.get('org_id')
-        edit(org_id)
+        edit_tender_form(org_id)
 
 
 
@@ -261,6 +273,304 @@ def create_tender():
         st.success("Tender created successfully!")
 
 
+def show_all_tenders(org_id):
+
+    st.subheader("View All Tenders")
+
+    # Select grouping mode
+    group_by = st.selectbox("Group tenders by:", ["None", "Location", "Status"])
+
+    df = get_org_tenders(org_id)
+    if df.empty:
+        st.warning("No tenders found.")
+        return
+
+    # display all tenders
+    if group_by == "None":
+        st.dataframe(df, use_container_width=True, hide_index=True)
+        return
+
+    # filter for locations
+    elif group_by == "Location":
+        for location, group_df in df.groupby("Location", dropna=False):
+
+            st.write(f" **Location:** {location}" if location else "Not Applicable")
+            st.dataframe(group_df.reset_index(drop=True), use_container_width=True, hide_index=True)
+
+    # filter for status
+    elif group_by == "Status":
+        for status, group_df in df.groupby("Status", dropna=False):
+
+            st.write(f" **Status:** {status}" if status else "Not Applicable")
+            st.dataframe(group_df.reset_index(drop=True), use_container_width=True, hide_index=True)
+
+
+def _select_open_tender(org_id, empty_message):
+    # table of the org's open tenders plus a picker; returns the selected row or None
+    df = get_org_open_tenders(org_id)
+    if df.empty:
+        st.warning(empty_message)
+        return None
+
+    st.markdown("### Open Tenders")
+    st.dataframe(df.reset_index(drop=True), use_container_width=True)
+
+    labels = [f"{r['Reference No']} - {r['Title']}" for _, r in df.iterrows()]
+    selected = st.selectbox("Select a Tender", range(len(df)), format_func=lambda i: labels[i])
+    return df.iloc[selected]
+
+
+def delete_tender_form(org_id):
+    """
+    Allows deletion only if today is before opening_date.
+    If the tender is currently in its open window (opening_date <= today <= closing_date),
+    shows and performs a withdraw operation instead.
+    """
+    tender = _select_open_tender(org_id, "No tenders found that are available for deletion or withdrawal.")
+    if tender is None:
+        return
+
+    tender_id = int(tender["Tender ID"])
+    opening, closing = tender["Opening Date"], tender["Closing Date"]
+    action = tender_removal(opening, closing)
+
+    if action == TENDER_DELETE:
+        st.info(f"Tender opens on {opening}. You may delete it before opening.")
+        if st.button("Delete Tender"):
+            result = delete_tender(org_id, tender_id)
+            if result.ok:
+                st.success(f"Tender '{tender['Reference No']}' deleted successfully.")
+            else:
+                st.error(result.message)
+
+    elif action == TENDER_WITHDRAW:
+        st.warning(f"Tender is currently open ({opening} → {closing}). You cannot delete it but you can withdraw it.")
+        st.markdown("Withdrawing will close the tender, move existing bids to BidLog as 'Withdrawn', and notify bidders.")
+        if st.button("Withdraw Tender"):
+            result = withdraw_tender(tender_id)
+            if result.ok:
+                st.success(result.message)
+            else:
+                st.error(result.message)
+
+    else:
+        st.error(f"Tender closed on {closing}. It cannot be deleted or withdrawn via this interface."
+                 if closing else "Tender dates are not available or invalid. Deletion/withdrawal blocked.")
+
+
+def edit_tender_form(org_id):
+    tender = _select_open_tender(org_id, "No tenders found that are available for editing.")
+    if tender is None:
+        return
+
+    field = st.selectbox("Select Field to Update", list(EDITABLE_TENDER_FIELDS))
+    new_value = st.text_input(f"Enter new value for {field}")
+
+    if st.button("Update Tender"):
+        result = update_tender(org_id, TenderEdit(int(tender["Tender ID"]), field, new_value))
+        if result.ok:
+            st.success(f"Tender Ref Number {tender['Reference No']} edited successfully!")
+        else:
+            st.error(result.message)
+
+
+def _tender_label(tenders, ref):
+    # "REF — Title", flagged when the tender has passed its closing date
+    row = tenders.loc[tenders['tender_ref_no'] == ref].iloc[0]
+    label = f"{ref} — {row['title']}"
+    return label + " (closed, awaiting award)" if row['status'] == "Closed" else label
+
+
+def evaluate_bids(org_id):
+
+# -------- PART 1 -> 1: View Open Tenders and submitted bids
+    st.subheader("View Bids for Open Tenders")
+
+    tenders = get_tenders_awaiting_award(org_id)
+    if tenders.empty:
+        st.warning("No open tenders available.")
+        return
+
+    selected_tender = st.selectbox(
+        "Select an open tender:",
+        tenders['tender_ref_no'],
+        format_func=lambda ref: _tender_label(tenders, ref)
+    )
+    tender_id = int(tenders.loc[tenders['tender_ref_no'] == selected_tender, 'tender_id'].values[0])
+
+    bids = get_bids_for_tender(tender_id)
+    if bids.empty:
+        st.info("No bids submitted for this tender yet.")
+    else:
+        st.dataframe(bids[["vendor_id", "vendor_name", "submission_date", "technical_spec", "financial_spec",
+                           "status", "technical_score", "financial_score", "final_score", "remarks"]],
+                     use_container_width=True)
+
+    selected_vendor = st.selectbox("Select a vendor to evaluate:", bids['vendor_id'])
+
+# ----- PART 2 -> evaluation phase ---------
+    mode = st.radio("Evaluation mode", ["Single bid", "Bulk grid"], horizontal=True)
+
+    if mode == "Single bid":
+        st.subheader("Evaluation Form")
+        col1, col2 = st.columns(2)
+        with col1:
+            tech_score = st.number_input("Technical Score", min_value=0.0, max_value=100.0, step=0.5)
+        with col2:
+            fin_score = st.number_input("Financial Score", min_value=0.0, max_value=100.0, step=0.5)
+        remarks = st.text_area("Remarks")
+
+        if st.button("Evaluate and Save"):
+            result = save_evaluations(tender_id, [Evaluation(int(selected_vendor), tech_score, fin_score, remarks)])
+            if result.ok:
+                vendor = bids.loc[bids['vendor_id'] == selected_vendor, 'vendor_name'].values[0]
+                st.success(f"Awarded {tech_score + fin_score} / 200 to {vendor} for Tender Ref: {selected_tender}")
+            else:
+                st.error(result.message)
+    else:
+        evaluation_grid(tender_id, bids)
+
+# ----- PART 3 -> automatic scoring from technical scores + bid amounts ---------
+    scoring_form(tender_id)
+
+
+def evaluation_grid(tender_id, bids):
+    # editable table of every bid on the tender; only rows that changed are written
+    st.subheader("Bulk Evaluation")
+    if bids.empty:
+        st.info("No bids submitted for this tender yet.")
+        return
+
+    grid = bids[["vendor_id", "vendor_name", "financial_spec", "amount", "technical_score",
+                 "financial_score", "final_score", "remarks"]].set_index("vendor_id")
+    grid["remarks"] = grid["remarks"].astype("object")
+
+    with st.form(f"evaluation_grid_{tender_id}"):
+        edited = st.data_editor(
+            grid,
+            disabled=["vendor_name", "financial_spec", "amount", "final_score"],
+            column_config={
+                "technical_score": st.column_config.NumberColumn("Technical Score", min_value=0.0, max_value=100.0, step=0.5),
+                "financial_score": st.column_config.NumberColumn("Financial Score", min_value=0.0, max_value=100.0, step=0.5),
+                "final_score": st.column_config.NumberColumn("Final Score"),
+                "remarks": st.column_config.TextColumn("Remarks"),
+            },
+            use_container_width=True,
+            key=f"evaluation_editor_{tender_id}",
+        )
+        submitted = st.form_submit_button("Save all changes")
+
+    if submitted:
+        before = grid[EVALUATION_COLUMNS]
+        after = edited[EVALUATION_COLUMNS]
+        # NaN != NaN, so compare with both-missing counted as equal
+        changed = ((before != after) & ~(before.isna() & after.isna())).any(axis=1)
+        evaluations = [Evaluation(**r) for r in after[changed].reset_index().to_dict("records")]
+        result = save_evaluations(tender_id, evaluations)
+        if result.ok:
+            st.success(result.message)
+        else:
+            st.error(result.message)
+
+
+def scoring_form(tender_id):
+    st.subheader("Automatic Scoring")
+    config = get_tender_scoring(tender_id)
+
+    methods = list(scoring.METHODS)
+    method = st.selectbox(
+        "Method", methods, index=methods.index(config["method"]),
+        format_func=lambda m: {"SUM": "Technical + Financial (out of 200)",
+                               "QCBS": "QCBS weighted (out of 100)",
+                               "L1": "Lowest price among qualified (out of 100)"}[m],
+        key=f"scoring_method_{tender_id}"
+    )
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        tech_weight = st.number_input("Technical weight", 0.0, 1.0, float(config["tech_weight"]), 0.05,
+                                      key=f"scoring_tw_{tender_id}", disabled=method != "QCBS")
+    with col2:
+        fin_weight = st.number_input("Financial weight", 0.0, 1.0, float(config["fin_weight"]), 0.05,
+                                     key=f"scoring_fw_{tender_id}", disabled=method != "QCBS")
+    with col3:
+        min_tech = st.number_input("Minimum technical score", 0.0, 100.0, float(config["min_tech_score"]), 1.0,
+                                   key=f"scoring_min_{tender_id}")
+    st.caption("Financial scores are computed from the bid amounts (100 × lowest qualified price / bid price); "
+               "technical scores come from the evaluation form.")
+
+    if st.button("Save settings and score all bids", key=f"scoring_run_{tender_id}"):
+        result = set_tender_scoring(tender_id, method, tech_weight, fin_weight, min_tech)
+        if not result.ok:
+            st.error(result.message)
+            return
+        result = score_tender(tender_id)
+        if result.ok:
+            st.success(result.message)
+        else:
+            st.warning(result.message)
+
+
+def leaderboard_widget(tender_id):
+    summary = get_leaderboard_summary(tender_id)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Bids", summary.bid_count)
+    col2.metric("Evaluated", summary.evaluated)
+    col3.metric("Pending", summary.pending)
+    col4.metric("Lowest price (L1)", format_amount(summary.l1_paise, summary.l1_currency))
+
+    board = get_tender_leaderboard(tender_id)
+    if board.empty:
+        st.info("No bids submitted for this tender yet.")
+    else:
+        st.dataframe(board, use_container_width=True, hide_index=True)
+    return summary, board
+
+
+def award_form(org_id=None):
+    st.header("Award Tender")
+
+    # without an organisation (admin) every tender awaiting award is listed
+    tenders = get_tenders_awaiting_award(org_id)
+    if tenders.empty:
+        st.warning("No open tenders available.")
+        return
+
+    selected_ref = st.selectbox(
+        "Select an open tender:",
+        tenders['tender_ref_no'],
+        format_func=lambda ref: _tender_label(tenders, ref)
+    )
+    tender_id = int(tenders.loc[tenders['tender_ref_no'] == selected_ref, 'tender_id'].values[0])
+
+    st.subheader("Leaderboard")
+    summary, board = leaderboard_widget(tender_id)
+    if board.empty:
+        return
+
+    if summary.pending:
+        st.warning("Cannot award this tender. Some bids have not been evaluated yet.")
+        return
+
+    st.success("All bids have been evaluated. You can now select a winner.")
+    # ranked order, so the current leader is preselected
+    vendor_options = [
+        f"{vid} — {name if isinstance(name, str) else 'Unknown'}"
+        for vid, name in zip(board['vendor_id'], board['vendor_name'])
+    ]
+    ranked_ids = board['vendor_id'].tolist()
+    leader = ranked_ids.index(summary.leader_vendor_id) if summary.leader_vendor_id in ranked_ids else 0
+
+    selected_vendor_str = st.selectbox("Select winner:", vendor_options, index=leader)
+    winner_id = int(selected_vendor_str.split(" — ")[0])
+
+    if st.button("Award Tender"):
+        result = award_tender(tender_id, winner_id)
+        if result.ok:
+            st.success(result.message)
+        else:
+            st.error(f"Error while awarding tender: {result.message}")
+
+
 
 
 
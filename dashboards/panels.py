@@ -0,0 +1,37 @@
+import functools
+
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+from database.db_utils import unit_of_work
+
+
+# Dashboard tabs are "panels": Streamlit fragments, so a widget change or a button inside one
+# reruns just that panel (and its queries) instead of the whole page with every other tab.
+#
+#   @panel                  def inbox_tab(vendor): ...
+#   rerun_panel()           after a write that only this panel shows
+#   st.rerun()              after a write other panels show too, or to switch pages
+#
+# A fragment rerun doesn't go through main.py, so a panel opens its own unit of work then
+# (inside a full run it shares the page's). Without fragment support (Streamlit < 1.33)
+# panels are plain functions and rerun_panel() reruns the page.
+
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+
+def panel(fn):
+    @functools.wraps(fn)
+    def render(*args, **kwargs):
+        with unit_of_work():
+            return fn(*args, **kwargs)
+
+    return _fragment(render) if _fragment else render
+
+
+def rerun_panel():
+    try:
+        st.rerun(scope="fragment")
+    except (TypeError, StreamlitAPIException):
+        # older Streamlit, or called outside a fragment rerun (e.g. during a full run)
+        st.rerun()
@@ -1,21 +1,20 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
 from database.db_utils import *
+from dashboards.panels import panel, rerun_panel
+from database.prefetch import call, prefetch
 
-for key, default in {
+SESSION_DEFAULTS = {
     "vendor_logged_in": False,
     "vendor_email": None,
+    "vendor_principal": None,
     "page": None,
-}.items():
-    if key not in st.session_state:
-        st.session_state[key] = default
+}
 
 def vendor_login():
-    if "vendor_logged_in" not in st.session_state:
-        st.session_state.vendor_logged_in = False
-    if "vendor_email" not in st.session_state:
-        st.session_state.vendor_email = None
+    for key, default in SESSION_DEFAULTS.items():
+        if key not in st.session_state:
+            st.session_state[key] = default
 
     # Show dashboard once logged in
     if st.session_state.vendor_logged_in:
@@ -32,24 +31,17 @@ def vendor_login():
             password = st.text_input("Password", type="password", key="login_password")
 
             if st.button("Login"):
-                vendor = get_vendor_by_email(email)
+                # resolved once here; the rest of the dashboard works off the principal's id
+                vendor = authenticate_vendor(email, password)
                 if vendor:
-                    conn = get_connection()
-                    cur = conn.cursor()
-                    cur.execute("SELECT password FROM Vendor WHERE email=?", (email,))
-                    row = cur.fetchone()
-                    conn.close()
-
-                    if row and password == row[0]:
-                        st.success(f"Welcome back, {vendor['name']}!")
-                        st.session_state.vendor_logged_in = True
-                        st.session_state.vendor_email = email
-                        # clear small keys
-                        if "login_password" in st.session_state:
-                            del st.session_state["login_password"]
-                        st.rerun()
-                    else:
-                        st.error("Invalid credentials.")
+                    st.success(f"Welcome back, {vendor['name']}!")
+                    st.session_state.vendor_logged_in = True
+                    st.session_state.vendor_email = email
+                    st.session_state.vendor_principal = vendor
+                    # clear small keys
+                    if "login_password" in st.session_state:
+                        del st.session_state["login_password"]
+                    st.rerun()
                 else:
                     st.error("Invalid credentials.")
 
@@ -66,21 +58,11 @@ def vendor_login():
                 if not name or not email_signup or not password_signup:
                     st.warning("Please fill all required fields.")
                 else:
-                    conn = get_connection()
-                    cur = conn.cursor()
-                    cur.execute("SELECT 1 FROM Vendor WHERE email=?", (email_signup,))
-                    existing = cur.fetchone()
-
-                    if existing:
-                        st.warning("Email already registered. Please log in instead.")
+                    result = register_vendor(name, email_signup, phone, address, password_signup)
+                    if result.ok:
+                        st.success(result.message)
                     else:
-                        cur.execute(
-                            "INSERT INTO Vendor (name, email, phone, address, password) VALUES (?, ?, ?, ?, ?)",
-                            (name, email_signup, phone, address, password_signup),
-                        )
-                        conn.commit()
-                        conn.close()
-                        st.success("Signup successful! You can now log in.")
+                        st.warning(result.message)
 
 
 
@@ -90,7 +72,9 @@ def vendor_login():
 
 def show_vendor_dashboard():
 
-    if not st.session_state.get("vendor_logged_in"):
+    vendor = st.session_state.get("vendor_principal")
+    if not st.session_state.get("vendor_logged_in") or not vendor:
+        st.session_state.vendor_logged_in = False
         st.warning("Please log in as a vendor to continue.")
         st.stop()
 
@@ -104,9 +88,8 @@ def show_vendor_dashboard():
         edit_bid_page()
         return
 
-    
-    vendor = get_vendor_by_email(st.session_state.vendor_email)
-    unread = get_unread_notifications_count(st.session_state.vendor_email)
+    # every tab below is rendered on each run: load their data concurrently first
+    prefetch(dashboard_reads(vendor))
 
     st.title("Vendor Dashboard")
     st.success(f"Logged in as: {vendor['email']}")
@@ -115,7 +98,7 @@ def show_vendor_dashboard():
         f"Open Tenders",
         f"Submit a Bid",
         f"Submitted Bids",
-        f"Inbox ({unread})",
+        "Inbox",
         f"Logout"
     ])
 
@@ -131,6 +114,7 @@ def show_vendor_dashboard():
         if st.button("Log Out"):
             st.session_state.vendor_logged_in = False
             st.session_state.vendor_email = None
+            st.session_state.vendor_principal = None
             st.session_state.page = None
             st.success("Logged out.")
             st.rerun()
@@ -138,15 +122,59 @@ def show_vendor_dashboard():
 
 
 
+# the read calls the tabs are about to make, from the current widget state (see prefetch.py);
+# must stay in step with the calls in the tabs themselves
+def dashboard_reads(vendor):
+    ss = st.session_state
+    shown = ss.get("open_tenders_filters")
+    return [
+        call(get_vendor_unread_count, vendor["id"]),
+        call(get_vendor_notifications, vendor["id"]),
+        call(get_vendor_bids, vendor["id"]),
+        # the tender tabs filter by organisation id, so the name lookup runs on the worker too
+        call(_tender_reads,
+             (ss.get("filter_org", "All"), ss.get("filter_location", "All"), ss.get("filter_search") or None),
+             tuple(sorted(shown.items())) if shown else None, tuple(ss.get("open_tenders_cursors", [None])),
+             (ss.get("submit_org", "All"), ss.get("submit_loc", "All"), ss.get("submit_search") or None)),
+    ]
+
+
+def _tender_reads(open_filter, shown, cursors, submit_filter):
+    orgs_df = get_org_names()
+
+    # Open Tenders
+    org_name, loc, search = open_filter
+    org_id = _org_id(orgs_df, org_name)
+    filters = {"location": None if loc == "All" else loc, "search": search, "org_id": org_id}
+    get_tenders_locations(org_id=org_id)
+    count_open_tenders(**filters)
+    for cursor in cursors if shown == tuple(sorted(filters.items())) else [None]:
+        get_open_tenders(**filters, limit=OPEN_TENDERS_PAGE_SIZE, after=cursor)
+
+    # Submit a Bid
+    org_name, loc, search = submit_filter
+    org_id = _org_id(orgs_df, org_name)
+    get_tenders_locations(org_id=org_id)
+    get_open_tenders(location=None if loc == "All" else loc, search=search, org_id=org_id,
+                     limit=SUBMIT_TENDER_OPTIONS)
+
+
+def _org_id(orgs_df, org_name):
+    match = orgs_df.loc[orgs_df["name"] == org_name, "org_id"]
+    return None if org_name == "All" or match.empty else int(match.values[0])
+
+
 ########################
 ### Open Tenders tab ###
 ########################
 
+OPEN_TENDERS_PAGE_SIZE = 20
+
+
+@panel
 def show_open_tenders():
     st.header("Open Tenders")
-    conn = get_connection()
-    orgs_df = pd.read_sql_query("SELECT org_id, name FROM Organisation ORDER BY name", conn)
-    conn.close()
+    orgs_df = get_org_names()
     org_options = ["All"] + orgs_df["name"].tolist()
 
     col_f1, col_f2, col_f3 = st.columns([1, 1, 1])
@@ -154,21 +182,32 @@ def show_open_tenders():
         org_sel = st.selectbox("Organisation", org_options, key="filter_org")
     with col_f2:
         locs = get_tenders_locations(
-            org_id=None if org_sel == "All" else int(orgs_df.loc[orgs_df["name"] == org_sel, "org_id"].values[0])
+            org_id=_org_id(orgs_df, org_sel)
         )
         loc_options = ["All"] + sorted([l for l in locs if l])
         loc = st.selectbox("Location", loc_options, key="filter_location")
     with col_f3:
         search = st.text_input("Search title / ref", key="filter_search")
 
-    org_id_filter = None if org_sel == "All" else int(orgs_df.loc[orgs_df["name"] == org_sel, "org_id"].values[0])
+    org_id_filter = _org_id(orgs_df, org_sel)
+    filters = {"location": None if loc == "All" else loc, "search": search or None, "org_id": org_id_filter}
+
+    # pages are loaded on demand; start again from the first page whenever the filters change
+    if st.session_state.get("open_tenders_filters") != filters:
+        st.session_state["open_tenders_filters"] = filters
+        st.session_state["open_tenders_cursors"] = [None]
 
-    df = get_open_tenders(location=None if loc == "All" else loc, search=search or None, org_id=org_id_filter)
-    if df.empty:
+    total = count_open_tenders(**filters)
+    if not total:
         st.info("No open tenders")
         return
 
-    tenders = df.to_dict(orient="records")
+    tenders = []
+    next_cursor = None
+    for cursor in st.session_state["open_tenders_cursors"]:
+        page = get_open_tenders(**filters, limit=OPEN_TENDERS_PAGE_SIZE, after=cursor)
+        tenders.extend(page.to_dict(orient="records"))
+        next_cursor = open_tenders_cursor(page) if len(page) == OPEN_TENDERS_PAGE_SIZE else None
 
     # tighten up spacing
     st.markdown("""
@@ -193,6 +232,8 @@ def show_open_tenders():
                 st.markdown(f"Organisation: **{left.get('org_name','-')}**")
                 st.markdown(f"Location: **{left.get('location','-')}**")
                 st.markdown(f"Opens: **{left.get('opening_date','-')}** • Closes: **{left.get('closing_date','-')}**")
+                if left.get("snippet"):
+                    st.caption(left["snippet"])
                 if st.button("View Details", key=f"view_{left['tender_id']}"):
                     st.session_state["selected_tender_ref"] = left["tender_ref_no"]
                     st.session_state["page"] = "tender_details"
@@ -207,11 +248,18 @@ def show_open_tenders():
                     st.markdown(f"Organisation: **{right.get('org_name','-')}**")  
                     st.markdown(f"Location: **{right.get('location','-')}**")
                     st.markdown(f"Opens: **{right.get('opening_date','-')}** • Closes: **{right.get('closing_date','-')}**")
+                    if right.get("snippet"):
+                        st.caption(right["snippet"])
                     if st.button("View Details", key=f"view_{right['tender_id']}"):
                         st.session_state["selected_tender_ref"] = right["tender_ref_no"]
                         st.session_state["page"] = "tender_details"
                         st.rerun()
 
+    st.caption(f"Showing {len(tenders)} of {total} open tenders")
+    if next_cursor is not None and st.button("Load more", key="open_tenders_more"):
+        st.session_state["open_tenders_cursors"].append(next_cursor)
+        rerun_panel()
+
 
         
 ###########################
@@ -219,7 +267,7 @@ def show_open_tenders():
 ###########################
 
 def show_tender_details():
-    vendor = get_vendor_by_email(st.session_state.get("vendor_email"))
+    vendor = st.session_state.get("vendor_principal")
     if not vendor or not st.session_state.get("vendor_logged_in"):
         st.warning("Please log in as a vendor to continue.")
         st.session_state["page"] = None
@@ -258,7 +306,7 @@ def show_tender_details():
             st.rerun()
 
     ref_key = tender["tender_ref_no"]
-    submitted_flag_key = f"bid_submitted_{vendor['vendor_id']}_{ref_key}"
+    submitted_flag_key = f"bid_submitted_{vendor['id']}_{ref_key}"
 
     if st.session_state.get(submitted_flag_key, False):
         st.success("Your bid was submitted successfully.")
@@ -274,17 +322,10 @@ def show_tender_details():
             st.warning("Please fill in both Technical and Financial specifications before submitting.")
             return
 
-        ok, msg = submit_bid(vendor["vendor_id"], ref_key, tech.strip(), fin.strip())
-        if ok:
+        result = submit_bid(vendor["id"], ref_key, tech.strip(), fin.strip())
+        if result.ok:
             st.session_state[submitted_flag_key] = True
-
-            create_notification(
-                vendor["vendor_id"],
-                "Bid Submitted",
-                f"Your bid for {ref_key} was submitted successfully."
-            )
-
-            st.success(msg)
+            st.success(result.message)
             if "prefill_tender_ref" in st.session_state:
                 try:
                     del st.session_state["prefill_tender_ref"]
@@ -292,7 +333,7 @@ def show_tender_details():
                     pass
             st.rerun()
         else:
-            st.error(msg)
+            st.error(result.message)
 
 
 
@@ -300,23 +341,20 @@ def show_tender_details():
 ### Submit bid tab ###
 ######################
 
+SUBMIT_TENDER_OPTIONS = 200
+
+
+@panel
 def submit_bid_tab(vendor):
     st.header("Submit a Bid")
 
-    vendor_obj = get_vendor_by_email(st.session_state.get("vendor_email"))
-    if not vendor_obj:
+    if not vendor:
         st.warning("Please log in as a vendor to continue.")
         return
 
     pre = st.session_state.get("prefill_tender_ref")
-    df = get_open_tenders()
-    if df.empty:
-        st.info("No open tenders.")
-        return
 
-    conn = get_connection()
-    orgs_df = pd.read_sql_query("SELECT org_id, name FROM Organisation ORDER BY name", conn)
-    conn.close()
+    orgs_df = get_org_names()
     org_options = ["All"] + orgs_df["name"].tolist()
 
     col1, col2 = st.columns(2)
@@ -324,23 +362,21 @@ def submit_bid_tab(vendor):
         org_sel = st.selectbox("Filter Organisation", org_options, key="submit_org")
     with col2:
         locs = get_tenders_locations(
-            org_id=None if org_sel == "All" else int(orgs_df.loc[orgs_df["name"] == org_sel, "org_id"].values[0])
+            org_id=_org_id(orgs_df, org_sel)
         )
         locations = ["All"] + sorted([l for l in locs if l])
         loc = st.selectbox("Filter Location", locations, key="submit_loc")
 
-    filtered = df.copy()
-    if org_sel != "All":
-        sel_org_id = int(orgs_df.loc[orgs_df["name"] == org_sel, "org_id"].values[0])
-        filtered = filtered[filtered["org_id"] == sel_org_id]
-    if loc != "All":
-        filtered = filtered[filtered["location"] == loc]
     s = st.text_input("Search by Tender title or Tender Reference No.", key="submit_search")
-    if s:
-        filtered = filtered[
-            filtered["title"].str.contains(s, case=False, na=False) |
-            filtered["tender_ref_no"].str.contains(s, case=False, na=False)
-        ]
+
+    # filtering and ranking happen in the database (full-text index for the search box)
+    sel_org_id = _org_id(orgs_df, org_sel)
+    filtered = get_open_tenders(
+        location=None if loc == "All" else loc, search=s or None, org_id=sel_org_id,
+        limit=SUBMIT_TENDER_OPTIONS
+    )
+    if len(filtered) == SUBMIT_TENDER_OPTIONS:
+        st.caption(f"Showing the first {SUBMIT_TENDER_OPTIONS} matches. Refine the filters to narrow the list.")
 
     opts = filtered["tender_ref_no"].tolist()
     if not opts:
@@ -371,12 +407,12 @@ def submit_bid_tab(vendor):
         st.warning("Selected tender not found. It may have been removed.")
         return
 
-    flag_key = f"bid_submitted_{vendor_obj['vendor_id']}_{selected_ref}"
+    flag_key = f"bid_submitted_{vendor['id']}_{selected_ref}"
     if st.session_state.get(flag_key, False):
         st.success("Your bid was submitted successfully.")
         if st.button("OK", key=f"ok_{flag_key}"):
             del st.session_state[flag_key]
-            st.rerun()
+            rerun_panel()
         return
 
     with st.form(key=f"submit_form_{selected_ref}"):
@@ -391,18 +427,12 @@ def submit_bid_tab(vendor):
         st.warning("Please provide both technical and financial specifications before submitting.")
         return
 
-    ok, msg = submit_bid(vendor_obj["vendor_id"], selected_ref, tech.strip(), fin.strip())
-    if ok:
+    result = submit_bid(vendor["id"], selected_ref, tech.strip(), fin.strip())
+    if result.ok:
         st.session_state[flag_key] = True
-
-        try:
-            create_notification(vendor_obj["vendor_id"], "Bid Submitted", f"Your bid for {selected_ref} was submitted.")
-        except Exception:
-            pass
-
-        st.rerun()
+        st.rerun()  # the whole page: the new bid shows up under Submitted Bids too
     else:
-        st.error(msg)
+        st.error(result.message)
 
 
 
@@ -411,33 +441,11 @@ def submit_bid_tab(vendor):
 ### Submitted Bids tab ###
 ##########################
 
+@panel
 def submitted_bids_tab(vendor):
     st.header("Your Submitted Bids")
 
-    df = get_bids_for_vendor(vendor["email"])
-
-    if (df is None) or df.empty:
-        conn = get_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute("""
-                SELECT l.tender_id, t.tender_ref_no, t.title, t.location,
-                       l.submission_date, l.technical_spec, l.financial_spec,
-                       l.status, l.remarks, t.status as tender_status, l.is_winner
-                FROM BidLog l
-                JOIN Tender t ON l.tender_id = t.tender_id
-                JOIN Vendor v ON l.vendor_id = v.vendor_id
-                WHERE v.email = ?
-                ORDER BY l.submission_date DESC
-            """, (vendor["email"],))
-            rows = cur.fetchall()
-            if rows:
-                cols = ["tender_id","tender_ref_no","title","location","submission_date",
-                        "technical_spec","financial_spec","status","remarks","tender_status","is_winner"]
-                df = pd.DataFrame(rows, columns=cols)
-                df["record_type"] = "Log"
-        finally:
-            conn.close()
+    df = get_vendor_bids(vendor["id"])
 
     if df is None or df.empty:
         st.info("No bids submitted yet.")
@@ -493,15 +501,12 @@ def submitted_bids_tab(vendor):
                         st.rerun()
                 with b3:
                     if row.get("status") == "Submitted" and st.button("Withdraw", key=f"del_{uid}"):
-                        vendor_obj = get_vendor_by_email(st.session_state.vendor_email)
-                        delete_bid(row["tender_id"], vendor_obj["vendor_id"])
-                        create_notification(
-                            vendor_obj["vendor_id"],
-                            "Bid Withdrawn",
-                            f"Your bid for Tender {row.get('tender_ref_no')} was withdrawn."
-                        )
-                        st.success(f"Bid for {row.get('tender_ref_no')} withdrawn.")
-                        st.rerun()
+                        result = delete_bid(row["tender_id"], vendor["id"])
+                        if not result.ok:
+                            st.error(result.message)
+                        else:
+                            st.success(f"Bid for {row.get('tender_ref_no')} withdrawn.")
+                            rerun_panel()
             if (i + 1) % 2 == 0:
                 cols = st.columns(2)
 
@@ -607,12 +612,14 @@ def edit_bid_page():
             if not new_tech.strip() or not new_fin.strip():
                 st.warning("Both fields are required.")
             else:
-                vendor_obj = get_vendor_by_email(st.session_state.vendor_email)
-                update_bid(vendor_obj["vendor_id"], bid["tender_id"], new_tech.strip(), new_fin.strip())
-                create_notification(vendor_obj["vendor_id"], "Bid Updated", f"Your bid for Tender {bid['tender_ref_no']} was updated.")
-                st.success("Bid updated successfully.")
-                st.session_state["page"] = None
-                st.rerun()
+                vendor = st.session_state.vendor_principal
+                result = update_bid(vendor["id"], bid["tender_id"], new_tech.strip(), new_fin.strip())
+                if not result.ok:
+                    st.error(result.message)
+                else:
+                    st.success("Bid updated successfully.")
+                    st.session_state["page"] = None
+                    st.rerun()
     with col2:
         ...
     with col3:
@@ -626,10 +633,12 @@ def edit_bid_page():
 ### notifications tab  ###
 ##########################
 
+@panel
 def inbox_tab(vendor):
-    st.header("Inbox")
+    unread = get_vendor_unread_count(vendor["id"])
+    st.header(f"Inbox ({unread} unread)" if unread else "Inbox")
 
-    rows = get_notifications(vendor["email"])
+    rows = get_vendor_notifications(vendor["id"])
     if not rows:
         st.info("No notifications.")
         return
@@ -646,5 +655,8 @@ def inbox_tab(vendor):
 
     st.markdown("---")
     if st.button("Mark All as Read"):
-        mark_notifications_read(vendor["email"])
-        st.rerun()
\ No newline at end of file
+        result = mark_vendor_notifications_read(vendor["id"])
+        if not result.ok:
+            st.error(result.message)
+        else:
+            rerun_panel()
\ No newline at end of file
@@ -0,0 +1,123 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from database.connection import ALL_TABLES
+
+
+# writes to a table can also change rows of these tables (FK cascades, triggers)
+DEPENDENTS = {
+    "Organisation": ("Tender", "OrgStats"),
+    "Vendor": ("Tender", "Bid", "BidLog", "Notification", "VendorStats"),
+    "Tender": ("Bid", "BidLog", "TenderSearch", "TenderStats", "OrgStats", "TenderScoring", "TenderLeaderboard"),
+    "Bid": ("TenderStats", "BidRanking"),
+    "BidLog": ("TenderStats",),
+    "Notification": ("VendorStats",),
+}
+
+
+def _affected(tables):
+    # tables plus everything reachable through DEPENDENTS
+    seen = set()
+    stack = list(tables)
+    while stack:
+        t = stack.pop()
+        if t in seen:
+            continue
+        seen.add(t)
+        stack.extend(DEPENDENTS.get(t, ()))
+    return seen
+
+
+class QueryCache:
+    """
+    Process-wide LRU/TTL cache for read helpers.
+
+    Every table has a generation counter that is bumped whenever a commit writes to it.
+    A cached result remembers the generations of the tables it was read from and is
+    only served while none of them has moved, so a write is visible on the very next read.
+    Writes made by other processes are picked up when a unit of work starts (the pool checks
+    PRAGMA data_version and bumps every generation if none of its own commits explains the
+    change); the TTL is only a backstop for reads made outside a unit of work, and for another
+    process's write that lands together with one of ours.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.snapshot_source = None  # returns the generations seen by this thread's read snapshot
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._global = 0             # bumped for DDL / unparsed writes
+        self._lock = threading.Lock()
+
+    # --- invalidation ---
+
+    def bump(self, tables):
+        with self._lock:
+            if ALL_TABLES in tables:
+                self._global += 1
+                tables = [t for t in tables if t != ALL_TABLES]
+            for t in _affected(tables):
+                self._generations[t] = self._generations.get(t, 0) + 1
+
+    def generations(self):
+        with self._lock:
+            return self._global, dict(self._generations)
+
+    def _stamp(self, tables, generations=None):
+        g, gens = generations if generations is not None else (self._global, self._generations)
+        return (g,) + tuple(gens.get(t, 0) for t in tables)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # --- decorator ---
+
+    def cached(self, *tables, ttl=None):
+        """
+        Cache a read helper whose result depends only on its arguments and on `tables`.
+        The undecorated function stays available as `fn.__wrapped__`.
+        """
+        ttl = self.ttl if ttl is None else ttl
+
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                key = (fn.__qualname__, args, tuple(sorted(kwargs.items())))
+                now = time.monotonic()
+
+                with self._lock:
+                    stamp = self._stamp(tables)
+                    entry = self._entries.get(key)
+                    if entry is not None and entry[1] == stamp and entry[2] > now:
+                        self._entries.move_to_end(key)
+                        return _detach(entry[0])
+
+                snapshot = self.snapshot_source() if self.snapshot_source else None
+                value = fn(*args, **kwargs)
+
+                # a result read through an older snapshot than the current generations
+                # is correct for this render but must not be served to anyone else
+                if snapshot is not None and self._stamp(tables, snapshot) != stamp:
+                    return value
+
+                with self._lock:
+                    self._entries[key] = (value, stamp, now + ttl)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+                return _detach(value)
+
+            return wrapper
+
+        return decorator
+
+
+def _detach(value):
+    # callers get their own copy, so mutating a DataFrame / list doesn't poison the cache
+    if hasattr(value, "copy"):
+        return value.copy()
+    return value
@@ -0,0 +1,334 @@
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+# settings applied once, when a connection is first opened
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -16000",      # ~16 MB page cache per connection
+    "PRAGMA mmap_size = 134217728",    # 128 MB memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA foreign_keys = ON",
+)
+
+# statements that need a write lock
+_WRITE_RE = re.compile(r"^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b", re.IGNORECASE)
+
+# table a DML statement writes to
+_TARGET_RE = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)"
+    r"\s+[\"`\[]?(\w+)",
+    re.IGNORECASE,
+)
+
+ALL_TABLES = "*"
+
+
+def is_write(sql):
+    return bool(_WRITE_RE.match(sql))
+
+
+def written_table(sql):
+    # the table a write statement touches, or ALL_TABLES for DDL / anything we can't parse
+    m = _TARGET_RE.match(sql)
+    return m.group(1) if m else ALL_TABLES
+
+
+class PooledCursor(sqlite3.Cursor):
+    """
+    Reports every statement to pool.on_statement (if set) with its latency and row count.
+    For queries the time spent fetching is included, so a statement is reported at its first
+    fetchone(), once its rows are exhausted, or when the cursor is reused or closed.
+    """
+
+    _pending = None  # [sql, parameters, seconds, rows] of a query whose rows are still being fetched
+
+    def execute(self, sql, parameters=()):
+        self._report()
+        self.connection.before_statement(sql)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.connection.after_statement()
+            self._track(sql, parameters, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._report()
+        self.connection.before_statement(sql)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.after_statement()
+            self._track(sql, None, time.perf_counter() - started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        # fetchone() is how single-row lookups are read: report on the first one rather than
+        # waiting for an exhaustion that never comes
+        self._fetched(time.perf_counter() - started, 0 if row is None else 1, True)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(time.perf_counter() - started, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(time.perf_counter() - started, len(rows), True)
+        return rows
+
+    def close(self):
+        self._report()
+        super().close()
+
+    def __del__(self):
+        # no reporting during garbage collection (a query left half-read isn't reported)
+        self._pending = None
+
+    def _track(self, sql, parameters, seconds):
+        if self.connection.pool.on_statement is None:
+            return
+        if self.description is None:
+            # nothing to fetch (DML / DDL): report right away
+            self._pending = [sql, parameters, seconds, max(self.rowcount, 0)]
+            self._report()
+        else:
+            self._pending = [sql, parameters, seconds, 0]
+
+    def _fetched(self, seconds, rows, exhausted):
+        if self._pending is not None:
+            self._pending[2] += seconds
+            self._pending[3] += rows
+            if exhausted:
+                self._report()
+
+    def _report(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            self.connection.pool.on_statement(self.connection, *pending)
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    A sqlite3 connection owned by a ConnectionPool.
+    close() hands the connection back to the pool instead of tearing it down,
+    so existing `conn = get_connection() ... conn.close()` code keeps working.
+    """
+
+    def setup(self, pool):
+        self.pool = pool
+        self.pinned = 0            # > 0 while bound to a unit of work
+        self.read_snapshot = False  # True while holding the unit of work's read transaction
+        self.snapshot = None       # pool.on_snapshot() taken when that transaction started reading
+        self.dirty = set()         # tables written in the current transaction
+        for pragma in PRAGMAS:
+            sqlite3.Connection.execute(self, pragma)
+        # PRAGMA data_version / pool.commits when this connection last started a unit of work
+        self.seen_commits = pool.commits
+        self.data_version = sqlite3.Connection.execute(self, "PRAGMA data_version").fetchone()[0]
+
+    def cursor(self, factory=PooledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def before_statement(self, sql):
+        if not is_write(sql):
+            if self.read_snapshot and self.snapshot is None and self.pool.on_snapshot:
+                self.snapshot = self.pool.on_snapshot()
+            return
+
+        # a write inside the shared read transaction would fail with SQLITE_BUSY_SNAPSHOT
+        # if anyone else committed since the snapshot was taken, so drop the snapshot first
+        if self.read_snapshot:
+            self.end_snapshot()
+            sqlite3.Connection.rollback(self)
+        self.dirty.add(written_table(sql))
+
+    def after_statement(self):
+        # DDL and writes made outside a transaction are already committed
+        if self.dirty and not self.in_transaction:
+            self.flush_dirty()
+
+    def end_snapshot(self):
+        self.read_snapshot = False
+        self.snapshot = None
+
+    def flush_dirty(self):
+        tables, self.dirty = self.dirty, set()
+        self.pool.committed()
+        if self.pool.on_commit:
+            self.pool.on_commit(tables)
+
+    def commit(self):
+        self.end_snapshot()
+        super().commit()
+        if self.dirty:
+            self.flush_dirty()
+
+    def rollback(self):
+        self.end_snapshot()
+        self.dirty.clear()
+        super().rollback()
+
+    @contextmanager
+    def transaction(self):
+        """
+        BEGIN IMMEDIATE ... COMMIT: takes the write lock up front (waiting up to busy_timeout)
+        instead of failing half-way through, and rolls back if the block raises.
+        """
+        if self.read_snapshot:
+            self.end_snapshot()
+            sqlite3.Connection.rollback(self)
+        elif self.in_transaction:
+            self.commit()
+        sqlite3.Connection.execute(self, "BEGIN IMMEDIATE")
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+        self.pool.committed()
+
+    def close(self):
+        if self.pinned:
+            return
+        self.pool.release(self)
+
+    def discard(self):
+        sqlite3.Connection.close(self)
+
+
+class ConnectionPool:
+    """
+    Keeps pre-configured connections around between calls and lets a thread
+    bind one of them for a whole page render (see unit_of_work).
+    """
+
+    def __init__(self, path, max_idle=8, on_commit=None, on_snapshot=None, on_statement=None):
+        self.path = path
+        self.max_idle = max_idle
+        self.on_commit = on_commit        # called with the set of tables written by each commit
+        self.on_snapshot = on_snapshot    # called when a unit of work's read snapshot starts
+        self.on_statement = on_statement  # called with (conn, sql, params, seconds, rows) per statement
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+        self.commits = 0                  # commits made through this pool, see _check_data_version
+        self._commits_lock = threading.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.path,
+            factory=PooledConnection,
+            check_same_thread=False,  # connections move between Streamlit worker threads
+            timeout=5.0,
+        )
+        conn.setup(self)
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._open()
+
+    def release(self, conn):
+        if conn.in_transaction:
+            # same semantics as closing a plain connection: uncommitted work is discarded
+            sqlite3.Connection.rollback(conn)
+        conn.end_snapshot()
+        conn.dirty.clear()
+        if self._idle.qsize() >= self.max_idle:
+            conn.discard()
+        else:
+            self._idle.put(conn)
+
+    def committed(self):
+        with self._commits_lock:
+            self.commits += 1
+
+    def current_snapshot(self):
+        # what on_snapshot() returned for this thread's unit of work, if it still holds its snapshot
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and conn.read_snapshot:
+            return conn.snapshot
+        return None
+
+    def drop_snapshot(self):
+        # after a write committed on another connection (e.g. by the write queue), so the rest
+        # of this thread's unit of work sees it -- same as a write on the bound connection does
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and conn.read_snapshot:
+            conn.end_snapshot()
+            sqlite3.Connection.rollback(conn)
+
+    def connection(self):
+        # inside a unit of work every caller on this thread shares the bound connection
+        current = getattr(self._local, "conn", None)
+        if current is not None:
+            return current
+        return self.acquire()
+
+    @contextmanager
+    def unit_of_work(self):
+        """
+        Bind one connection to the current thread and open a read transaction on it,
+        so every query made while rendering a page sees the same snapshot.
+        The snapshot is dropped as soon as the first write (or commit) happens.
+        """
+        current = getattr(self._local, "conn", None)
+        if current is not None:
+            # nested: just reuse the outer unit of work
+            yield current
+            return
+
+        conn = self.acquire()
+        conn.pinned += 1
+        self._local.conn = conn
+        try:
+            self._check_data_version(conn)
+            sqlite3.Connection.execute(conn, "BEGIN")
+            conn.read_snapshot = True
+            yield conn
+        finally:
+            self._local.conn = None
+            conn.pinned -= 1
+            self.release(conn)
+
+    def _check_data_version(self, conn):
+        # PRAGMA data_version changes whenever another connection has committed since this one
+        # last asked. Commits made through this pool have already bumped the tables they wrote,
+        # so only a change that no pool commit accounts for -- another process (API server, a
+        # second scheduler) wrote -- invalidates everything. If both happened, the other
+        # process's write is left to the cache TTL.
+        # Read before BEGIN: inside the transaction this would already pin the read snapshot,
+        # before the caller had a chance to (say) create the schema.
+        commits = self.commits
+        version = sqlite3.Connection.execute(conn, "PRAGMA data_version").fetchone()[0]
+        if version != conn.data_version and commits == conn.seen_commits and self.on_commit:
+            self.on_commit({ALL_TABLES})
+        conn.data_version, conn.seen_commits = version, commits
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().discard()
+            except queue.Empty:
+                break
@@ -1,44 +1,172 @@
 import sqlite3
 import pandas as pd
 import os
-import streamlit as st
-from datetime import datetime
+import hmac
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from database.connection import ConnectionPool
+from database.cache import QueryCache
+from database.metrics import Metrics
+from database import outbox
+from database.scheduler import TenderScheduler
+from database.write_queue import WriteQueue
+from database.money import parse_amount
+from database.export import export_rows
+from database import scoring
+from database.models import (Outcome, NOT_FOUND, CONFLICT, DB_ERROR, ReadOutcome, ScoreOutcome, AwardOutcome, AwardRequest,
+                             LeaderboardSummary)
+from database.leaderboard import refresh_leaderboards
+import setup_db
 
 BASE_DIR = os.path.dirname(
     os.path.dirname(__file__)
 )
-DB_PATH = os.path.join(BASE_DIR, "database.db")
+DB_PATH = os.environ.get("TENDER_DB_PATH", os.path.join(BASE_DIR, "database.db"))
+
+# read helpers below are cached per argument set and invalidated per table on every commit
+_cache = QueryCache()
+# statement / helper latencies, slow-query log (admin "Metrics" tab, OpenMetrics file);
+# the helpers the app calls are @metrics.timed, except thin aliases of another timed helper,
+# so every call is recorded once
+metrics = Metrics()
+METRICS_FILE = os.environ.get("TENDER_METRICS_FILE")  # OpenMetrics text, rewritten at most every 10s
+_pool = ConnectionPool(DB_PATH, on_commit=_cache.bump, on_snapshot=_cache.generations,
+                       on_statement=metrics.record_statement)
+_cache.snapshot_source = _pool.current_snapshot
+cached_read = _cache.cached
 
 
 # sql queries here
 
 
+# connections come from a shared pool; conn.close() hands them back instead of closing
 def get_connection():
-    return sqlite3.connect(DB_PATH)
+    return _pool.connection()
+
+
+# share one connection (and one read snapshot) for a whole page render:
+#     with unit_of_work():
+#         ...
+@contextmanager
+def unit_of_work():
+    with metrics.rerun(), _pool.unit_of_work() as conn:
+        yield conn
+    _write_metrics_file()
+
+
+# the same for one call made outside a page render (API requests): it gets its own snapshot
+# and sees other processes' writes, without being counted as a rerun
+def call_in_unit_of_work(fn, *args, **kwargs):
+    with _pool.unit_of_work():
+        return fn(*args, **kwargs)
+
+
+_metrics_written = 0.0
+
+
+def _write_metrics_file(every=10.0):
+    global _metrics_written
+    now = time.monotonic()
+    if not METRICS_FILE or now - _metrics_written < every:
+        return
+    _metrics_written = now
+    try:
+        metrics.write_openmetrics(METRICS_FILE)
+    except OSError as e:
+        print("Could not write metrics file:", e)
+
+
+def clear_query_cache():
+    _cache.clear()
+
+
+# tenders an organisation can still evaluate and award: open ones, and ones the scheduler
+# closed at their closing_date that still have bids and no winner (use with Tender aliased t)
+AWAITING_AWARD = """(t.status = 'Open' OR (t.status = 'Closed' AND t.winner_vendor_id IS NULL
+                     AND EXISTS (SELECT 1 FROM Bid b WHERE b.tender_id = t.tender_id)))"""
+
+
+# one atomic write: BEGIN IMMEDIATE, commit on success, rollback if the block raises
+#     with write_transaction() as cur:
+#         cur.execute(...)
+@contextmanager
+def write_transaction():
+    conn = get_connection()
+    try:
+        with conn.transaction():
+            yield conn.cursor()
+    finally:
+        conn.close()
+
+
+_write_queue = None
+
+
+# run op(batch, *args) through the group-commit writer (see write_queue.py) and return its
+# result; for the high-volume writes, so concurrent callers share one commit
+def _queued_write(op, *args):
+    global _write_queue
+    if _write_queue is None or not _write_queue.is_alive():
+        with _worker_lock:
+            if _write_queue is None or not _write_queue.is_alive():
+                _write_queue = WriteQueue(get_connection)
+                _write_queue.start()
+    try:
+        return _write_queue.call(op, *args)
+    finally:
+        _pool.drop_snapshot()
+
+
+# the same for writes that answer with an Outcome: a failing database (lock timeout, queue
+# timeout, I/O error) becomes a failed Outcome of kind DB_ERROR instead of an exception
+def _queued_outcome(op, *args, outcome=Outcome):
+    try:
+        return _queued_write(op, *args)
+    except Exception as e:
+        return outcome(False, f"DB error: {e}", DB_ERROR)
 
 
 
 # ----------------------------------------------------------------------------
 
-# add new vendor (either by signing up, or via admin)
+# signup (and admin "Add a Vendor" / organisation signup): one INSERT, the UNIQUE email
+# decides whether the account is new, so two signups with the same email can't both succeed
+@metrics.timed
+def register_vendor(name, email, phone, address, password):
+    return _register("Vendor", "vendor_id", name, email, phone, address, password)
+
+
+@metrics.timed
+def register_org(name, email, phone, address, password):
+    return _register("Organisation", "org_id", name, email, phone, address, password)
+
+
+def _register(table, id_column, name, email, phone, address, password):
+    with write_transaction() as cur:
+        cur.execute(f"""
+            INSERT INTO {table} (name, email, phone, address, password)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (email) DO NOTHING
+            RETURNING {id_column}
+        """, (name, email, phone, address, password))
+        registered = cur.fetchall()
+    if not registered:
+        return Outcome(False, "Email already registered. Please log in instead.")
+    return Outcome(True, "Signup successful! You can now log in.")
+
+
 def add_vendor(name, email, phone, address, password):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO Vendor (name, email, phone, address, password)
-        VALUES (?, ?, ?, ?, ?)
-    """,
-        (name, email, phone, address, password),
-    )
-    conn.commit()
-    conn.close()
+    return register_vendor(name, email, phone, address, password)
 
 
 
 # ----------------------------------------------------------------
 
 # authentication for vendor
+@metrics.timed
 def verify_vendor(email, password):
     conn = get_connection()
     cur = conn.cursor()
@@ -53,6 +181,8 @@ def verify_vendor(email, password):
 # --------------------------------------------------------------
 
 # show all the vendors in a pandas table
+@metrics.timed
+@cached_read("Vendor")
 def get_all_vendors():
     conn = get_connection()
     query = "SELECT vendor_id, name, email, phone, address FROM Vendor"
@@ -62,24 +192,12 @@ def get_all_vendors():
 
 # -------------------------------------------------------------
 
-
-def get_all_tenders(org_id):
-
-    st.subheader("View All Tenders")
-
-    # Select grouping mode
-    group_by = st.selectbox("Group tenders by:", ["None", "Location", "Status"])
-
+# all tenders of one organisation, with their bid counts
+@metrics.timed
+@cached_read("Tender", "TenderStats")
+def get_org_tenders(org_id):
     conn = get_connection()
     cur = conn.cursor()
-
-
-    ###### debugging purposes ---> do no touch
-    # st.write("Testing query")
-    # cur.execute("SELECT * FROM Tender")
-    # st.write(cur.fetchall())
-
-
     cur.execute(
         """
         SELECT 
@@ -90,18 +208,15 @@ def get_all_tenders(org_id):
             status, 
             opening_date, 
             closing_date, 
-            publishing_date 
+            publishing_date,
+            COALESCE((SELECT bid_count FROM TenderStats s WHERE s.tender_id = Tender.tender_id), 0)
         FROM Tender WHERE org_id = ?
     """, (org_id,)
     )
     rows = cur.fetchall()
     conn.close()
 
-    if not rows:
-        st.warning("No tenders found.")
-        return
-
-    df = pd.DataFrame(
+    return pd.DataFrame(
         rows,
         columns=[
             "Tender ID",
@@ -113,37 +228,24 @@ def get_all_tenders(org_id):
             "Opening Date",
             "Closing Date",
             "Publishing Date",
+            "Bids",
         ],
     )
 
-    # display all tenders
-    if group_by == "None":
-        st.dataframe(df, use_container_width=True, hide_index=True)
-        return
-
-    # filter for locations
-    elif group_by == "Location":
-        for location, group_df in df.groupby("Location", dropna=False):
-
-            st.write(f" **Location:** {location}" if location else "Not Applicable")
-            st.dataframe(group_df.reset_index(drop=True), use_container_width=True, hide_index=True)
-
-
-
-    # filter for status
-    elif group_by == "Status":
-        for status, group_df in df.groupby("Status", dropna=False):
-
-            st.write(f" **Status:** {status}" if status else "Not Applicable")
-            st.dataframe(group_df.reset_index(drop=True), use_container_width=True, hide_index=True)
-
 # ----------------------------------------------------------
 
 # delete vendor with the entered email_id
+@metrics.timed
 def delete_vendor_by_email(email):
     conn = get_connection()
     cur = conn.cursor()
+    # their bids go with them (FK cascade), so those tenders need re-ranking
+    cur.execute("""
+        SELECT b.tender_id FROM Bid b JOIN Vendor v ON v.vendor_id = b.vendor_id WHERE v.email = ?
+    """, (email,))
+    tender_ids = [r[0] for r in cur.fetchall()]
     cur.execute("DELETE FROM Vendor WHERE email=?", (email,))
+    refresh_leaderboards(cur, tender_ids)
     conn.commit()
     conn.close()
 
@@ -153,6 +255,7 @@ def delete_vendor_by_email(email):
 # ------------------------------------------------------------
 
 # this function will add a new tender
+@metrics.timed
 def add_tender(ref_no, org_id, title, description, location, opening_date, closing_date):
     try:
         conn = get_connection()
@@ -179,26 +282,21 @@ def add_tender(ref_no, org_id, title, description, location, opening_date, closi
  # ------------------------------------------------------------
 
 
-def delete_tender(org_id):
-    """
-    Allows deletion only if today is before opening_date.
-    If the tender is currently in its open window (opening_date <= today <= closing_date),
-    shows and performs a withdraw operation instead.
-    """
-    from datetime import datetime as _dt
-
+# open tenders of one organisation (delete / withdraw / edit screens)
+@metrics.timed
+@cached_read("Tender")
+def get_org_open_tenders(org_id):
     conn = get_connection()
     cur = conn.cursor()
-
-    # Fetch open tenders (status 'Open') for this org
     cur.execute("""
         SELECT tender_id, tender_ref_no, title, description, location, status,
                opening_date, closing_date, publishing_date
         FROM Tender WHERE status = 'Open' AND org_id = ?
     """, (org_id,))
     tenders = cur.fetchall()
+    conn.close()
 
-    df = pd.DataFrame(
+    return pd.DataFrame(
         tenders,
         columns=[
             "Tender ID", "Reference No", "Title", "Description", "Location", "Status",
@@ -206,311 +304,295 @@ def delete_tender(org_id):
         ]
     )
 
-    if df.empty:
-        st.warning("No tenders found that are available for deletion or withdrawal.")
-        conn.close()
-        return
-
-    st.markdown("### Open Tenders")
-    st.dataframe(df.reset_index(drop=True), use_container_width=True)
 
-    options = []
-    meta = {}
-    for _, row in df.iterrows():
-        s = f"{row['Reference No']} - {row['Title']}"
-        options.append(s)
-        meta[s] = {
-            "tender_id": row["Tender ID"],
-            "opening_date": row["Opening Date"],
-            "closing_date": row["Closing Date"],
-        }
+def _parse_date(value):
+    try:
+        return datetime.strptime(str(value), "%Y-%m-%d").date()
+    except ValueError:
+        return None
 
-    selected = st.selectbox("Select a Tender", options)
 
-    # parse dates and compare with today
-    selected_meta = meta[selected]
-    today = _dt.now().date()
+TENDER_DELETE = "delete"
+TENDER_WITHDRAW = "withdraw"
 
-    try:
-        opening = _dt.strptime(str(selected_meta["opening_date"]), "%Y-%m-%d").date()
-    except Exception:
-        opening = None
-    try:
-        closing = _dt.strptime(str(selected_meta["closing_date"]), "%Y-%m-%d").date()
-    except Exception:
-        closing = None
 
-    # Decision logic
+@metrics.timed
+def tender_removal(opening_date, closing_date, today=None):
+    """
+    What an organisation may do with one of its open tenders:
+    TENDER_DELETE before opening_date, TENDER_WITHDRAW while it is open
+    (opening_date <= today <= closing_date), None once it has closed or if the dates are invalid.
+    """
+    today = today or date.today()
+    opening, closing = _parse_date(opening_date), _parse_date(closing_date)
     if opening and today < opening:
-        st.info(f"Tender opens on {opening}. You may delete it before opening.")
-        if st.button("Delete Tender"):
-            try:
-                cur.execute(
-                    "DELETE FROM Tender WHERE tender_id = ? AND status = 'Open'",
-                    (selected_meta["tender_id"],)
-                )
-                conn.commit()
-                if cur.rowcount > 0:
-                    st.success(f"Tender '{selected}' deleted successfully.")
-                else:
-                    st.error("Tender could not be deleted. It may have changed status.")
-            except sqlite3.Error as e:
-                st.error(f"Database error: {e}")
-            finally:
-                conn.close()
-                return
-
-    elif opening and closing and opening <= today <= closing:
-        st.warning(f"Tender is currently open ({opening} → {closing}). You cannot delete it but you can withdraw it.")
-        st.markdown("Withdrawing will close the tender, move existing bids to BidLog as 'Withdrawn', and notify bidders.")
-        if st.button("Withdraw Tender"):
-            withdraw_tender(selected_meta["tender_id"], selected.split(" - ")[0], cur, conn)
-            conn.close()
-            return
+        return TENDER_DELETE
+    if opening and closing and opening <= today <= closing:
+        return TENDER_WITHDRAW
+    return None
 
-    else:
-        # If dates missing or today > closing
-        if closing and today > closing:
-            st.error(f"Tender closed on {closing}. It cannot be deleted or withdrawn via this interface.")
-        else:
-            # fallback if opening/closing not parsable
-            st.error("Tender dates are not available or invalid. Deletion/withdrawal blocked.")
-        conn.close()
-        return
+
+@metrics.timed
+def delete_tender(org_id, tender_id):
+    # only before the tender opens; after that it can only be withdrawn
+    try:
+        with write_transaction() as cur:
+            cur.execute("""
+                DELETE FROM Tender
+                WHERE tender_id = ? AND org_id = ? AND status = 'Open' AND opening_date > ?
+            """, (tender_id, org_id, date.today().isoformat()))
+            deleted = cur.rowcount
+    except sqlite3.Error as e:
+        return Outcome(False, f"Database error: {e}")
+    if not deleted:
+        return Outcome(False, "Tender could not be deleted. It may have opened or changed status.")
+    return Outcome(True, "Tender deleted successfully.")
 
 
-def withdraw_tender(tender_id, tender_ref_no, cur=None, conn=None):
+@metrics.timed
+def withdraw_tender(tender_id):
     """
     Withdraw a tender that is currently in its open window.
     - Moves current Bid rows to BidLog with status 'Withdrawn' and is_winner='No'
     - Deletes moved rows from Bid
     - Updates Tender.status to 'Closed'
-    - Inserts notifications for all affected vendors
+    - Queues one outbox event that notifies all affected vendors
+    Returns an Outcome.
     """
-    close_conn_here = False
-    if conn is None:
-        conn = get_connection()
-        cur = conn.cursor()
-        close_conn_here = True
-
+    now_ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     try:
-        now_ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        # fetch all active bids for this tender
-        cur.execute("SELECT * FROM Bid WHERE tender_id = ?", (tender_id,))
-        bid_rows = cur.fetchall()
-        # get column names for Bid to map values
-        bid_cols_q = "PRAGMA table_info(Bid)"
-        cur.execute(bid_cols_q)
-        bid_cols = [r[1] for r in cur.fetchall()]  # names in order
-        # map column positions for known fields we'll copy
-        # We'll use column names explicitly to avoid schema-order dependence
-        cur.execute("""
-            SELECT vendor_id, tender_id, submission_date, technical_spec, financial_spec,
-                   status, opened_at, technical_score, financial_score, final_score, remarks
-            FROM Bid WHERE tender_id = ?
-        """, (tender_id,))
-        detailed_bids = cur.fetchall()
-
-        # set bid status to withdrawn
-        for row in detailed_bids:
-            vendor_id = row[0]
-            tid = row[1]
-            submission_date = row[2]
-            technical_spec = row[3]
-            financial_spec = row[4]
-            _status = 'Withdrawn'
-            opened_at = row[6]
-            technical_score = row[7]
-            financial_score = row[8]
-            final_score = row[9]
-            remarks = row[10]
-
+        with write_transaction() as cur:
+            row = cur.execute("SELECT tender_ref_no, status FROM Tender WHERE tender_id = ?", (tender_id,)).fetchone()
+            if not row:
+                return Outcome(False, "Tender not found.")
+            ref, status = row
+            if status != "Open":
+                return Outcome(False, f"Tender {ref} is not open.")
+
+            # archive all active bids as withdrawn
             cur.execute("""
                 INSERT INTO BidLog (
                     vendor_id, tender_id, submission_date, technical_spec, financial_spec,
+                    amount_paise, currency,
                     status, opened_at, technical_score, financial_score, final_score,
                     remarks, closed_timestamp, is_winner
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                vendor_id,
-                tid,
-                submission_date,
-                technical_spec,
-                financial_spec,
-                _status,
-                opened_at,
-                technical_score,
-                financial_score,
-                final_score,
-                remarks,
-                now_ts,
-                'No'
-            ))
-
-            try:
-                cur.execute(
-                    "INSERT INTO Notification (vendor_id, title, message) VALUES (?, ?, ?)",
-                    (vendor_id, "Tender Withdrawn", f"Tender {tender_ref_no} has been withdrawn by the organisation. Your bid has been archived.")
                 )
-            except Exception:
-                pass
+                SELECT vendor_id, tender_id, submission_date, technical_spec, financial_spec,
+                       amount_paise, currency,
+                       'Withdrawn', opened_at, technical_score, financial_score, final_score,
+                       remarks, ?, 'No'
+                FROM Bid WHERE tender_id = ?
+            """, (now_ts, tender_id))
 
-        # remove active bids
-        cur.execute("DELETE FROM Bid WHERE tender_id = ?", (tender_id,))
+            outbox.enqueue(cur, "tender_withdrawn", tender_id=tender_id)
 
-        # close tender and clear winner
-        cur.execute("UPDATE Tender SET status = 'Closed', winner_vendor_id = NULL WHERE tender_id = ?", (tender_id,))
+            # remove active bids
+            cur.execute("DELETE FROM Bid WHERE tender_id = ?", (tender_id,))
+            refresh_leaderboards(cur, [tender_id])
 
-        conn.commit()
-        st.success(f"Tender {tender_ref_no} withdrawn. Active bids archived and bidders notified.")
+            # close tender and clear winner
+            cur.execute("UPDATE Tender SET status = 'Closed', winner_vendor_id = NULL WHERE tender_id = ?", (tender_id,))
+    except sqlite3.Error as e:
+        return Outcome(False, f"Error while withdrawing tender: {e}")
 
-    except Exception as e:
-        conn.rollback()
-        st.error(f"Error while withdrawing tender: {e}")
-    finally:
-        if close_conn_here:
-            conn.close()
+    wake_notification_worker()
+    return Outcome(True, f"Tender {ref} withdrawn. Active bids archived and bidders notified.")
 
 # -----------------------------------------------------
 
-def edit(org_id):
-    conn = get_connection()
-    cur = conn.cursor()
-
-    # Fetch all tenders
-    cur.execute("""
-            SELECT tender_id, tender_ref_no, title, description, location, status,
-                   opening_date, closing_date, publishing_date
-            FROM Tender WHERE status = 'Open' AND org_id = ?
-        """, (org_id,))
-    tenders = cur.fetchall()
-
-    df = pd.DataFrame(
-        tenders,
-        columns=[
-            "Tender ID", "Reference No", "Title", "Description", "Location", "Status",
-            "Opening Date", "Closing Date", "Publishing Date"
-        ]
-    )
-
-    if df.empty:
-        st.warning("No tenders found that are available for deletion")
-        conn.close()
-        return
-
-    st.markdown("### Open Tenders")
-    st.dataframe(df.reset_index(drop=True), use_container_width=True)
-
-    options = []
-
-    for _, row in df.iterrows():
-        s = f"{row['Reference No']} - {row['Title']}"
-        options.append(s)
-
-    selectedd = st.selectbox("Select a Tender to Delete", options)
-    selected = selectedd.strip("-")[0]
-
-    field_trip = ["Title", "Description", "Location", "Department", "Status", "Deadline"]
-    selected2 = st.selectbox("Select Field to Update", field_trip)
-
-    the_edit = st.text_input(f"Enter new value for {selected2}")
-
-    if st.button("Update Tender"):
-        if the_edit.strip() == "":
-            st.error("New value cannot be empty.")
-        else:
-            query = f"UPDATE tenders SET {selected2.lower()} = ? WHERE tender_id = ?"
-            cur.execute(f"UPDATE Tender SET {selected2.lower()} = ? WHERE tender_id = ?", (the_edit, selected))
-            conn.commit()
-            st.success(f"Tender Ref Number {selected} edited successfully!")
+# label -> column for the tender edit form; status only changes through award / withdraw / the scheduler
+EDITABLE_TENDER_FIELDS = {
+    "Title": "title",
+    "Description": "description",
+    "Location": "location",
+    "Closing Date": "closing_date",
+}
+
+
+@metrics.timed
+def update_tender(org_id, edit):
+    # edit: models.TenderEdit; only open tenders of org_id can be changed
+    column = EDITABLE_TENDER_FIELDS.get(edit.field)
+    if column is None:
+        return Outcome(False, f"{edit.field} cannot be edited.")
+    value = edit.value.strip()
+    if not value:
+        return Outcome(False, "New value cannot be empty.")
+    if column == "closing_date" and _parse_date(value) is None:
+        return Outcome(False, "Closing date must be in YYYY-MM-DD format.")
 
-    conn.close()
+    try:
+        with write_transaction() as cur:
+            cur.execute(
+                f"UPDATE Tender SET {column} = ? WHERE tender_id = ? AND org_id = ? AND status = 'Open'",
+                (value, edit.tender_id, org_id)
+            )
+            updated = cur.rowcount
+    except sqlite3.Error as e:
+        return Outcome(False, f"Database error: {e}")
+    if not updated:
+        return Outcome(False, "Tender not found or no longer open.")
+    return Outcome(True, "Tender updated successfully.")
 
 
 # -------------------------------------
 
-def vievaluate_bids(org_id):
-
-# -------- PART 1 -> 1: View Open Tenders and submitted bids
-    st.subheader("View Bids for Open Tenders")
-
+# tenders that can still be evaluated and awarded (all organisations if org_id is None)
+@metrics.timed
+@cached_read("Tender", "Bid")
+def get_tenders_awaiting_award(org_id=None):
     conn = get_connection()
+    query = f"SELECT tender_id, tender_ref_no, title, status FROM Tender t WHERE {AWAITING_AWARD}"
+    if org_id is None:
+        df = pd.read_sql_query(query, conn)
+    else:
+        df = pd.read_sql_query(query + " AND org_id = ?", conn, params=(org_id,))
+    conn.close()
+    return df
 
 
-    tenders = pd.read_sql_query(
-        "SELECT tender_id, tender_ref_no, title FROM Tender WHERE status = 'Open' AND org_id = ?",
-        conn,
-        params=(org_id,)
-    )
-
-
-    if tenders.empty:
-        st.warning("No open tenders available.")
-        return
-
-
-    selected_tender = st.selectbox(
-        "Select an open tender:",
-        tenders['tender_ref_no'],
-        format_func=lambda ref: f"{ref} — {tenders.loc[tenders['tender_ref_no'] == ref, 'title'].values[0]}"
-    )
-
-
-    bids = pd.read_sql_query(
-        """
-        SELECT vendor_id, submission_date, technical_spec, financial_spec, status,
-               technical_score, financial_score, final_score, remarks
-        FROM Bid
-        WHERE tender_id = (SELECT tender_id FROM Tender WHERE tender_ref_no = ?)
-        """,
-        conn,
-        params=(selected_tender,)
-    )
+@metrics.timed
+def save_evaluations(tender_id, evaluations):
+    """
+    Save technical / financial scores and remarks for many bids of one tender in a single
+    transaction (one executemany). `evaluations` is an iterable of models.Evaluation;
+    final_score is technical + financial (out of 200), as on the single-bid form.
+    Only bids of tenders awaiting award are updated.
+    Returns an Outcome.
+    """
+    params = []
+    for e in evaluations:
+        tech, fin = e.technical_score, e.financial_score
+        tech = None if tech is None or pd.isna(tech) else float(tech)
+        fin = None if fin is None or pd.isna(fin) else float(fin)
+        for score in (tech, fin):
+            if score is not None and not 0 <= score <= 100:
+                return Outcome(False, f"Scores must be between 0 and 100 (vendor {e.vendor_id}).")
+        final = tech + fin if tech is not None and fin is not None else None
+        remarks = None if e.remarks is None or pd.isna(e.remarks) else str(e.remarks)
+        params.append((tech, fin, final, remarks, int(e.vendor_id), tender_id))
+    if not params:
+        return Outcome(True, "Nothing to save.")
 
-    if bids.empty:
-        st.info("No bids submitted for this tender yet.")
-    else:
-        st.dataframe(bids, use_container_width=True)
+    try:
+        with write_transaction() as cur:
+            cur.executemany(f"""
+                UPDATE Bid
+                SET technical_score = ?, financial_score = ?, final_score = ?, remarks = ?, status = 'Under Review'
+                WHERE vendor_id = ? AND tender_id = ?
+                  AND EXISTS (SELECT 1 FROM Tender t WHERE t.tender_id = Bid.tender_id AND {AWAITING_AWARD})
+            """, params)
+            updated = cur.rowcount
+            refresh_leaderboards(cur, [tender_id])
+    except sqlite3.Error as e:
+        return Outcome(False, f"DB error: {e}")
+    if updated != len(params):
+        return Outcome(True, f"Saved {updated} of {len(params)} evaluation(s); "
+                             "the rest no longer exist or the tender is closed.")
+    return Outcome(True, f"Saved {updated} evaluation(s).")
 
 
+# the editable fields of models.Evaluation (bulk evaluation grid)
+EVALUATION_COLUMNS = ["technical_score", "financial_score", "remarks"]
 
-    selected_vendor = st.selectbox("Select a vendor to evaluate:", bids['vendor_id'])
 
-# ----- PART 2 -> evaluation phase ---------
-    st.subheader("Evaluation Form")
-    col1, col2 = st.columns(2)
-    with col1:
-        tech_score = st.number_input("Technical Score", min_value=0.0, max_value=100.0, step=0.5)
-    with col2:
-        fin_score = st.number_input("Financial Score", min_value=0.0, max_value=100.0, step=0.5)
-    remarks = st.text_area("Remarks")
+# --------------------------------------
+# automatic scoring: per-tender method / weights in TenderScoring, scores computed by database/scoring.py
 
+@metrics.timed
+@cached_read("TenderScoring")
+def get_tender_scoring(tender_id):
+    conn = get_connection()
+    row = conn.execute(
+        "SELECT method, tech_weight, fin_weight, min_tech_score FROM TenderScoring WHERE tender_id = ?",
+        (tender_id,)
+    ).fetchone()
+    conn.close()
+    if not row:
+        return dict(scoring.DEFAULT_SCORING)
+    return {"method": row[0], "tech_weight": row[1], "fin_weight": row[2], "min_tech_score": row[3]}
+
+
+@metrics.timed
+def set_tender_scoring(tender_id, method, tech_weight, fin_weight, min_tech_score):
+    config = {"method": method, "tech_weight": tech_weight, "fin_weight": fin_weight,
+              "min_tech_score": min_tech_score}
+    error = scoring.validate_config(config)
+    if error:
+        return Outcome(False, error)
+    with write_transaction() as cur:
+        cur.execute("""
+            INSERT INTO TenderScoring (tender_id, method, tech_weight, fin_weight, min_tech_score, updated_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(tender_id) DO UPDATE SET
+                method = excluded.method, tech_weight = excluded.tech_weight,
+                fin_weight = excluded.fin_weight, min_tech_score = excluded.min_tech_score,
+                updated_at = excluded.updated_at
+        """, (tender_id, method, tech_weight, fin_weight, min_tech_score))
+    return Outcome(True, "Scoring settings saved.")
+
+
+@metrics.timed
+def score_tender(tender_id):
+    """
+    Recompute financial and final scores of the bids on a tender awaiting award from the
+    technical scores already entered, using the tender's scoring settings. Bids that can't be
+    scored yet (no technical score, no parsed amount) are left as they are; a tender whose
+    qualified bids are priced in more than one currency is not scored.
+    Reads, scores and writes back (one executemany) inside a single transaction.
+    Returns a ScoreOutcome (scores is the scored DataFrame, None on failure).
+    """
+    with write_transaction() as cur:
+        row = cur.execute(f"""
+            SELECT {AWAITING_AWARD}, s.method, s.tech_weight, s.fin_weight, s.min_tech_score
+            FROM Tender t LEFT JOIN TenderScoring s ON s.tender_id = t.tender_id
+            WHERE t.tender_id = ?
+        """, (tender_id,)).fetchone()
+        if not row:
+            return ScoreOutcome(False, "Tender not found.")
+        if not row[0]:
+            return ScoreOutcome(False, "Only tenders awaiting award can be scored.")
+        config = dict(scoring.DEFAULT_SCORING)
+        if row[1] is not None:
+            config.update(method=row[1], tech_weight=row[2], fin_weight=row[3], min_tech_score=row[4])
+
+        cur.execute("SELECT vendor_id, technical_score, amount_paise, currency FROM Bid WHERE tender_id = ?",
+                    (tender_id,))
+        bids = pd.DataFrame(cur.fetchall(), columns=["vendor_id", "technical_score", "amount_paise", "currency"])
+        if bids.empty:
+            return ScoreOutcome(False, "No bids submitted for this tender yet.")
 
-    if st.button("Evaluate and Save"):
-        final_score = tech_score + fin_score
-        conn.execute(
-            """
+        try:
+            scored = scoring.score_bids(bids, config)
+        except ValueError as e:
+            return ScoreOutcome(False, str(e))
+        # only bids that got a final score are written: unevaluated / unpriced ones keep whatever
+        # an evaluator entered by hand, and a disqualified bid (final 0) keeps its financial score
+        params = [
+            (None if pd.isna(r.financial_score) else float(r.financial_score),
+             float(r.final_score), tender_id, int(r.vendor_id))
+            for r in scored.itertuples(index=False) if not pd.isna(r.final_score)
+        ]
+        cur.executemany("""
             UPDATE Bid
-            SET technical_score = ?, financial_score = ?, final_score = ?, remarks = ?, status = 'Under Review'
-            WHERE vendor_id = ? AND tender_id = (SELECT tender_id FROM Tender WHERE tender_ref_no = ?)
-            """,
-            (tech_score, fin_score, final_score, remarks, selected_vendor, selected_tender)
-        )
-        cur = conn.cursor()
-        cur.execute("SELECT name FROM Vendor WHERE vendor_id = ?", (selected_vendor,))
-
-        vendor = cur.fetchone()[0]
-
-        conn.commit()
-        st.success(f"Awarded {final_score} / 200 to {vendor} for Tender Ref: {selected_tender}")
-        #st.rerun()
+            SET financial_score = COALESCE(?, financial_score), final_score = ?,
+                status = CASE WHEN status = 'Submitted' THEN 'Under Review' ELSE status END
+            WHERE tender_id = ? AND vendor_id = ?
+        """, params)
+        refresh_leaderboards(cur, [tender_id])
 
-    conn.close()
+    n_scored = int(scored["final_score"].notna().sum())
+    n_out = int((~scored["qualified"] & scored["technical_score"].notna()).sum())
+    msg = f"Scored {n_scored} of {len(scored)} bid(s) using {config['method']}"
+    if n_out:
+        msg += f"; {n_out} below the technical cut-off"
+    return ScoreOutcome(True, msg + ".", scored)
 
 
 # ---------------------------------------------------------------------------------------------------------------------------------------
 
+@metrics.timed
+@cached_read("Vendor")
 def get_vendor_by_email(email):
     conn = get_connection()
     cur = conn.cursor()
@@ -525,6 +607,8 @@ def get_vendor_by_email(email):
 
 
 
+@metrics.timed
+@cached_read("Organisation")
 def get_admin_by_email(email):
     conn = get_connection()
     cur = conn.cursor()
@@ -540,43 +624,185 @@ def get_admin_by_email(email):
 
 # -------------------------------------------------------------------------
 
-def get_open_tenders(location=None, search=None, org_id=None):
+# identity: the logged-in user is resolved once at login and kept in session state as a
+# compact principal {"id", "name", "email", "role"}; everything after that is keyed by id
+
+def _principal(row, role):
+    if not row:
+        return None
+    return {"id": row[0], "name": row[1], "email": row[2], "role": role}
+
+
+@metrics.timed
+def authenticate_vendor(email, password):
     conn = get_connection()
-    query = """
-        SELECT
-            t.tender_id,
-            t.tender_ref_no,
-            t.title,
-            t.description,
-            t.location,
-            t.opening_date,
-            t.closing_date,
-            t.publishing_date,
-            t.org_id,
-            o.name AS org_name
-        FROM Tender t
-        LEFT JOIN Organisation o ON t.org_id = o.org_id
-        WHERE t.status = 'Open'
-    """
-    params = []
+    row = conn.execute(
+        "SELECT vendor_id, name, email FROM Vendor WHERE email = ? AND password = ?", (email, password)
+    ).fetchone()
+    conn.close()
+    return _principal(row, "vendor")
+
+
+@metrics.timed
+def authenticate_org(email, password):
+    conn = get_connection()
+    row = conn.execute(
+        "SELECT org_id, name, email FROM Organisation WHERE email = ? AND password = ?", (email, password)
+    ).fetchone()
+    conn.close()
+    return _principal(row, "organisation")
+
+
+# the admin dashboard's login, also accepted by the API's admin endpoints;
+# there is no default: without TENDER_ADMIN_PASSWORD nobody can log in as admin
+ADMIN_PASSWORD = os.environ.get("TENDER_ADMIN_PASSWORD") or None
+
+
+@metrics.timed
+def authenticate_admin(password):
+    if ADMIN_PASSWORD is None or not hmac.compare_digest(password.encode(), ADMIN_PASSWORD.encode()):
+        return None
+    return {"id": None, "name": "Admin", "email": None, "role": "admin"}
+
+
+@cached_read("Vendor")
+def _vendor_id_for_email(email):
+    conn = get_connection()
+    row = conn.execute("SELECT vendor_id FROM Vendor WHERE email = ?", (email,)).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+# -------------------------------------------------------------------------
+
+# turn free text from the search box into an FTS5 query:
+# every word becomes a quoted prefix term, so "road rep" matches "Road Repair" and
+# punctuation typed by the user can't break the MATCH syntax
+def _fts_query(search):
+    terms = re.findall(r"\w+", search or "")
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+# FROM + WHERE shared by get_open_tenders and count_open_tenders
+def _open_tenders_filter(location=None, search=None, org_id=None):
+    match = _fts_query(search)
+    if match:
+        sql = """
+            FROM TenderSearch
+            JOIN Tender t ON t.tender_id = TenderSearch.rowid
+            WHERE TenderSearch MATCH ? AND t.status = 'Open'
+        """
+        params = [match]
+    else:
+        sql = """
+            FROM Tender t
+            WHERE t.status = 'Open'
+        """
+        params = []
+
     if org_id:
-        query += " AND t.org_id = ?"
+        sql += " AND t.org_id = ?"
         params.append(org_id)
     if location:
-        query += " AND t.location = ?"
+        sql += " AND t.location = ?"
         params.append(location)
-    if search:
-        query += " AND (t.title LIKE ? OR t.description LIKE ? OR t.tender_ref_no LIKE ?)"
-        s = f"%{search}%"
-        params.extend([s, s, s])
+    return bool(match), sql, params
+
+
+# bm25 weights: ref no, title, description
+_RANK = "bm25(TenderSearch, 5.0, 10.0, 1.0)"
+
+
+@metrics.timed
+@cached_read("Tender", "Organisation", "TenderSearch")
+def get_open_tenders(location=None, search=None, org_id=None, limit=None, after=None):
+    """
+    Open tenders, newest first -- or best match first when `search` is given.
+    Keyset pagination: pass `limit` for a page and `after=open_tenders_cursor(previous_page)`
+    for the next one; each page is an index range scan, however deep the user scrolls.
+    """
+    ranked, where, params = _open_tenders_filter(location, search, org_id)
+
+    columns = """
+        t.tender_id,
+        t.tender_ref_no,
+        t.title,
+        t.description,
+        t.location,
+        t.opening_date,
+        t.closing_date,
+        t.publishing_date,
+        t.org_id,
+        (SELECT o.name FROM Organisation o WHERE o.org_id = t.org_id) AS org_name
+    """
+    if ranked:
+        columns += f""",
+        snippet(TenderSearch, -1, '**', '**', '…', 12) AS snippet,
+        {_RANK} AS rank
+        """
 
-    query += " ORDER BY t.publishing_date DESC"
+    query = f"SELECT {columns} {where}"
 
+    if after is not None:
+        if ranked:
+            query += f" AND ({_RANK} > ? OR ({_RANK} = ? AND t.tender_id > ?))"
+            params += [after[0], after[0], after[1]]
+        else:
+            query += " AND (t.publishing_date, t.tender_id) < (?, ?)"
+            params += [after[0], after[1]]
+
+    if ranked:
+        query += " ORDER BY rank, t.tender_id"
+    else:
+        query += " ORDER BY t.publishing_date DESC, t.tender_id DESC"
+
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    conn = get_connection()
     df = pd.read_sql_query(query, conn, params=params)
     conn.close()
     return df
 
 
+# cursor for the page after `df` (a page returned by get_open_tenders)
+def open_tenders_cursor(df):
+    if df.empty:
+        return None
+    last = df.iloc[-1]
+    key = last["rank"] if "rank" in df.columns else last["publishing_date"]
+    return (key.item() if hasattr(key, "item") else key, int(last["tender_id"]))
+
+
+@metrics.timed
+@cached_read("Tender", "TenderSearch", "OrgStats")
+def count_open_tenders(location=None, search=None, org_id=None):
+    conn = get_connection()
+    if not location and not search:
+        # per-organisation counters: no scan at all
+        if org_id:
+            row = conn.execute("SELECT open_tender_count FROM OrgStats WHERE org_id = ?", (org_id,)).fetchone()
+        else:
+            row = conn.execute("SELECT SUM(open_tender_count) FROM OrgStats").fetchone()
+        conn.close()
+        return (row[0] or 0) if row else 0
+
+    _, where, params = _open_tenders_filter(location, search, org_id)
+    n = conn.execute(f"SELECT COUNT(*) {where}", params).fetchone()[0]
+    conn.close()
+    return n
+
+
+# repair drift in the trigger-maintained counters (VendorStats, TenderStats, OrgStats)
+@metrics.timed
+def recount_counters():
+    with write_transaction() as cur:
+        return setup_db.recount_counters(cur.connection)
+
+
+@metrics.timed
+@cached_read("Tender")
 def get_tenders_locations(org_id=None):
     conn = get_connection()
     cur = conn.cursor()
@@ -589,12 +815,29 @@ def get_tenders_locations(org_id=None):
     return rows
 
 
+# (tender_id, tender_ref_no, title) of every tender (of one organisation), newest first
+@metrics.timed
+@cached_read("Tender")
+def get_tender_refs(org_id=None):
+    conn = get_connection()
+    query = "SELECT tender_id, tender_ref_no, title FROM Tender"
+    params = ()
+    if org_id:
+        query += " WHERE org_id = ?"
+        params = (org_id,)
+    df = pd.read_sql_query(query + " ORDER BY publishing_date DESC", conn, params=params)
+    conn.close()
+    return df
+
+
+@metrics.timed
+@cached_read("Tender", "Organisation")
 def get_tender_by_ref(ref):
     conn = get_connection()
     cur = conn.cursor()
     cur.execute("""
         SELECT t.tender_id, t.tender_ref_no, t.title, t.description, t.location,
-               t.opening_date, t.closing_date, t.publishing_date, t.org_id, o.name
+               t.opening_date, t.closing_date, t.publishing_date, t.org_id, o.name, t.status
         FROM Tender t
         LEFT JOIN Organisation o ON t.org_id = o.org_id
         WHERE t.tender_ref_no = ?
@@ -604,209 +847,323 @@ def get_tender_by_ref(ref):
     if not row:
         return None
     cols = ["tender_id", "tender_ref_no", "title", "description", "location",
-            "opening_date", "closing_date", "publishing_date", "org_id", "org_name"]
+            "opening_date", "closing_date", "publishing_date", "org_id", "org_name", "status"]
     return dict(zip(cols, row))
 
 
+# Bid writes are one statement each (the Open / Submitted checks are part of the WHERE clause,
+# so there is no window between check and write) plus the vendor's confirmation, queued in the
+# outbox in the same transaction. Only a write that changed nothing looks further, to explain why.
+
+@metrics.timed
 def submit_bid(vendor_id, tender_ref_no, technical_spec, financial_spec):
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT tender_id, status FROM Tender WHERE tender_ref_no = ?", (tender_ref_no,))
-        r = cur.fetchone()
-        if not r:
-            return False, "Tender not found."
-        tender_id, status = r
-        if status != "Open":
-            return False, "Tender is not open for bidding."
-
-        # duplicate check
-        cur.execute("SELECT 1 FROM Bid WHERE vendor_id = ? AND tender_id = ?", (vendor_id, tender_id))
-        if cur.fetchone():
-            return False, "You have already submitted a bid for this tender."
-
-        submission_date = datetime.now().strftime("%Y-%m-%d")
-        cur.execute("""
-            INSERT INTO Bid (vendor_id, tender_id, submission_date, technical_spec, financial_spec, status, opened_at)
-            VALUES (?, ?, ?, ?, ?, 'Submitted', datetime('now'))
-        """, (vendor_id, tender_id, submission_date, technical_spec, financial_spec))
-        conn.commit()
-        return True, "Bid submitted successfully."
-    except Exception as e:
-        return False, f"DB error: {e}"
-    finally:
-        conn.close()
+    return _queued_outcome(_submit_bid, vendor_id, tender_ref_no, technical_spec, financial_spec)
 
 
-def delete_bid(tender_id, vendor_id):
-    conn = get_connection()
-    cur = conn.cursor()
+def _submit_bid(batch, vendor_id, tender_ref_no, technical_spec, financial_spec):
+    cur = batch.cursor
+    submission_date = datetime.now().strftime("%Y-%m-%d")
+    amount, currency = parse_amount(financial_spec)
     cur.execute("""
+        INSERT INTO Bid (vendor_id, tender_id, submission_date, technical_spec, financial_spec,
+                         amount_paise, currency, status, opened_at)
+        SELECT ?, t.tender_id, ?, ?, ?, ?, ?, 'Submitted', datetime('now')
+        FROM Tender t
+        WHERE t.tender_ref_no = ? AND t.status = 'Open'
+        ON CONFLICT (vendor_id, tender_id) DO NOTHING
+        RETURNING tender_id
+    """, (vendor_id, submission_date, technical_spec, financial_spec, amount, currency, tender_ref_no))
+    row = next(iter(cur.fetchall()), None)  # drain RETURNING, so the statement is finished
+    if not row:
+        cur.execute("""
+            SELECT t.status, EXISTS (SELECT 1 FROM Bid b WHERE b.vendor_id = ? AND b.tender_id = t.tender_id)
+            FROM Tender t WHERE t.tender_ref_no = ?
+        """, (vendor_id, tender_ref_no))
+        found = cur.fetchone()
+        if not found:
+            return Outcome(False, "Tender not found.", NOT_FOUND)
+        if found[0] != "Open":
+            return Outcome(False, "Tender is not open for bidding.", CONFLICT)
+        return Outcome(False, "You have already submitted a bid for this tender.", CONFLICT)
+
+    _confirm(batch, vendor_id, "Bid Submitted", f"Your bid for {tender_ref_no} was submitted successfully.")
+    batch.defer(refresh_leaderboards, [row[0]])
+    return Outcome(True, "Bid submitted successfully.")
+
+
+@metrics.timed
+def delete_bid(tender_id, vendor_id):
+    return _queued_outcome(_delete_bid, tender_id, vendor_id)
+
+
+def _delete_bid(batch, tender_id, vendor_id):
+    batch.cursor.execute("""
         DELETE FROM Bid
         WHERE tender_id = ? AND vendor_id = ? AND status = 'Submitted'
+          AND EXISTS (SELECT 1 FROM Tender t WHERE t.tender_id = Bid.tender_id AND t.status = 'Open')
+        RETURNING (SELECT t.tender_ref_no FROM Tender t WHERE t.tender_id = Bid.tender_id)
     """, (tender_id, vendor_id))
-    conn.commit()
-    conn.close()
+    row = next(iter(batch.cursor.fetchall()), None)
+    if not row:
+        return Outcome(False, "No bid that can still be withdrawn (it may be under review or the tender has closed).",
+                       CONFLICT)
+    _confirm(batch, vendor_id, "Bid Withdrawn", f"Your bid for Tender {row[0]} was withdrawn.")
+    batch.defer(refresh_leaderboards, [tender_id])
+    return Outcome(True, "Bid withdrawn.")
 
 
+@metrics.timed
 def update_bid(vendor_id, tender_id, new_tech, new_fin):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
+    return _queued_outcome(_update_bid, vendor_id, tender_id, new_tech, new_fin)
+
+
+def _update_bid(batch, vendor_id, tender_id, new_tech, new_fin):
+    amount, currency = parse_amount(new_fin)
+    batch.cursor.execute("""
         UPDATE Bid
-        SET technical_spec = ?, financial_spec = ?, submission_date = DATE('now')
+        SET technical_spec = ?, financial_spec = ?, amount_paise = ?, currency = ?, submission_date = DATE('now')
         WHERE vendor_id = ? AND tender_id = ? AND status = 'Submitted'
-    """, (new_tech, new_fin, vendor_id, tender_id))
-    conn.commit()
-    conn.close()
+          AND EXISTS (SELECT 1 FROM Tender t WHERE t.tender_id = Bid.tender_id AND t.status = 'Open')
+        RETURNING (SELECT t.tender_ref_no FROM Tender t WHERE t.tender_id = Bid.tender_id)
+    """, (new_tech, new_fin, amount, currency, vendor_id, tender_id))
+    row = next(iter(batch.cursor.fetchall()), None)
+    if not row:
+        return Outcome(False, "No bid that can still be edited (it may be under review or the tender has closed).",
+                       CONFLICT)
+    _confirm(batch, vendor_id, "Bid Updated", f"Your bid for Tender {row[0]} was updated.")
+    batch.defer(refresh_leaderboards, [tender_id])
+    return Outcome(True, "Bid updated.")
+
+
+def _confirm(batch, vendor_id, title, message):
+    outbox.enqueue(batch.cursor, "direct", vendor_id=vendor_id, title=title, message=message)
+    batch.after_commit(wake_notification_worker)
 
 ## Get active and closed bids
 def get_bids_for_vendor(email):
+    return get_vendor_bids(_vendor_id_for_email(email))
+
+
+# -------------------------------------------------------------------------
+# bid history: active bids (Bid) and archived ones (BidLog) as one UNION ALL query,
+# typed, filtered and ordered in SQLite
+
+BID_HISTORY_ORDER = {
+    "recent": "submission_date DESC, tender_id DESC, record_type, vendor_id",
+    "tender": "tender_ref_no, submission_date DESC, record_type, vendor_id",
+}
+
+_BID_HISTORY_ARM = """
+    SELECT '{record_type}' AS record_type,
+           {a}.vendor_id AS vendor_id, v.name AS vendor_name, v.email AS vendor_email,
+           {a}.tender_id AS tender_id, t.tender_ref_no AS tender_ref_no, t.title AS title,
+           t.location AS location, t.org_id AS org_id, o.name AS org_name,
+           {a}.submission_date AS submission_date,
+           {a}.technical_spec AS technical_spec, {a}.financial_spec AS financial_spec,
+           {a}.amount_paise / 100.0 AS amount, {a}.currency AS currency,
+           {a}.status AS status, t.status AS tender_status,
+           CAST({a}.technical_score AS REAL) AS technical_score,
+           CAST({a}.financial_score AS REAL) AS financial_score,
+           CAST({a}.final_score AS REAL) AS final_score,
+           {a}.remarks AS remarks, {winner} AS is_winner, {closed} AS closed_timestamp
+    FROM {table} {a}
+    JOIN Tender t ON t.tender_id = {a}.tender_id
+    JOIN Vendor v ON v.vendor_id = {a}.vendor_id
+    LEFT JOIN Organisation o ON o.org_id = t.org_id
+    WHERE {where}
+"""
+
+
+def bid_history_query(vendor_id=None, org_id=None, tender_id=None, tender_ref=None, status=None,
+                      source=None, order="recent", limit=None, offset=0):
+    """
+    SQL + named params for the combined bid history.
+    source: None for both, "Active" for Bid only, "Log" for BidLog only.
+    order: a key of BID_HISTORY_ORDER, or None for no ordering (e.g. to count).
+    """
+    params = {}
+    filters = []
+    for column, key, value in (
+        ("{a}.vendor_id", "vendor_id", vendor_id),
+        ("t.org_id", "org_id", org_id),
+        ("{a}.tender_id", "tender_id", tender_id),
+        ("t.tender_ref_no", "tender_ref", tender_ref),
+        ("{a}.status", "status", status),
+    ):
+        if value is not None:
+            filters.append(f"{column} = :{key}")
+            params[key] = value
+    where = " AND ".join(filters) or "1"
+
+    arms = []
+    if source in (None, "Active"):
+        arms.append(_BID_HISTORY_ARM.format(
+            record_type="Active", a="b", table="Bid", winner="'No'", closed="NULL",
+            where=where.format(a="b")))
+    if source in (None, "Log"):
+        arms.append(_BID_HISTORY_ARM.format(
+            record_type="Log", a="l", table="BidLog",
+            winner="CASE WHEN l.is_winner IN ('Yes', '1', 1) THEN 'Yes' ELSE 'No' END",
+            closed="l.closed_timestamp", where=where.format(a="l")))
+
+    sql = "UNION ALL".join(arms)
+    if order is not None:
+        sql += f" ORDER BY {BID_HISTORY_ORDER[order]}"
+    if limit is not None:
+        sql += " LIMIT :limit OFFSET :offset"
+        params.update(limit=int(limit), offset=int(offset))
+    return sql, params
+
+
+@metrics.timed
+@cached_read("Bid", "BidLog", "Tender", "Organisation", "Vendor")
+def get_bid_history(vendor_id=None, org_id=None, tender_id=None, tender_ref=None, status=None,
+                    source=None, order="recent", limit=None, offset=0):
+    sql, params = bid_history_query(vendor_id, org_id, tender_id, tender_ref, status,
+                                    source, order, limit, offset)
+    conn = get_connection()
+    df = pd.read_sql_query(sql, conn, params=params, parse_dates=["submission_date"])
+    conn.close()
+    return df
+
+
+@metrics.timed
+def count_bid_history(vendor_id=None, org_id=None, tender_id=None, tender_ref=None, status=None, source=None):
+    sql, params = bid_history_query(vendor_id, org_id, tender_id, tender_ref, status, source, order=None)
+    conn = get_connection()
+    n = conn.execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+    conn.close()
+    return n
+
+
+@metrics.timed
+def export_bid_history(fmt="csv", vendor_id=None, org_id=None, tender_id=None, tender_ref=None,
+                       status=None, source=None):
+    """
+    The combined bid history, grouped by tender, streamed into a spooled temp file in `fmt`
+    (see database/export.py). Returns (file positioned at the start, rows); the caller closes it.
+    """
+    query = bid_history_query(vendor_id, org_id, tender_id, tender_ref, status, source, order="tender")
     conn = get_connection()
     try:
-        active_sql = """
-        SELECT 
-            b.tender_id,
-            t.tender_ref_no,
-            t.title,
-            t.location,
-            t.org_id,
-            o.name AS org_name,
-            b.submission_date,
-            b.technical_spec,
-            b.financial_spec,
-            b.status,
-            b.remarks,
-            t.status AS tender_status,
-            NULL AS is_winner,
-            v.name AS vendor_name
-        FROM Bid b
-        JOIN Tender t ON b.tender_id = t.tender_id
-        LEFT JOIN Organisation o ON t.org_id = o.org_id
-        JOIN Vendor v ON b.vendor_id = v.vendor_id
-        WHERE v.email = ?
-        """
+        return export_rows(conn, [query], fmt)
+    finally:
+        conn.close()
 
-        closed_sql = """
-        SELECT
-            l.tender_id,
-            t.tender_ref_no,
-            t.title,
-            t.location,
-            t.org_id,
-            o.name AS org_name,
-            l.submission_date,
-            l.technical_spec,
-            l.financial_spec,
-            l.status,
-            l.remarks,
-            t.status AS tender_status,
-            l.is_winner,
-            v.name AS vendor_name
-        FROM BidLog l
-        JOIN Tender t ON l.tender_id = t.tender_id
-        LEFT JOIN Organisation o ON t.org_id = o.org_id
-        JOIN Vendor v ON l.vendor_id = v.vendor_id
-        WHERE v.email = ?
-        """
 
-        df_active = pd.read_sql_query(active_sql, conn, params=(email,))
-        df_closed = pd.read_sql_query(closed_sql, conn, params=(email,))
+# all bids of one vendor, newest first; record_type tells active ("Active") from archived ("Log")
+def get_vendor_bids(vendor_id):
+    return get_bid_history(vendor_id=vendor_id)
 
-        if not df_active.empty:
-            df_active["record_type"] = "Active"
-        if not df_closed.empty:
-            df_closed["record_type"] = "Log"
 
-        cols = [
-            "tender_id", "tender_ref_no", "title", "location", "org_id", "org_name",
-            "submission_date", "technical_spec", "financial_spec", "status", "remarks",
-            "tender_status", "is_winner", "vendor_name", "record_type"
-        ]
+# queued in the outbox and delivered to the inbox by the notification worker
+@metrics.timed
+def create_notification(vendor_id, title, message):
+    return _queued_outcome(_notify, vendor_id, title, message)
 
-        # ensure all columns exist in both frames
-        for df in (df_active, df_closed):
-            for c in cols:
-                if c not in df.columns:
-                    df[c] = None
 
-        combined = pd.concat([df_active[cols], df_closed[cols]], ignore_index=True)
-        if combined.empty:
-            return pd.DataFrame(columns=cols)
+def _notify(batch, vendor_id, title, message):
+    _confirm(batch, vendor_id, title, message)
+    return Outcome(True, "Notification queued.")
 
-        combined["submission_date"] = pd.to_datetime(combined["submission_date"], errors="coerce")
-        combined.sort_values(by="submission_date", ascending=False, inplace=True)
 
-        # normalize winner flag to Yes/No strings
-        combined["is_winner"] = combined["is_winner"].fillna("No")
-        combined["is_winner"] = combined["is_winner"].replace({1: "Yes", 0: "No", "1": "Yes", "0": "No", "Yes":"Yes","No":"No"})
+_worker = None
+_worker_lock = threading.Lock()
 
-        # reset index and return
-        return combined.reset_index(drop=True)
-    finally:
-        conn.close()
 
+# start the background notification worker once per process (safe to call on every rerun)
+def start_notification_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = outbox.NotificationWorker(get_connection)
+            _worker.start()
+    return _worker
+
+
+def wake_notification_worker():
+    if _worker is not None:
+        _worker.wake()
 
-def create_notification(vendor_id, title, message):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO Notification (vendor_id, title, message) VALUES (?, ?, ?)
-    """, (vendor_id, title, message))
-    conn.commit()
-    conn.close()
+
+_scheduler = None
+
+
+# start the tender scheduler (auto-close at closing_date, closing reminders) once per process
+def start_scheduler():
+    global _scheduler
+    with _worker_lock:
+        if _scheduler is None or not _scheduler.is_alive():
+            _scheduler = TenderScheduler(get_connection, on_notify=wake_notification_worker)
+            _scheduler.start()
+    return _scheduler
 
 
 def get_notifications(vendor_email):
+    return get_vendor_notifications(_vendor_id_for_email(vendor_email))
+
+
+@metrics.timed
+@cached_read("Notification")
+def get_vendor_notifications(vendor_id):
     conn = get_connection()
     cur = conn.cursor()
     cur.execute("""
-        SELECT n.notification_id, n.title, n.message, n.timestamp, n.is_read
-        FROM Notification n
-        JOIN Vendor v ON v.vendor_id = n.vendor_id
-        WHERE v.email = ?
-        ORDER BY n.timestamp DESC
-    """, (vendor_email,))
+        SELECT notification_id, title, message, timestamp, is_read
+        FROM Notification
+        WHERE vendor_id = ?
+        ORDER BY timestamp DESC
+    """, (vendor_id,))
     rows = cur.fetchall()
     conn.close()
     return rows
 
 
 def get_unread_notifications_count(vendor_email):
+    return get_vendor_unread_count(_vendor_id_for_email(vendor_email))
+
+
+# O(1): reads the trigger-maintained counter instead of counting Notification rows
+@metrics.timed
+@cached_read("VendorStats")
+def get_vendor_unread_count(vendor_id):
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT COUNT(*) FROM Notification n
-        JOIN Vendor v ON v.vendor_id = n.vendor_id
-        WHERE v.email = ? AND n.is_read = 0
-    """, (vendor_email,))
-    c = cur.fetchone()[0]
+    row = conn.execute(
+        "SELECT unread_notifications FROM VendorStats WHERE vendor_id = ?", (vendor_id,)
+    ).fetchone()
     conn.close()
-    return c
+    return row[0] if row else 0
 
 
 def mark_notifications_read(vendor_email, ids=None):
-    conn = get_connection()
-    cur = conn.cursor()
+    return mark_vendor_notifications_read(_vendor_id_for_email(vendor_email), ids)
+
+
+# ids (optional) narrows it down to specific notifications, still only the vendor's own;
+# returns a ReadOutcome, whose `marked` is how many were unread
+@metrics.timed
+def mark_vendor_notifications_read(vendor_id, ids=None):
+    return _queued_outcome(_mark_read, vendor_id, list(ids or ()), outcome=ReadOutcome)
+
+
+def _mark_read(batch, vendor_id, ids):
     if ids:
-        q = "UPDATE Notification SET is_read = 1 WHERE notification_id IN ({seq})".format(
+        q = "UPDATE Notification SET is_read = 1 WHERE vendor_id = ? AND is_read = 0 AND notification_id IN ({seq})".format(
             seq=",".join(["?"] * len(ids))
         )
-        cur.execute(q, ids)
+        batch.cursor.execute(q, [vendor_id, *ids])
     else:
-        cur.execute("""
-            UPDATE Notification SET is_read = 1
-            WHERE vendor_id = (SELECT vendor_id FROM Vendor WHERE email = ?)
-        """, (vendor_email,))
-    conn.commit()
-    conn.close()
+        batch.cursor.execute("UPDATE Notification SET is_read = 1 WHERE vendor_id = ? AND is_read = 0", (vendor_id,))
+    marked = batch.cursor.rowcount
+    return ReadOutcome(True, f"{marked} notification(s) marked as read.", marked=marked)
 
 # --------------------------------------
 
 
-def view_logs():
-    st.header("View Awarded Tender Logs")
-
+# archived bids of every closed tender, best score first within each tender
+@metrics.timed
+@cached_read("BidLog", "Tender", "Vendor")
+def get_award_logs():
     conn = get_connection()
 
     logs_query = """
@@ -830,163 +1187,204 @@ def view_logs():
 
     logs = pd.read_sql_query(logs_query, conn)
     conn.close()
-
-    if logs.empty:
-        st.info("No logs available.")
-        return
+    return logs
 
 
-    tender_groups = logs.groupby(['tender_id', 'tender_ref_no', 'tender_title'])
-
-    for (tender_id, ref, title), group in tender_groups:
-        st.subheader(f"Tender {ref} — {title}")
+# --------------------------
 
-        group_display = group.copy()
-        group_display['Winner'] = group_display['is_winner'].apply(lambda x: "Winner" if x == 'Yes' else "No")
-        st.dataframe(group_display[['vendor_id', 'vendor_name', 'technical_score',
-                                    'financial_score', 'final_score', 'remarks', 'closed_timestamp', 'Winner']],
-                     use_container_width=True)
+# bids of one tender, with the bidder's name resolved in the same query
+@metrics.timed
+def get_bids_for_tender(tender_id):
+    conn = get_connection()
+    df = pd.read_sql_query(
+        """
+        SELECT b.vendor_id, v.name AS vendor_name, b.tender_id, b.submission_date,
+               b.technical_spec, b.financial_spec, b.amount_paise / 100.0 AS amount, b.currency,
+               b.status, b.opened_at,
+               b.technical_score, b.financial_score, b.final_score, b.remarks
+        FROM Bid b
+        LEFT JOIN Vendor v ON v.vendor_id = b.vendor_id
+        WHERE b.tender_id = ?
+        ORDER BY b.final_score DESC, b.amount_paise
+        """,
+        conn,
+        params=(tender_id,)
+    )
+    conn.close()
+    return df
 
 
-# --------------------------
+# precomputed ranking (see database/leaderboard.py), best first, unevaluated bids last
+@metrics.timed
+@cached_read("BidRanking", "Vendor")
+def get_tender_leaderboard(tender_id):
+    conn = get_connection()
+    df = pd.read_sql_query(
+        """
+        SELECT r.rank, r.vendor_id, v.name AS vendor_name, r.final_score,
+               r.amount_paise / 100.0 AS amount, r.gap_to_l1_paise / 100.0 AS gap_to_l1
+        FROM BidRanking r
+        LEFT JOIN Vendor v ON v.vendor_id = r.vendor_id
+        WHERE r.tender_id = ?
+        ORDER BY r.rank IS NULL, r.rank, r.amount_paise
+        """,
+        conn,
+        params=(tender_id,)
+    )
+    conn.close()
+    return df
 
-def award():
-    st.header("Award Tender")
 
+@metrics.timed
+@cached_read("TenderLeaderboard", "Bid")
+def get_leaderboard_summary(tender_id):
     conn = get_connection()
-    cur = conn.cursor()
+    # l1_paise is only set when the bids share one currency
+    row = conn.execute("""
+        SELECT bid_count, evaluated, pending, leader_vendor_id, top_score, l1_paise,
+               CASE WHEN l1_paise IS NOT NULL
+                    THEN (SELECT MIN(b.currency) FROM Bid b WHERE b.tender_id = l.tender_id)
+               END,
+               refreshed_at
+        FROM TenderLeaderboard l WHERE tender_id = ?
+    """, (tender_id,)).fetchone()
+    conn.close()
+    if not row:
+        return LeaderboardSummary()
+    return LeaderboardSummary(*row)
 
-    org_id = st.session_state.get("org_id")
 
-    if org_id:
-        tenders = pd.read_sql_query(
-            "SELECT tender_id, tender_ref_no, title FROM Tender WHERE status = 'Open' AND org_id = ?",
-            conn,
-            params=(org_id,)
-        )
+def _award_one(cur, tender_id, winner_id, closed_time):
+    """
+    Award one tender inside the caller's transaction, using set-based statements only:
+    bids are copied to BidLog with one INSERT ... SELECT and bidders are notified through
+    a single outbox event.
+    If winner_id is None the highest final_score wins (earliest submission on ties).
+    Returns (ok, message).
+    """
+    cur.execute(f"""
+        SELECT t.tender_ref_no, {AWAITING_AWARD}, COUNT(b.vendor_id), SUM(b.final_score IS NULL)
+        FROM Tender t
+        LEFT JOIN Bid b ON b.tender_id = t.tender_id
+        WHERE t.tender_id = ?
+        GROUP BY t.tender_id
+    """, (tender_id,))
+    row = cur.fetchone()
+    if not row:
+        return False, "Tender not found."
+    ref, awaiting, n_bids, n_unscored = row
+    if not awaiting:
+        return False, f"Tender {ref} is not open."
+    if not n_bids:
+        return False, f"Tender {ref} has no bids."
+    if n_unscored:
+        return False, f"Tender {ref} has {n_unscored} bid(s) that have not been evaluated yet."
+
+    if winner_id is None:
+        cur.execute("""
+            SELECT vendor_id FROM Bid WHERE tender_id = ?
+            ORDER BY final_score DESC, submission_date, opened_at LIMIT 1
+        """, (tender_id,))
+        winner_id = cur.fetchone()[0]
     else:
-        # fallback (admin) sees all open tenders
-        tenders = pd.read_sql_query(
-            "SELECT tender_id, tender_ref_no, title FROM Tender WHERE status = 'Open'",
-            conn
-        )
-
-    if tenders.empty:
-        st.warning("No open tenders available.")
-        conn.close()
-        return
-
-    selected_ref = st.selectbox(
-        "Select an open tender:",
-        tenders['tender_ref_no'],
-        format_func=lambda ref: f"{ref} — {tenders.loc[tenders['tender_ref_no'] == ref, 'title'].values[0]}"
-    )
-    tender_id = int(tenders.loc[tenders['tender_ref_no'] == selected_ref, 'tender_id'].values[0])
-
-    bids = pd.read_sql_query(
-        "SELECT * FROM Bid WHERE tender_id = ?",
-        conn,
-        params=(tender_id,)
-    )
-    if bids.empty:
-        st.info("No bids submitted for this tender yet.")
-        conn.close()
-        return
+        cur.execute("SELECT 1 FROM Bid WHERE tender_id = ? AND vendor_id = ?", (tender_id, winner_id))
+        if not cur.fetchone():
+            return False, f"Vendor {winner_id} did not bid on tender {ref}."
 
-    st.subheader("Bids for this tender")
-    st.dataframe(bids, use_container_width=True)
+    # copy to BidLog with accepted / rejected status
+    cur.execute("""
+        INSERT INTO BidLog (
+            vendor_id, tender_id, submission_date, technical_spec, financial_spec,
+            amount_paise, currency,
+            status, opened_at, technical_score, financial_score, final_score,
+            remarks, closed_timestamp, is_winner
+        )
+        SELECT vendor_id, tender_id, submission_date, technical_spec, financial_spec,
+               amount_paise, currency,
+               CASE WHEN vendor_id = :winner THEN 'Accepted' ELSE 'Rejected' END,
+               opened_at, technical_score, financial_score, final_score,
+               remarks, :closed, CASE WHEN vendor_id = :winner THEN 'Yes' ELSE 'No' END
+        FROM Bid WHERE tender_id = :tender
+    """, {"winner": winner_id, "closed": closed_time, "tender": tender_id})
 
-    if bids['final_score'].isnull().any():
-        st.warning("Cannot award this tender. Some bids have not been evaluated yet.")
-        conn.close()
-        return
+    # notifications: one outbox event, fanned out to every bidder by the notification worker
+    outbox.enqueue(cur, "tender_awarded", tender_id=tender_id)
 
-    st.success("All bids have been evaluated. You can now select a winner.")
-    vendor_options = []
-    for _, row in bids.iterrows():
-        cur.execute("SELECT name FROM Vendor WHERE vendor_id = ?", (row['vendor_id'],))
-        result = cur.fetchone()
-        name = result[0] if result else "Unknown"
-        vendor_options.append(f"{row['vendor_id']} — {name}")
+    # remove active bids
+    cur.execute("DELETE FROM Bid WHERE tender_id = ?", (tender_id,))
+    refresh_leaderboards(cur, [tender_id])
 
-    selected_vendor_str = st.selectbox("Select winner:", vendor_options)
-    winner_id = int(selected_vendor_str.split(" — ")[0])
+    # update tender to Closed and set winner
+    cur.execute("UPDATE Tender SET status = 'Closed', winner_vendor_id = ? WHERE tender_id = ?", (winner_id, tender_id))
 
-    if st.button("Award Tender"):
-        try:
-            closed_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-            # copy to BidLog with accepted / rejected status
-            for _, row in bids.iterrows():
-                vid = int(row['vendor_id'])
-                is_winner_flag = 'Yes' if vid == winner_id else 'No'
-                status_to_write = 'Accepted' if vid == winner_id else 'Rejected'
-
-                cur.execute("""
-                    INSERT INTO BidLog (
-                        vendor_id, tender_id, submission_date, technical_spec, financial_spec,
-                        status, opened_at, technical_score, financial_score, final_score,
-                        remarks, closed_timestamp, is_winner
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    row['vendor_id'],
-                    row['tender_id'],
-                    row.get('submission_date'),
-                    row.get('technical_spec'),
-                    row.get('financial_spec'),
-                    status_to_write,
-                    row.get('opened_at'),
-                    row.get('technical_score'),
-                    row.get('financial_score'),
-                    row.get('final_score'),
-                    row.get('remarks'),
-                    closed_time,
-                    is_winner_flag
-                ))
+    return True, f"Tender {ref} awarded successfully and moved to BidLog (tender closed)."
 
-            # remove active bids
-            cur.execute("DELETE FROM Bid WHERE tender_id = ?", (tender_id,))
 
-            # update tender to Closed and set winner
-            cur.execute("UPDATE Tender SET status = 'Closed', winner_vendor_id = ? WHERE tender_id = ?", (winner_id, tender_id))
+@metrics.timed
+def award_tenders(awards):
+    """
+    Batch mode: award many evaluated tenders in a single transaction.
+    `awards` is an iterable of models.AwardRequest.
+    Tenders that can't be awarded are skipped (nothing is written for them) and reported;
+    the rest commit together.
+    Returns a list of AwardOutcome.
+    """
+    awards = list(awards)
+    closed_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    results = []
+    try:
+        with write_transaction() as cur:
+            for a in awards:
+                ok, msg = _award_one(cur, a.tender_id, a.winner_id, closed_time)
+                results.append(AwardOutcome(a.tender_id, ok, msg))
+    except sqlite3.Error as e:
+        return [AwardOutcome(a.tender_id, False, f"DB error: {e}") for a in awards]
+    wake_notification_worker()
+    return results
 
-            # notifications
-            try:
-                cur.execute(
-                    "INSERT INTO Notification (vendor_id, title, message) VALUES (?, ?, ?)",
-                    (winner_id, ":green[TENDER AWARDED]", f"Congratulations! Tender {selected_ref} has awarded to your bid.")
-                )
-                for _, row in bids.iterrows():
-                    vid = int(row['vendor_id'])
-                    if vid != winner_id:
-                        cur.execute(
-                            "INSERT INTO Notification (vendor_id, title, message) VALUES (?, ?, ?)",
-                            (vid, ":red[TENDER RESULT]", f"Your bid for the tender {selected_ref} was not selected. Thank you for participating.")
-                        )
-            except Exception:
-                pass
 
-            conn.commit()
-            st.success(f"Tender {selected_ref} awarded successfully and moved to BidLog (tender closed).")
+# parse prices of bids written before amount_paise existed (also run by migration 8)
+@metrics.timed
+def backfill_bid_amounts(batch_size=5000):
+    with write_transaction() as cur:
+        return setup_db.backfill_bid_amounts(cur.connection, batch_size)
 
-        except Exception as e:
-            conn.rollback()
-            st.error(f"Error while awarding tender: {e}")
 
-        finally:
-            conn.close()
+def award_tender(tender_id, winner_id=None):
+    # _award_one validates before it writes, so a refused award commits nothing
+    result = award_tenders([AwardRequest(tender_id, winner_id)])[0]
+    return Outcome(result.ok, result.message)
 
 
 # ---------------------------------------------------------
 
 
+@metrics.timed
+@cached_read("Organisation", "OrgStats")
 def get_all_orgs():
     conn = get_connection()
-    query = "SELECT org_id, name, email, phone, address FROM Organisation"
+    query = """
+        SELECT o.org_id, o.name, o.email, o.phone, o.address,
+               COALESCE(s.tender_count, 0) AS tender_count,
+               COALESCE(s.open_tender_count, 0) AS open_tender_count
+        FROM Organisation o
+        LEFT JOIN OrgStats s ON s.org_id = o.org_id
+    """
     df = pd.read_sql_query(query, conn)
     conn.close()
     return df
 
+# (org_id, name) pairs for the organisation dropdowns
+@metrics.timed
+@cached_read("Organisation")
+def get_org_names():
+    conn = get_connection()
+    df = pd.read_sql_query("SELECT org_id, name FROM Organisation ORDER BY name", conn)
+    conn.close()
+    return df
+
+
+@metrics.timed
 def delete_org_by_email(email):
     conn = get_connection()
     cur = conn.cursor()
@@ -0,0 +1,89 @@
+import csv
+import gzip
+import io
+import json
+import tempfile
+
+
+# Streaming exports: rows are pulled from the cursor `chunk_size` at a time and written
+# straight into a spooled temporary file (in memory up to SPOOL_LIMIT, on disk after that),
+# so memory use stays flat however many rows the query returns.
+
+SPOOL_LIMIT = 8 * 1024 * 1024
+CHUNK_SIZE = 5000
+
+# format -> (file extension, mime type)
+FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "csv.gz": ("csv.gz", "application/gzip"),
+    "jsonl": ("jsonl", "application/x-ndjson"),
+}
+
+
+def iter_chunks(conn, queries, chunk_size=CHUNK_SIZE):
+    """
+    Run each (sql, params) in turn and yield (columns, rows) chunks of at most chunk_size rows.
+    All queries must return the same columns.
+    """
+    for sql, params in queries:
+        cur = conn.cursor()
+        cur.arraysize = chunk_size
+        cur.execute(sql, params)
+        columns = [d[0] for d in cur.description]
+        while True:
+            rows = cur.fetchmany()
+            if not rows:
+                break
+            yield columns, rows
+        cur.close()
+
+
+class _CsvWriter:
+    def __init__(self, text):
+        self.writer = csv.writer(text)
+        self.header = False
+
+    def write(self, columns, rows):
+        if not self.header:
+            self.writer.writerow(columns)
+            self.header = True
+        self.writer.writerows(rows)
+
+
+class _JsonLinesWriter:
+    def __init__(self, text):
+        self.text = text
+
+    def write(self, columns, rows):
+        self.text.writelines(json.dumps(dict(zip(columns, r)), default=str) + "\n" for r in rows)
+
+
+def export_rows(conn, queries, fmt="csv", chunk_size=CHUNK_SIZE):
+    """
+    Stream the rows of `queries` (a list of (sql, params)) into a spooled temp file.
+    Returns (file positioned at the start, number of rows written); the caller closes the file.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}")
+
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_LIMIT, mode="w+b")
+    raw = gzip.GzipFile(fileobj=out, mode="wb") if fmt == "csv.gz" else out
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    writer = _JsonLinesWriter(text) if fmt == "jsonl" else _CsvWriter(text)
+
+    count = 0
+    try:
+        for columns, rows in iter_chunks(conn, queries, chunk_size):
+            writer.write(columns, rows)
+            count += len(rows)
+        text.flush()
+        # detach so closing the wrappers doesn't close the spooled file underneath
+        text.detach()
+        if raw is not out:
+            raw.close()
+    except BaseException:
+        out.close()
+        raise
+
+    out.seek(0)
+    return out, count
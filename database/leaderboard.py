@@ -0,0 +1,63 @@
+# Precomputed ranking of the active bids of each tender.
+#
+#   BidRanking        one row per bid: rank by final_score (ties share a rank, unevaluated bids
+#                     have none), amount and gap to the lowest (L1) price
+#   TenderLeaderboard one row per tender with bids: evaluated / pending counts, current leader
+#                     (same tie-break as award: earliest submission), top score and L1 price
+#
+# Prices are only compared within one currency: a tender whose bids are priced in more than one
+# has no L1 price and no gaps (scoring refuses such tenders too, see scoring.py).
+#
+# Write paths that change Bid rows call refresh_leaderboards() for the tenders they touched,
+# inside their own transaction, so the ranking is always consistent with the bids.
+# Only those tenders are recomputed, which keeps every refresh proportional to one tender's bids.
+
+ALL_TENDERS = None
+
+
+def _scope(tender_ids):
+    if tender_ids is ALL_TENDERS:
+        return "1", []
+    ids = sorted({int(t) for t in tender_ids})
+    return f"tender_id IN ({','.join('?' * len(ids))})", ids
+
+
+def refresh_leaderboards(cur, tender_ids=ALL_TENDERS):
+    """
+    Recompute BidRanking / TenderLeaderboard for `tender_ids` (all tenders if omitted).
+    `cur` is a cursor or connection inside the caller's write transaction.
+    """
+    if tender_ids is not ALL_TENDERS and not tender_ids:
+        return
+    where, params = _scope(tender_ids)
+
+    cur.execute(f"DELETE FROM BidRanking WHERE {where}", params)
+    cur.execute(f"""
+        INSERT INTO BidRanking (tender_id, vendor_id, rank, final_score, amount_paise, gap_to_l1_paise)
+        SELECT tender_id, vendor_id,
+               CASE WHEN final_score IS NOT NULL
+                    THEN RANK() OVER (PARTITION BY tender_id ORDER BY final_score IS NULL, final_score DESC)
+               END,
+               final_score, amount_paise,
+               CASE WHEN MIN(currency) OVER (PARTITION BY tender_id) = MAX(currency) OVER (PARTITION BY tender_id)
+                    THEN amount_paise - MIN(amount_paise) OVER (PARTITION BY tender_id)
+               END
+        FROM Bid
+        WHERE {where}
+    """, params)
+
+    cur.execute(f"DELETE FROM TenderLeaderboard WHERE {where}", params)
+    cur.execute(f"""
+        INSERT INTO TenderLeaderboard (tender_id, bid_count, evaluated, pending,
+                                       leader_vendor_id, top_score, l1_paise, refreshed_at)
+        SELECT tender_id, COUNT(*), COUNT(final_score), COUNT(*) - COUNT(final_score),
+               (SELECT b2.vendor_id FROM Bid b2
+                WHERE b2.tender_id = b.tender_id AND b2.final_score IS NOT NULL
+                ORDER BY b2.final_score DESC, b2.submission_date, b2.opened_at LIMIT 1),
+               MAX(final_score),
+               CASE WHEN MIN(currency) = MAX(currency) THEN MIN(amount_paise) END,
+               CURRENT_TIMESTAMP
+        FROM Bid b
+        WHERE {where}
+        GROUP BY tender_id
+    """, params)
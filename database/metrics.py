@@ -0,0 +1,281 @@
+import bisect
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+# In-process query instrumentation.
+#
+#   statements  latency histogram, call and row counts per distinct SQL text (whitespace collapsed)
+#   functions   latency histogram and call counts per instrumented db_utils function
+#   reruns      statements / functions / database time of the most recent page renders
+#   slow log    the last SLOW_LOG_SIZE statements slower than SLOW_QUERY_MS, with EXPLAIN QUERY PLAN;
+#               SQL text and plan only -- bound values (passwords among them) are never stored
+#
+# Statements are fed in by ConnectionPool(on_statement=...); functions by @timed.
+# render_openmetrics() exposes the counters in the OpenMetrics text format.
+
+SLOW_QUERY_MS = float(os.environ.get("TENDER_SLOW_QUERY_MS", "50"))
+SLOW_LOG_SIZE = 100
+MAX_STATEMENTS = 500     # distinct SQL texts tracked; the rest are counted under "(other)"
+RECENT_RERUNS = 50
+
+# histogram upper bounds, in milliseconds
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_PLANNABLE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+
+def normalize_sql(sql):
+    return " ".join(sql.split())[:300]
+
+
+class Histogram:
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def quantile(self, q):
+        # upper bound of the bucket holding the q-th observation (max for the +Inf bucket)
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS_MS, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+
+class _Series:
+    __slots__ = ("histogram", "rows", "errors")
+
+    def __init__(self):
+        self.histogram = Histogram()
+        self.rows = 0
+        self.errors = 0
+
+
+class Metrics:
+
+    def __init__(self, slow_query_ms=SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.statements = {}
+            self.functions = {}
+            self.slow_log = deque(maxlen=SLOW_LOG_SIZE)
+            self.reruns = deque(maxlen=RECENT_RERUNS)
+            self.rerun_statements = Histogram()  # statements per rerun (values are counts, not ms)
+            self._plans = {}
+
+    # --- statements (ConnectionPool.on_statement) ---
+
+    def record_statement(self, conn, sql, params, seconds, rows):
+        ms = seconds * 1000
+        key = normalize_sql(sql)
+        with self._lock:
+            series = self.statements.get(key)
+            if series is None:
+                if len(self.statements) >= MAX_STATEMENTS:
+                    key = "(other)"
+                series = self.statements.setdefault(key, _Series())
+            series.histogram.observe(ms)
+            series.rows += rows
+
+        rerun = getattr(self._local, "rerun", None)
+        if rerun is not None:
+            rerun["statements"] += 1
+            rerun["db_ms"] += ms
+
+        if ms >= self.slow_query_ms:
+            self._log_slow(conn, key, sql, params, ms, rows)
+
+    def _log_slow(self, conn, key, sql, params, ms, rows):
+        # params are only bound into the EXPLAIN, never kept
+        plan = self._plans.get(key)
+        if plan is None and _PLANNABLE.match(sql) and params is not None:
+            try:
+                # straight through sqlite3, so the EXPLAIN isn't instrumented itself
+                plan = format_plan(
+                    sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+                )
+            except Exception as e:
+                plan = f"(no plan: {e})"
+            with self._lock:
+                if len(self._plans) < MAX_STATEMENTS:
+                    self._plans[key] = plan
+        with self._lock:
+            self.slow_log.append({
+                "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "ms": round(ms, 3),
+                "rows": rows,
+                "sql": key,
+                "plan": plan or "",
+            })
+
+    # --- functions ---
+
+    def timed(self, fn):
+        """Record the latency of every call to fn (the undecorated function stays at fn.__wrapped__)."""
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            failed = False
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                ms = (time.perf_counter() - started) * 1000
+                with self._lock:
+                    series = self.functions.setdefault(name, _Series())
+                    series.histogram.observe(ms)
+                    series.errors += failed
+                rerun = getattr(self._local, "rerun", None)
+                if rerun is not None:
+                    rerun["functions"][name] = rerun["functions"].get(name, 0) + 1
+
+        # keep pointing at the original function, not at an intermediate decorator
+        wrapper.__wrapped__ = getattr(fn, "__wrapped__", fn)
+        return wrapper
+
+    # --- reruns ---
+
+    @contextmanager
+    def rerun(self):
+        # count what one page render does on this thread
+        if getattr(self._local, "rerun", None) is not None:
+            yield
+            return
+        current = {"statements": 0, "db_ms": 0.0, "functions": {}}
+        self._local.rerun = current
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.rerun = None
+            current["total_ms"] = (time.perf_counter() - started) * 1000
+            current["at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            with self._lock:
+                self.reruns.append(current)
+                self.rerun_statements.observe(current["statements"])
+
+    # --- export ---
+
+    def snapshot(self):
+        # plain-data copy for display
+        with self._lock:
+            def rows(table):
+                return [{
+                    "name": name,
+                    "calls": s.histogram.count,
+                    "rows": s.rows,
+                    "errors": s.errors,
+                    "total_ms": round(s.histogram.sum_ms, 3),
+                    "mean_ms": round(s.histogram.sum_ms / s.histogram.count, 3) if s.histogram.count else 0.0,
+                    "p50_ms": s.histogram.quantile(0.5),
+                    "p95_ms": s.histogram.quantile(0.95),
+                    "p99_ms": s.histogram.quantile(0.99),
+                    "max_ms": round(s.histogram.max_ms, 3),
+                } for name, s in table.items()]
+            return {
+                "statements": rows(self.statements),
+                "functions": rows(self.functions),
+                "slow_log": list(self.slow_log),
+                "reruns": [
+                    {**r, "functions": sum(r["functions"].values()), "db_ms": round(r["db_ms"], 3),
+                     "total_ms": round(r["total_ms"], 3)}
+                    for r in self.reruns
+                ],
+            }
+
+    def render_openmetrics(self):
+        lines = []
+        with self._lock:
+            _histogram_family(lines, "tender_db_statement_duration_milliseconds",
+                              "Latency of SQL statements, including fetching their rows.",
+                              "statement", self.statements)
+            _histogram_family(lines, "tender_db_function_duration_milliseconds",
+                              "Latency of database helper functions.", "function", self.functions)
+
+            lines.append("# TYPE tender_db_statement_rows counter")
+            lines.append("# HELP tender_db_statement_rows Rows returned or changed by SQL statements.")
+            for key, s in self.statements.items():
+                lines.append(f'tender_db_statement_rows_total{{statement="{_escape(key)}"}} {s.rows}')
+
+            lines.append("# TYPE tender_db_function_errors counter")
+            lines.append("# HELP tender_db_function_errors Database helper calls that raised.")
+            for name, s in self.functions.items():
+                lines.append(f'tender_db_function_errors_total{{function="{_escape(name)}"}} {s.errors}')
+
+            lines.append("# TYPE tender_db_slow_queries gauge")
+            lines.append("# HELP tender_db_slow_queries Entries currently in the slow-query log.")
+            lines.append(f"tender_db_slow_queries {len(self.slow_log)}")
+
+            lines.append("# TYPE tender_db_statements_per_rerun summary")
+            lines.append("# HELP tender_db_statements_per_rerun SQL statements issued per page render.")
+            lines.append(f"tender_db_statements_per_rerun_count {self.rerun_statements.count}")
+            lines.append(f"tender_db_statements_per_rerun_sum {self.rerun_statements.sum_ms:g}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_openmetrics(self, path):
+        # write-then-rename, so a scraper never reads a half-written file
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render_openmetrics())
+        os.replace(tmp, path)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_family(lines, name, help_text, label, table):
+    lines.append(f"# TYPE {name} histogram")
+    lines.append(f"# HELP {name} {help_text}")
+    for key, s in table.items():
+        h = s.histogram
+        lbl = f'{label}="{_escape(key)}"'
+        cumulative = 0
+        for bound, n in zip(BUCKETS_MS, h.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{lbl},le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{lbl},le="+Inf"}} {h.count}')
+        lines.append(f"{name}_count{{{lbl}}} {h.count}")
+        lines.append(f"{name}_sum{{{lbl}}} {h.sum_ms:.6f}")
+
+
+def format_plan(rows):
+    # EXPLAIN QUERY PLAN rows (id, parent, _, detail) as an indented tree
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node] + detail)
+    return "\n".join(lines)
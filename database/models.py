@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from typing import NamedTuple, Optional
+
+import pandas as pd
+
+
+# Request / response types of the data-access API in db_utils.
+#
+# Requests are dataclasses. Outcomes are NamedTuples; read them by name (`.ok`, `.message`,
+# `.error`) rather than unpacking, since some carry more than (ok, message).
+
+# Outcome.error: why a write failed, for callers that treat failures differently (API status codes)
+NOT_FOUND = "not_found"
+CONFLICT = "conflict"     # the current state doesn't allow it (closed tender, bid under review, ...)
+DB_ERROR = "db_error"     # the database failed (locked, unavailable); worth retrying
+
+
+class Outcome(NamedTuple):
+    ok: bool
+    message: str
+    error: Optional[str] = None  # NOT_FOUND / CONFLICT / DB_ERROR when not ok
+
+
+class ReadOutcome(NamedTuple):
+    ok: bool
+    message: str
+    error: Optional[str] = None
+    marked: int = 0  # notifications that were unread
+
+
+class ScoreOutcome(NamedTuple):
+    ok: bool
+    message: str
+    scores: Optional[pd.DataFrame] = None  # per-bid result of scoring.score_bids
+
+
+class AwardOutcome(NamedTuple):
+    tender_id: int
+    ok: bool
+    message: str
+
+
+@dataclass(frozen=True)
+class AwardRequest:
+    tender_id: int
+    winner_id: Optional[int] = None  # None: the highest final score wins (earliest submission on ties)
+
+
+@dataclass(frozen=True)
+class Evaluation:
+    # scores of one bid; None leaves the bid unscored
+    vendor_id: int
+    technical_score: Optional[float] = None
+    financial_score: Optional[float] = None
+    remarks: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class TenderEdit:
+    tender_id: int
+    field: str   # a key of db_utils.EDITABLE_TENDER_FIELDS
+    value: str
+
+
+@dataclass(frozen=True)
+class LeaderboardSummary:
+    bid_count: int = 0
+    evaluated: int = 0
+    pending: int = 0
+    leader_vendor_id: Optional[int] = None
+    top_score: Optional[float] = None
+    l1_paise: Optional[int] = None
+    l1_currency: Optional[str] = None  # None when l1_paise is
+    refreshed_at: Optional[str] = None
@@ -0,0 +1,154 @@
+import re
+from decimal import Decimal
+
+
+# Bids only carry their price as free text in financial_spec ('₹8,90,000', 'Rs. 14.5 lakh',
+# 'INR 2.1 Cr', '$12,500.75', 'EUR 1.000,50', ...). parse_amount pulls out the amount so it can be
+# stored as an integer number of minor units (paise for INR) next to the text.
+#
+# The amount is the number written next to a currency marker or a lakh / crore style unit; other
+# numbers ('Phase 2', 'GST 18%', 'valid for 90 days') are ignored. Text with no such number
+# is priced only if it holds exactly one plain number. Anything else -- two different marked
+# amounts, two plain numbers, '1.000' without a unit -- is left unpriced rather than guessed,
+# since the amount decides L1 and everyone else's financial score.
+
+DEFAULT_CURRENCY = "INR"
+
+# (?![a-z]) rather than \b, so 'Rs500' counts and 'rsvp' doesn't
+_MARKERS = {
+    "INR": r"₹|\bRs(?![a-z])\.?|\bINR(?![a-z])",
+    "USD": r"\$|\bUSD(?![a-z])",
+    "EUR": r"€|\bEUR(?![a-z])",
+    "GBP": r"£|\bGBP(?![a-z])",
+}
+_ANY_MARKER = "|".join(f"(?P<{code}>{pattern})" for code, pattern in _MARKERS.items())
+
+_CURRENCY_RE = re.compile(_ANY_MARKER, re.IGNORECASE)
+_MARKER_BEFORE_RE = re.compile(rf"(?:{_ANY_MARKER})\s*[.:]?\s*$", re.IGNORECASE)
+_MARKER_AFTER_RE = re.compile(rf"\s*(?:{_ANY_MARKER})", re.IGNORECASE)
+
+_MULTIPLIERS = {
+    "thousand": 1_000, "k": 1_000,
+    "lakh": 100_000, "lakhs": 100_000, "lac": 100_000, "lacs": 100_000, "l": 100_000,
+    "million": 1_000_000, "mn": 1_000_000,
+    "crore": 10_000_000, "crores": 10_000_000, "cr": 10_000_000,
+}
+
+# digits with any grouping / decimal separators (8,90,000 / 890,000 / 1.000,50 / 890000.50)
+_NUMBER_RE = re.compile(r"\d(?:[\d,.]*\d)?")
+# the single-letter units only count glued to the number (8.9L, 12k), or after a space when
+# a currency marker says the number is money ('₹ 5 L')
+_UNIT_RE = re.compile(
+    r"\s*(?P<word>thousand|lakhs?|lacs?|million|mn|crores?|cr)\b|(?P<glued>[lk])\b|\s+(?P<spaced>[lk])\b",
+    re.IGNORECASE,
+)
+# numbers that are not money: percentages and durations
+_NOT_MONEY_RE = re.compile(
+    r"\s*(?:%|per\s*cent\b|percent\b|(?:days?|weeks?|months?|years?|yrs?|hours?|hrs?)\b)",
+    re.IGNORECASE,
+)
+
+_INDIAN_GROUPS = re.compile(r"\d{1,2}(?:,\d{2})*,\d{3}")
+_GROUPS = {",": re.compile(r"\d{1,3}(?:,\d{3})+"), ".": re.compile(r"\d{1,3}(?:\.\d{3})+")}
+
+
+def _decimal(digits, has_unit):
+    # '8,90,000' / '890,000' / '1.000.000' / '1.000,50' / '12,500.75' / '14.5' -> Decimal,
+    # None where the separators could mean either thing
+    if "," in digits and "." in digits:
+        point = "," if digits.rfind(",") > digits.rfind(".") else "."
+        group = "." if point == "," else ","
+        whole, _, frac = digits.rpartition(point)
+        if group not in whole or point in whole or not (
+                _GROUPS[group].fullmatch(whole) or (group == "," and _INDIAN_GROUPS.fullmatch(whole))):
+            return None
+        return Decimal(f"{whole.replace(group, '')}.{frac}")
+    if "," in digits:
+        if _GROUPS[","].fullmatch(digits) or _INDIAN_GROUPS.fullmatch(digits):
+            return Decimal(digits.replace(",", ""))
+        if re.fullmatch(r"\d+,\d{1,2}", digits):
+            return Decimal(digits.replace(",", "."))
+        return None
+    if digits.count(".") > 1:
+        return Decimal(digits.replace(".", "")) if _GROUPS["."].fullmatch(digits) else None
+    if re.fullmatch(r"\d{1,3}\.\d{3}", digits) and not has_unit:
+        return None  # 1.000: one, or a thousand?
+    return Decimal(digits)
+
+
+def _marker(match):
+    return next(code for code, value in match.groupdict().items() if value)
+
+
+def _candidates(text):
+    # (value, currency or None, marked) for every number that could be the price
+    for m in _NUMBER_RE.finditer(text):
+        head, tail = text[:m.start()], text[m.end():]
+        before = _MARKER_BEFORE_RE.search(head)
+        if head[-1:].isalpha() and not before:
+            continue  # part of a word or code ('ISO9001', 'Phase2')
+        if _NOT_MONEY_RE.match(tail):
+            continue
+
+        unit = _UNIT_RE.match(tail)
+        name = unit and (unit.group("word") or unit.group("glued") or (before and unit.group("spaced")))
+        if name:
+            tail = tail[unit.end():]
+        after = None if before else _MARKER_AFTER_RE.match(tail)
+
+        currency = _marker(before or after) if (before or after) else None
+        value = _decimal(m.group(), bool(name))
+        if value is not None:
+            value *= _MULTIPLIERS.get((name or "").lower(), 1)
+        yield value, currency, bool(currency or name)
+
+
+def parse_amount(text):
+    """
+    Returns (amount in minor units, currency code), or (None, None) if the text has no
+    price or it is ambiguous.
+    """
+    if not text:
+        return None, None
+
+    candidates = list(_candidates(text))
+    marked = {(value, currency) for value, currency, is_marked in candidates if is_marked}
+    if marked:
+        if len(marked) > 1:
+            return None, None
+        value, currency = marked.pop()
+    elif len(candidates) == 1:
+        value, currency, _ = candidates[0]
+    else:
+        return None, None
+    if value is None:
+        return None, None
+
+    if currency is None:
+        # a unit with no marker next to it ('14.5 lakh'), or a lone plain number: use the one
+        # currency the text names, if any
+        codes = {_marker(m) for m in _CURRENCY_RE.finditer(text)}
+        currency = codes.pop() if len(codes) == 1 else DEFAULT_CURRENCY
+
+    return int((value * 100).to_integral_value()), currency
+
+
+def format_amount(minor_units, currency=DEFAULT_CURRENCY):
+    # 89000000 -> '₹8,90,000.00' (Indian grouping for INR)
+    if minor_units is None:
+        return "-"
+    sign = "-" if minor_units < 0 else ""
+    whole, frac = divmod(abs(int(minor_units)), 100)
+    if currency == "INR":
+        s = str(whole)
+        head, tail = s[:-3], s[-3:]
+        groups = []
+        while len(head) > 2:
+            groups.insert(0, head[-2:])
+            head = head[:-2]
+        if head:
+            groups.insert(0, head)
+        grouped = ",".join(groups + [tail]) if groups else tail
+        return f"{sign}₹{grouped}.{frac:02d}"
+    symbol = {"USD": "$", "EUR": "€", "GBP": "£"}.get(currency, f"{currency} ")
+    return f"{sign}{symbol}{whole:,}.{frac:02d}"
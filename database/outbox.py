@@ -0,0 +1,191 @@
+import threading
+import time
+
+
+# Notifications are not written straight into Notification by user-facing code.
+# Producers add one row to NotificationOutbox inside their own transaction (so the event
+# exists if and only if the change it describes was committed) and a background worker
+# expands it into Notification rows in batches.
+#
+# kinds:
+#   direct            one notification for vendor_id (title / message given)
+#   tender_awarded    winner + "not selected" notices for every bid archived in BidLog for tender_id
+#   tender_withdrawn  "tender withdrawn" notice for every bid archived in BidLog for tender_id
+#   tender_closing    "closing soon" reminder for every active bid on tender_id (see scheduler.py)
+#
+# Delivery is idempotent: Notification.event_id + vendor_id is unique, rows are inserted with
+# INSERT OR IGNORE and the event is marked Done in the same transaction, so a retried or
+# concurrently processed event never produces duplicates.
+
+
+def enqueue(cur, kind, vendor_id=None, tender_id=None, title=None, message=None, event_key=None):
+    # event_key makes enqueueing itself idempotent (e.g. one reminder per tender)
+    cur.execute("""
+        INSERT OR IGNORE INTO NotificationOutbox (event_key, kind, tender_id, vendor_id, title, message)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (event_key, kind, tender_id, vendor_id, title, message))
+
+
+def _deliver_direct(cur, event):
+    cur.execute("""
+        INSERT OR IGNORE INTO Notification (vendor_id, title, message, event_id)
+        VALUES (?, ?, ?, ?)
+    """, (event["vendor_id"], event["title"], event["message"], event["event_id"]))
+
+
+def _deliver_awarded(cur, event):
+    cur.execute("""
+        INSERT OR IGNORE INTO Notification (vendor_id, title, message, event_id)
+        SELECT l.vendor_id,
+               CASE WHEN l.is_winner = 'Yes' THEN ':green[TENDER AWARDED]' ELSE ':red[TENDER RESULT]' END,
+               CASE WHEN l.is_winner = 'Yes'
+                    THEN 'Congratulations! Tender ' || t.tender_ref_no || ' has awarded to your bid.'
+                    ELSE 'Your bid for the tender ' || t.tender_ref_no || ' was not selected. Thank you for participating.'
+               END,
+               :event_id
+        FROM BidLog l
+        JOIN Tender t ON t.tender_id = l.tender_id
+        WHERE l.tender_id = :tender_id AND l.status IN ('Accepted', 'Rejected')
+    """, {"event_id": event["event_id"], "tender_id": event["tender_id"]})
+
+
+def _deliver_withdrawn(cur, event):
+    cur.execute("""
+        INSERT OR IGNORE INTO Notification (vendor_id, title, message, event_id)
+        SELECT l.vendor_id, 'Tender Withdrawn',
+               'Tender ' || t.tender_ref_no || ' has been withdrawn by the organisation. Your bid has been archived.',
+               :event_id
+        FROM BidLog l
+        JOIN Tender t ON t.tender_id = l.tender_id
+        WHERE l.tender_id = :tender_id AND l.status = 'Withdrawn'
+    """, {"event_id": event["event_id"], "tender_id": event["tender_id"]})
+
+
+def _deliver_closing(cur, event):
+    cur.execute("""
+        INSERT OR IGNORE INTO Notification (vendor_id, title, message, event_id)
+        SELECT b.vendor_id, 'Tender Closing Soon',
+               'Tender ' || t.tender_ref_no || ' closes for bidding on ' || t.closing_date ||
+               '. Your bid can be edited or withdrawn until then.',
+               :event_id
+        FROM Bid b
+        JOIN Tender t ON t.tender_id = b.tender_id
+        WHERE b.tender_id = :tender_id AND t.status = 'Open'
+    """, {"event_id": event["event_id"], "tender_id": event["tender_id"]})
+
+
+DELIVERERS = {
+    "direct": _deliver_direct,
+    "tender_awarded": _deliver_awarded,
+    "tender_withdrawn": _deliver_withdrawn,
+    "tender_closing": _deliver_closing,
+}
+
+
+class NotificationWorker(threading.Thread):
+    """
+    Daemon thread that drains NotificationOutbox.
+    Each batch is one transaction; every event gets its own savepoint so a failing event
+    is rolled back and rescheduled (with backoff) without holding up the others.
+    """
+
+    def __init__(self, get_connection, batch_size=200, poll_interval=2.0, max_attempts=5):
+        super().__init__(name="notification-worker", daemon=True)
+        self.get_connection = get_connection
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._last_purge = 0.0
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                delivered = self.run_once()
+                self._purge_old()
+            except Exception as e:
+                print("Notification worker error:", e)
+                delivered = 0
+            # keep draining while there is a backlog, otherwise sleep until woken
+            if delivered < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def run_once(self):
+        # deliver one batch of due events; returns how many events were handled
+        conn = self.get_connection()
+        try:
+            # cheap check first, so an idle worker never takes the write lock
+            due = conn.execute("""
+                SELECT 1 FROM NotificationOutbox
+                WHERE status = 'Pending' AND next_attempt_at <= CURRENT_TIMESTAMP
+                LIMIT 1
+            """).fetchone()
+            if not due:
+                return 0
+
+            with conn.transaction():
+                cur = conn.cursor()
+                cur.execute("""
+                    SELECT event_id, kind, tender_id, vendor_id, title, message, attempts
+                    FROM NotificationOutbox
+                    WHERE status = 'Pending' AND next_attempt_at <= CURRENT_TIMESTAMP
+                    ORDER BY event_id
+                    LIMIT ?
+                """, (self.batch_size,))
+                cols = [d[0] for d in cur.description]
+                events = [dict(zip(cols, r)) for r in cur.fetchall()]
+
+                for event in events:
+                    cur.execute("SAVEPOINT deliver")
+                    try:
+                        DELIVERERS[event["kind"]](cur, event)
+                        cur.execute("""
+                            UPDATE NotificationOutbox
+                            SET status = 'Done', attempts = attempts + 1,
+                                processed_at = CURRENT_TIMESTAMP, last_error = NULL
+                            WHERE event_id = ?
+                        """, (event["event_id"],))
+                        cur.execute("RELEASE deliver")
+                    except Exception as e:
+                        cur.execute("ROLLBACK TO deliver")
+                        cur.execute("RELEASE deliver")
+                        self._reschedule(cur, event, e)
+            return len(events)
+        finally:
+            conn.close()
+
+    def _reschedule(self, cur, event, error):
+        attempts = event["attempts"] + 1
+        status = "Failed" if attempts >= self.max_attempts else "Pending"
+        delay = 5 * attempts * attempts  # 5s, 20s, 45s, ...
+        cur.execute("""
+            UPDATE NotificationOutbox
+            SET attempts = ?, status = ?, last_error = ?,
+                next_attempt_at = datetime('now', '+' || ? || ' seconds')
+            WHERE event_id = ?
+        """, (attempts, status, str(error)[:500], delay, event["event_id"]))
+
+    def _purge_old(self, every=3600, keep_days=7):
+        # delivered events are only needed for deduplication while they can still be retried
+        now = time.monotonic()
+        if now - self._last_purge < every:
+            return
+        self._last_purge = now
+        conn = self.get_connection()
+        try:
+            with conn.transaction():
+                conn.execute(
+                    "DELETE FROM NotificationOutbox WHERE status = 'Done' AND processed_at < datetime('now', ?)",
+                    (f"-{keep_days} days",)
+                )
+        finally:
+            conn.close()
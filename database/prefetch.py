@@ -0,0 +1,45 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+# Concurrent warm-up of the query cache before a page renders.
+#
+# A dashboard lists the read helpers its panels are about to call -- same function, same
+# arguments, written with call(...) -- and prefetch() runs the distinct ones at once on a small
+# shared thread pool and waits for them. Every worker takes its own pooled connection, so the
+# queries really run side by side (WAL readers don't block each other). The panels then make
+# their usual calls and get cache hits, and the page waits for the slowest query instead of
+# the sum of all of them.
+#
+# Only @cached_read helpers (or helpers built on them) are worth prefetching: anything else
+# would simply run twice. Errors are ignored here; the panel makes the same call and reports
+# the failure as usual.
+#
+# The pool has one worker per core, at most 4. With a single core nothing can overlap, so the
+# distinct calls run one after another on the script thread instead -- still only once each.
+
+PREFETCH_WORKERS = int(os.environ.get("TENDER_PREFETCH_WORKERS") or min(4, os.cpu_count() or 1))
+PREFETCH_TIMEOUT = 10.0  # seconds; after that the page renders and panels query for themselves
+
+_executor = (ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+             if PREFETCH_WORKERS > 1 else None)
+
+
+def call(fn, *args, **kwargs):
+    # one planned read; identical calls compare equal, so they are only run once
+    return fn, args, tuple(sorted(kwargs.items()))
+
+
+def prefetch(calls, timeout=PREFETCH_TIMEOUT):
+    """Run the distinct `calls` concurrently and wait for them. Returns how many were run."""
+    distinct = list(dict.fromkeys(calls))
+    if _executor is None or len(distinct) < 2:
+        for fn, args, kwargs in distinct:
+            try:
+                fn(*args, **dict(kwargs))
+            except Exception:
+                pass
+        return len(distinct)
+    futures = [_executor.submit(fn, *args, **dict(kwargs)) for fn, args, kwargs in distinct]
+    wait(futures, timeout)
+    return len(distinct)
@@ -0,0 +1,114 @@
+import threading
+from datetime import date
+
+from database import outbox
+
+
+# Time-driven tender transitions, run by a background thread:
+#
+#   close     Open tenders whose closing_date has passed become 'Closed'. Their bids stay in
+#             Bid (status unchanged, no winner yet) so the organisation can still evaluate and
+#             award them; they just stop showing up as open and stop accepting bids.
+#   remind    bidders of Open tenders that close today (i.e. within the next 24h) get one
+#             "closing soon" notice, queued through the outbox with event_key reminder:<tender_id>
+#             so a tender is only ever reminded about once.
+#
+# There is no separate "not yet open" status: a tender is published as 'Open' (the organisation
+# may still delete it before its opening_date), so there is no opening transition to make.
+#
+# Due tenders are found with a range scan on idx_tender_open_closing (closing_date, partial on
+# status = 'Open'), and transitioned batch_size at a time, one short write transaction each,
+# so the scheduler never holds the write lock for long.
+
+
+class TenderScheduler(threading.Thread):
+    """
+    Daemon thread that closes overdue tenders and queues closing reminders every `interval` seconds.
+    `on_notify` is called after reminders were queued (e.g. to wake the notification worker).
+    """
+
+    def __init__(self, get_connection, on_notify=None, interval=60.0, batch_size=500):
+        super().__init__(name="tender-scheduler", daemon=True)
+        self.get_connection = get_connection
+        self.on_notify = on_notify
+        self.interval = interval
+        self.batch_size = batch_size
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print("Tender scheduler error:", e)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def run_once(self, today=None):
+        # one pass over everything that is due; returns {"closed": n, "reminded": n}
+        today = today or date.today()
+        closed = self.close_due(today)
+        reminded = self.queue_reminders(today)
+        if reminded and self.on_notify:
+            self.on_notify()
+        return {"closed": closed, "reminded": reminded}
+
+    def close_due(self, today):
+        # tenders are open up to and including their closing_date
+        return self._in_batches("""
+            SELECT tender_id FROM Tender
+            WHERE status = 'Open' AND closing_date < ?
+            ORDER BY closing_date
+            LIMIT ?
+        """, (today.isoformat(),), self._close)
+
+    def queue_reminders(self, today):
+        # only tenders with at least one bid; the event key skips ones already reminded
+        return self._in_batches("""
+            SELECT t.tender_id FROM Tender t
+            WHERE t.status = 'Open' AND t.closing_date = ?
+              AND EXISTS (SELECT 1 FROM Bid b WHERE b.tender_id = t.tender_id)
+              AND NOT EXISTS (SELECT 1 FROM NotificationOutbox o WHERE o.event_key = 'reminder:' || t.tender_id)
+            ORDER BY t.closing_date
+            LIMIT ?
+        """, (today.isoformat(),), self._remind)
+
+    def _in_batches(self, select_sql, params, apply):
+        done = 0
+        conn = self.get_connection()
+        try:
+            while not self._stopping.is_set():
+                # cheap read first, so an idle pass never takes the write lock
+                ids = [r[0] for r in conn.execute(select_sql, params + (self.batch_size,)).fetchall()]
+                if not ids:
+                    break
+                with conn.transaction():
+                    done += apply(conn.cursor(), ids)
+                if len(ids) < self.batch_size:
+                    break
+        finally:
+            conn.close()
+        return done
+
+    @staticmethod
+    def _close(cur, tender_ids):
+        # re-check the status: an award or withdrawal may have got there first
+        cur.execute(f"""
+            UPDATE Tender SET status = 'Closed'
+            WHERE status = 'Open' AND tender_id IN ({','.join('?' * len(tender_ids))})
+        """, tender_ids)
+        return cur.rowcount
+
+    @staticmethod
+    def _remind(cur, tender_ids):
+        for tender_id in tender_ids:
+            outbox.enqueue(cur, "tender_closing", tender_id=tender_id, event_key=f"reminder:{tender_id}")
+        return len(tender_ids)
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+
+# Scores every bid of a tender in one pass, from the technical scores entered by the
+# evaluators and the parsed bid amounts (Bid.amount_paise).
+#
+# methods:
+#   SUM    technical + financial, out of 200 (what the manual evaluation form has always done)
+#   QCBS   quality and cost based: tech_weight * technical + fin_weight * financial, out of 100
+#   L1     lowest price wins: final score is the financial score alone, out of 100
+#
+# The financial score is L1-normalised: 100 * lowest qualified amount / bid amount. Amounts in
+# different currencies can't be compared, so a tender whose qualified bids are priced in more
+# than one currency is not scored (there are no exchange rates to normalise with).
+# Bids with a technical score below min_tech_score are disqualified (final score 0) and
+# don't take part in the normalisation. Bids without a technical score or without a
+# parseable amount are left unscored (NULL) until that information exists.
+
+METHODS = ("SUM", "QCBS", "L1")
+
+DEFAULT_SCORING = {"method": "SUM", "tech_weight": 0.7, "fin_weight": 0.3, "min_tech_score": 0.0}
+
+
+def validate_config(config):
+    # returns an error message, or None if the config is usable
+    if config["method"] not in METHODS:
+        return f"Unknown scoring method {config['method']!r}."
+    if not 0 <= config["min_tech_score"] <= 100:
+        return "Minimum technical score must be between 0 and 100."
+    if config["method"] == "QCBS":
+        if config["tech_weight"] < 0 or config["fin_weight"] < 0:
+            return "Weights cannot be negative."
+        if abs(config["tech_weight"] + config["fin_weight"] - 1.0) > 1e-6:
+            return "Technical and financial weights must add up to 1."
+    return None
+
+
+def score_bids(bids, config=None):
+    """
+    bids: DataFrame with vendor_id, technical_score and amount_paise columns, and optionally
+    currency (amounts are assumed to share one currency without it).
+    Returns a DataFrame with vendor_id, technical_score, financial_score, final_score
+    and qualified (bool), one row per bid, in the same order.
+    Raises ValueError for an invalid config or qualified bids in more than one currency.
+    """
+    config = {**DEFAULT_SCORING, **(config or {})}
+    error = validate_config(config)
+    if error:
+        raise ValueError(error)
+
+    tech = pd.to_numeric(bids["technical_score"], errors="coerce").to_numpy(dtype=float)
+    amount = pd.to_numeric(bids["amount_paise"], errors="coerce").to_numpy(dtype=float)
+
+    evaluated = ~np.isnan(tech)
+    qualified = evaluated & (tech >= config["min_tech_score"])
+    priced = qualified & ~np.isnan(amount) & (amount > 0)
+
+    if "currency" in bids:
+        currencies = sorted(set(bids["currency"].to_numpy()[priced]))
+        if len(currencies) > 1:
+            raise ValueError(f"Bids are priced in more than one currency ({', '.join(currencies)}); "
+                             "they can't be compared on price.")
+
+    fin = np.full(len(bids), np.nan)
+    if priced.any():
+        lowest = amount[priced].min()
+        fin[priced] = 100.0 * lowest / amount[priced]
+
+    method = config["method"]
+    if method == "SUM":
+        final = tech + fin
+    elif method == "QCBS":
+        final = config["tech_weight"] * tech + config["fin_weight"] * fin
+    else:
+        final = fin.copy()
+
+    # disqualified on technical grounds: scored, but out of the running
+    disqualified = evaluated & ~qualified
+    final[disqualified] = 0.0
+
+    return pd.DataFrame({
+        "vendor_id": bids["vendor_id"].to_numpy(),
+        "technical_score": tech,
+        "financial_score": np.round(fin, 2),
+        "final_score": np.round(final, 2),
+        "qualified": qualified,
+    })
@@ -0,0 +1,169 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+
+# Group commit for the hot write paths (bid submit / edit / withdraw, direct notifications).
+#
+# Instead of every caller opening its own write transaction, callers hand the write to
+# WriteQueue.call(op, *args) and one writer thread runs whatever has queued up, up to
+# max_batch writes and at most max_delay after the first one arrived, as a single
+# BEGIN IMMEDIATE ... COMMIT. N concurrent bids then cost one write-lock acquisition and one
+# WAL sync instead of N, and the writers of this process never fight each other for the lock.
+# With the default max_delay of 0 nothing is held back: a batch is whatever queued up while
+# the previous one was committing, so a lone write commits right away and latency under load
+# is bounded by one batch.
+#
+# Every write runs in its own savepoint: if op raises, only its changes are rolled back and
+# the exception is re-raised in its caller while the rest of the batch still commits. A caller
+# blocks until the batch holding its write is committed and gets op's own return value, or
+# the batch's error if the batch as a whole failed (no connection, lock timeout, commit).
+# A caller gives up after WRITE_TIMEOUT; a write that hasn't started by then is cancelled.
+#
+# op(batch, *args) writes through batch.cursor and can push per-batch work onto the batch:
+#   batch.defer(fn, items)   fn(cursor, all_items) runs once before commit, e.g.
+#                            batch.defer(refresh_leaderboards, [tender_id]) refreshes each
+#                            touched tender once per batch instead of once per bid
+#   batch.after_commit(fn)   fn() runs once after the commit (e.g. wake a worker)
+# Both are dropped for a write whose savepoint was rolled back.
+
+WRITE_TIMEOUT = 30.0  # seconds
+
+
+class WriteBatch:
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self._deferred = {}          # fn -> items, from writes that succeeded
+        self._after_commit = {}      # dict as an ordered set, from writes that succeeded
+        self._pending = {}           # the same two, from the write currently running
+        self._pending_after = {}
+
+    def defer(self, fn, items):
+        self._pending.setdefault(fn, []).extend(items)
+
+    def after_commit(self, fn):
+        self._pending_after[fn] = None
+
+    def _keep_pending(self, keep):
+        if keep:
+            for fn, items in self._pending.items():
+                self._deferred.setdefault(fn, []).extend(items)
+            self._after_commit.update(self._pending_after)
+        self._pending = {}
+        self._pending_after = {}
+
+
+class WriteQueue(threading.Thread):
+    """
+    Daemon thread that commits queued writes in groups (see above).
+    Counters `batches` / `writes` give the achieved batching (writes per commit).
+    """
+
+    def __init__(self, get_connection, max_batch=256, max_delay=0.0):
+        super().__init__(name="write-queue", daemon=True)
+        self.get_connection = get_connection
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.writes = 0
+        self._queue = queue.SimpleQueue()
+        self._stopping = threading.Event()
+
+    def submit(self, op, *args):
+        # queue op(batch, *args); the Future resolves once its batch has committed
+        future = Future()
+        self._queue.put((op, args, future))
+        return future
+
+    def call(self, op, *args, timeout=None):
+        # never from inside an op: the writer would wait for itself
+        future = self.submit(op, *args)
+        try:
+            return future.result(WRITE_TIMEOUT if timeout is None else timeout)
+        except TimeoutError:
+            if future.cancel():
+                raise TimeoutError("The write queue did not get to this write in time; nothing was written.")
+            raise TimeoutError("The write is still being committed; it may or may not take effect.")
+
+    def stop(self):
+        self._stopping.set()
+        self._queue.put(None)
+
+    def run(self):
+        while not self._stopping.is_set():
+            items = self._collect()
+            try:
+                self._commit(items)
+            except BaseException as e:
+                # _commit resolves every future itself; this is the last line of defence that
+                # keeps the writer alive (and no caller waiting) whatever went wrong
+                print("Write queue error:", e)
+                for _, _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return []
+        items = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(items) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._stopping.set()
+                break
+            items.append(item)
+        return [item for item in items if item[2].set_running_or_notify_cancel()]
+
+    def _commit(self, items):
+        if not items:
+            return
+        results = []
+        conn = None
+        try:
+            conn = self.get_connection()
+            with conn.transaction():
+                cur = conn.cursor()
+                batch = WriteBatch(cur)
+                for op, args, future in items:
+                    cur.execute("SAVEPOINT queued_write")
+                    try:
+                        results.append((future, op(batch, *args), None))
+                        cur.execute("RELEASE queued_write")
+                        batch._keep_pending(True)
+                    except Exception as e:
+                        cur.execute("ROLLBACK TO queued_write")
+                        cur.execute("RELEASE queued_write")
+                        batch._keep_pending(False)
+                        results.append((future, None, e))
+                for fn, deferred in batch._deferred.items():
+                    fn(cur, deferred)
+        except Exception as e:
+            # the batch as a whole failed (no connection, lock timeout, deferred work, commit):
+            # nothing was written
+            for _, _, future in items:
+                future.set_exception(e)
+            return
+        finally:
+            if conn is not None:
+                conn.close()
+
+        self.batches += 1
+        self.writes += len(items)
+        for fn in batch._after_commit:
+            try:
+                fn()
+            except Exception as e:
+                print("Write queue after-commit error:", e)
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
@@ -1,35 +1,46 @@
 # Push to branch MASTER, not MAIN
 
+import importlib
 import streamlit as st
-from dashboards.org_dashboard import org_login
-from dashboards.vendor_dashboard import vendor_login # i have added it
-from dashboards.admin_dashboard import admin_login
-from setup_db import setup_database
-import urllib.parse
+from setup_db import ensure_schema
+from database.db_utils import unit_of_work, start_notification_worker, start_scheduler
 
 # use wide layout by default
 st.set_page_config(
     layout="wide",
     page_title="Tender Management System",
-    initial_sidebar_state="expanded"    
-) 
+    initial_sidebar_state="expanded"
+)
+
+# role -> (module, login page); a dashboard module is only imported once its role is picked
+# (and then stays loaded for the rest of the server process)
+DASHBOARDS = {
+    "Admin": ("dashboards.admin_dashboard", "admin_login"),
+    "Organisation": ("dashboards.org_dashboard", "org_login"),
+    "Vendor": ("dashboards.vendor_dashboard", "vendor_login"),
+}
+
+
+def login_page(role):
+    module, page = DASHBOARDS[role]
+    return getattr(importlib.import_module(module), page)
+
 
 def main():
     st.sidebar.title("Tender Management System")
     role = st.sidebar.radio("Login as:", ["Admin", "Organisation", "Vendor"])
 
-    if 'db_initialized' not in st.session_state:
-        setup_database()
-        st.session_state.db_initialized = True
-
-    if role == "Organisation":
-        org_login()
+    # creates / migrates the database on the first run of the server process, no-op afterwards
+    ensure_schema()
 
-    elif role == "Vendor":
-        vendor_login()
+    # background delivery of queued notifications (one worker per server process)
+    start_notification_worker()
+    # closes tenders at their closing_date and queues closing reminders
+    start_scheduler()
 
-    else:
-        admin_login()
+    login_page(role)()
 
 if __name__ == "__main__":
-    main()
+    # one pooled connection + read snapshot per rerun
+    with unit_of_work():
+        main()
@@ -0,0 +1,289 @@
+# Latency benchmark for the read and write helpers in database/db_utils.py.
+#
+#     python scripts/benchmark.py --db /tmp/tenders-100k.db           # existing (synthetic!) database
+#     python scripts/benchmark.py --scales 10k,100k,1m                # generate, then benchmark each
+#     python scripts/benchmark.py --scales 10k --save-baseline        # record a baseline
+#
+# Every helper is called --repeat times and p50 / p95 / p99 latencies are reported next to
+# the stored baseline (scripts/benchmark_baseline.json, written only by --save-baseline).
+# Cached reads are called through __wrapped__, so the numbers are database time, not cache hits.
+# The write benchmarks modify the database: never point this at real data.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database.models import AwardRequest, Evaluation, TenderEdit  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, "scripts", "benchmark_baseline.json")
+
+# db_utils plumbing (connections, background threads) isn't benchmarked
+SKIPPED = {
+    "start_notification_worker", "wake_notification_worker", "start_scheduler",
+    "get_connection", "unit_of_work", "call_in_unit_of_work", "clear_query_cache", "write_transaction",
+    "delete_org_by_email",  # cascades through a whole organisation; too destructive to repeat
+    "delete_tender",        # only tenders that haven't opened yet can be deleted
+}
+
+
+def percentiles(samples):
+    if len(samples) == 1:
+        return {"p50": samples[0], "p95": samples[0], "p99": samples[0]}
+    q = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": q[49], "p95": q[94], "p99": q[98]}
+
+
+def _raw(fn):
+    return getattr(fn, "__wrapped__", fn)
+
+
+def build_cases(db, conn, repeat):
+    """
+    (name, function, list of argument tuples) for every benchmarked helper. Arguments are
+    picked from the data itself so the same database always gets the same calls.
+    """
+    one = lambda sql, *p: conn.execute(sql, p).fetchone()  # noqa: E731
+
+    vendor_id, vendor_email, vendor_pw = one("""
+        SELECT v.vendor_id, v.email, v.password FROM Vendor v
+        JOIN VendorStats s ON s.vendor_id = v.vendor_id
+        ORDER BY s.unread_notifications DESC, v.vendor_id LIMIT 1
+    """)
+    org_id, org_email, org_pw = one("SELECT org_id, email, password FROM Organisation ORDER BY org_id LIMIT 1")
+    tender_id, tender_ref = one("""
+        SELECT t.tender_id, t.tender_ref_no FROM Tender t JOIN TenderStats s ON s.tender_id = t.tender_id
+        WHERE t.status = 'Open' ORDER BY s.bid_count DESC, t.tender_id LIMIT 1
+    """)
+    location = one("SELECT location FROM Tender WHERE status = 'Open' GROUP BY location ORDER BY COUNT(*) DESC LIMIT 1")[0]
+    first_page = _raw(db.get_open_tenders)(limit=20)
+    after = db.open_tenders_cursor(first_page)
+
+    # writes need fresh targets on every call
+    free_vendors = [r[0] for r in conn.execute("""
+        SELECT vendor_id FROM Vendor
+        WHERE vendor_id NOT IN (SELECT vendor_id FROM Bid WHERE tender_id = ?)
+        ORDER BY vendor_id LIMIT ?
+    """, (tender_id, repeat))]
+    submitted = [r[0] for r in conn.execute("""
+        SELECT vendor_id FROM Bid WHERE tender_id = ? AND status = 'Submitted' ORDER BY vendor_id LIMIT 1
+    """, (tender_id,))]
+    bids = [Evaluation(r[0], 70.0, 20.0, "benchmark")
+            for r in conn.execute("SELECT vendor_id FROM Bid WHERE tender_id = ?", (tender_id,))]
+    org_tender = one("SELECT tender_id FROM Tender WHERE org_id = ? AND status = 'Open' LIMIT 1", org_id)
+    open_tenders = [r[0] for r in conn.execute("""
+        SELECT tender_id FROM Tender
+        WHERE status = 'Open' AND tender_id != ? ORDER BY tender_id LIMIT ?
+    """, (tender_id, 2 * repeat))]
+    awardable = [r[0] for r in conn.execute("""
+        SELECT l.tender_id FROM TenderLeaderboard l JOIN Tender t ON t.tender_id = l.tender_id
+        WHERE t.status = 'Open' AND l.pending = 0 AND l.tender_id != ? ORDER BY l.tender_id LIMIT ?
+    """, (tender_id, repeat))]
+    withdrawable = [t for t in open_tenders if t not in set(awardable)][:repeat]
+    award_one, award_batch = awardable[:len(awardable) // 2], awardable[len(awardable) // 2:]
+    stamp = int(time.time())
+    new_vendors = [f"bench{stamp}-{i}@example.com" for i in range(repeat)]
+    new_accounts = [f"bench{stamp}-r{i}@example.com" for i in range(repeat)]
+
+    same = lambda *args: [args] * repeat  # noqa: E731
+    cases = [
+        # --- reads ---
+        ("get_all_vendors", db.get_all_vendors, same()),
+        ("verify_vendor", db.verify_vendor, same(vendor_email, vendor_pw)),
+        ("authenticate_vendor", db.authenticate_vendor, same(vendor_email, vendor_pw)),
+        ("authenticate_org", db.authenticate_org, same(org_email, org_pw)),
+        ("authenticate_admin", db.authenticate_admin, same(db.ADMIN_PASSWORD or "")),
+        ("get_vendor_by_email", db.get_vendor_by_email, same(vendor_email)),
+        ("get_admin_by_email", db.get_admin_by_email, same(org_email)),
+        ("get_open_tenders", db.get_open_tenders, same(None, None, None, 20)),
+        ("get_open_tenders[location]", db.get_open_tenders, same(location, None, None, 20)),
+        ("get_open_tenders[search]", db.get_open_tenders, same(None, "solar panels", None, 20)),
+        ("get_open_tenders[org]", db.get_open_tenders, same(None, None, org_id, 20)),
+        ("get_open_tenders[page 2]", db.get_open_tenders, same(None, None, None, 20, after)),
+        ("count_open_tenders", db.count_open_tenders, same()),
+        ("count_open_tenders[search]", db.count_open_tenders, same(None, "solar panels")),
+        ("get_tenders_locations", db.get_tenders_locations, same()),
+        ("get_tender_by_ref", db.get_tender_by_ref, same(tender_ref)),
+        ("get_vendor_bids", db.get_vendor_bids, same(vendor_id)),
+        ("get_bids_for_vendor", db.get_bids_for_vendor, same(vendor_email)),
+        ("get_bid_history[page]", db.get_bid_history, same(None, None, None, None, None, None, "recent", 500)),
+        ("get_bid_history[org]", db.get_bid_history, same(None, org_id, None, None, None, None, "tender", 500)),
+        ("count_bid_history", db.count_bid_history, same()),
+        ("get_tender_refs", db.get_tender_refs, same()),
+        ("export_bid_history[org]", db.export_bid_history, same("csv", None, org_id)),
+        ("get_vendor_notifications", db.get_vendor_notifications, same(vendor_id)),
+        ("get_notifications", db.get_notifications, same(vendor_email)),
+        ("get_vendor_unread_count", db.get_vendor_unread_count, same(vendor_id)),
+        ("get_unread_notifications_count", db.get_unread_notifications_count, same(vendor_email)),
+        ("get_all_orgs", db.get_all_orgs, same()),
+        ("get_org_names", db.get_org_names, same()),
+        ("get_bids_for_tender", db.get_bids_for_tender, same(tender_id)),
+        ("get_tender_leaderboard", db.get_tender_leaderboard, same(tender_id)),
+        ("get_leaderboard_summary", db.get_leaderboard_summary, same(tender_id)),
+        ("get_tender_scoring", db.get_tender_scoring, same(tender_id)),
+        ("get_org_tenders", db.get_org_tenders, same(org_id)),
+        ("get_org_open_tenders", db.get_org_open_tenders, same(org_id)),
+        ("get_tenders_awaiting_award", db.get_tenders_awaiting_award, same(org_id)),
+        ("get_award_logs", db.get_award_logs, same()),
+
+        # --- writes ---
+        ("submit_bid", db.submit_bid, [(v, tender_ref, "benchmark spec", "₹12,50,000") for v in free_vendors]),
+        ("delete_bid", db.delete_bid, [(tender_id, v) for v in free_vendors]),
+        ("update_bid", db.update_bid, [(v, tender_id, "benchmark spec", "Rs 12.5 lakh") for v in submitted] * repeat),
+        ("save_evaluations", db.save_evaluations, same(tender_id, bids)),
+        ("set_tender_scoring", db.set_tender_scoring, same(tender_id, "QCBS", 0.7, 0.3, 40.0)),
+        ("score_tender", db.score_tender, same(tender_id)),
+        ("create_notification", db.create_notification, same(vendor_id, "Benchmark", "benchmark message")),
+        ("mark_vendor_notifications_read", db.mark_vendor_notifications_read, same(vendor_id)),
+        ("mark_notifications_read", db.mark_notifications_read, same(vendor_email)),
+        ("add_vendor", db.add_vendor, [("Bench Vendor", e, "0", "Pune", "pw") for e in new_vendors]),
+        ("delete_vendor_by_email", db.delete_vendor_by_email, [(e,) for e in new_vendors]),
+        ("update_tender", db.update_tender,
+         same(org_id, TenderEdit(org_tender[0], "Description", "benchmark description")) if org_tender else []),
+        ("add_tender", db.add_tender, [(f"BENCH-{stamp}-{i}", org_id, "Benchmark tender", "benchmark", location,
+                                        "2100-01-01", "2100-12-31") for i in range(repeat)]),
+        ("award_tender", db.award_tender, [(t,) for t in award_one]),
+        ("award_tenders[5]", db.award_tenders,
+         [([AwardRequest(t) for t in award_batch[i:i + 5]],) for i in range(0, len(award_batch), 5)]),
+        ("withdraw_tender", db.withdraw_tender, [(t,) for t in withdrawable]),
+        ("backfill_bid_amounts", db.backfill_bid_amounts, same()),
+        ("recount_counters", db.recount_counters, [()] * min(repeat, 5)),
+    ]
+    # signup helpers returning an Outcome, where this db_utils has them
+    for name, label in (("register_vendor", "Bench Vendor"), ("register_org", "Bench Org")):
+        if hasattr(db, name):
+            cases.append((name, getattr(db, name), [(label, e, "0", "Pune", "pw") for e in new_accounts]))
+    return cases
+
+
+def run(db_path, repeat, label):
+    os.environ["TENDER_DB_PATH"] = db_path
+    import streamlit  # noqa: F401  (imported first so bare-mode warnings don't interleave with results)
+    from database import db_utils as db
+
+    conn = db.get_connection()
+    rows = sum(conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+               for t in ("Organisation", "Vendor", "Tender", "Bid", "BidLog", "Notification"))
+    cases = build_cases(db, conn, repeat)
+    conn.close()
+
+    covered = {fn.__name__ for _, fn, _ in cases}
+    public = {name for name, obj in vars(db).items()
+              if callable(obj) and getattr(obj, "__module__", None) == db.__name__ and not name.startswith("_")
+              and not isinstance(obj, type)}
+    missing = sorted(public - covered - SKIPPED - {"open_tenders_cursor", "bid_history_query", "tender_removal"})
+    if missing:
+        print(f"note: not benchmarked: {', '.join(missing)}")
+
+    results = {}
+    for name, fn, calls in cases:
+        if not calls:
+            print(f"note: no suitable data for {name}, skipped")
+            continue
+        fn = _raw(fn)
+        samples = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn(*calls[0])  # warm up (page cache, statement cache)
+            for args in calls[1:] or calls:
+                # helpers that call other cached helpers must miss the cache too
+                db.clear_query_cache()
+                t0 = time.perf_counter()
+                fn(*args)
+                samples.append((time.perf_counter() - t0) * 1000)
+        results[name] = {"n": len(samples), **{k: round(v, 4) for k, v in percentiles(samples).items()}}
+    return {"label": label, "rows": rows, "results": results}
+
+
+def report(run_result, baseline, max_regression):
+    base = baseline.get("runs", {}).get(run_result["label"], {}).get("results", {})
+    print(f"\n== {run_result['label']} ({run_result['rows']:,} rows) ==")
+    print(f"{'function':<34}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'base p95':>10}{'change':>9}")
+    regressions = []
+    for name, r in run_result["results"].items():
+        b = base.get(name)
+        change = ""
+        if b and b["p95"] > 0:
+            ratio = r["p95"] / b["p95"] - 1
+            change = f"{ratio:+.0%}"
+            if max_regression is not None and ratio > max_regression:
+                regressions.append(name)
+        print(f"{name:<34}{r['n']:>5}{r['p50']:>10.3f}{r['p95']:>10.3f}{r['p99']:>10.3f}"
+              f"{(b['p95'] if b else float('nan')):>10.3f}{change:>9}")
+    if regressions:
+        print(f"p95 regressed by more than {max_regression:.0%}: {', '.join(regressions)}")
+    return regressions
+
+
+def load_baseline(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"runs": {}}
+
+
+def save_baseline(path, run_result):
+    baseline = load_baseline(path)
+    baseline.setdefault("runs", {})[run_result["label"]] = {
+        "rows": run_result["rows"],
+        "results": run_result["results"],
+        "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+    }
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    print(f"baseline for {run_result['label']} saved to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark database/db_utils.py.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--db", help="benchmark this existing (synthetic) database")
+    target.add_argument("--scales", help="comma-separated scales to generate and benchmark, e.g. 10k,100k")
+    parser.add_argument("--label", help="baseline key for --db (default: the file name)")
+    parser.add_argument("--repeat", type=int, default=30, help="calls per function (default 30)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=tempfile.gettempdir(), help="where --scales databases are generated")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--max-regression", type=float,
+                        help="exit with status 1 if any p95 is this fraction slower than baseline (e.g. 0.25)")
+    args = parser.parse_args()
+
+    if args.scales:
+        # one process per scale: db_utils binds its connection pool to one database file
+        status = 0
+        for scale in args.scales.split(","):
+            path = os.path.join(args.workdir, f"tender-bench-{scale}.db")
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            subprocess.run([sys.executable, os.path.join(ROOT, "scripts", "generate_data.py"),
+                            "--scale", scale, "--db", path, "--seed", str(args.seed)], check=True)
+            cmd = [sys.executable, __file__, "--db", path, "--label", scale, "--repeat", str(args.repeat),
+                   "--baseline", args.baseline]
+            if args.save_baseline:
+                cmd.append("--save-baseline")
+            if args.max_regression is not None:
+                cmd += ["--max-regression", str(args.max_regression)]
+            status = max(status, subprocess.run(cmd).returncode)
+        sys.exit(status)
+
+    label = args.label or os.path.splitext(os.path.basename(args.db))[0]
+    result = run(os.path.abspath(args.db), max(args.repeat, 2), label)
+    regressions = report(result, load_baseline(args.baseline), args.max_regression)
+    if args.save_baseline:
+        save_baseline(args.baseline, result)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
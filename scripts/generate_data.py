@@ -0,0 +1,256 @@
+# Deterministic synthetic data for load testing.
+#
+#     python scripts/generate_data.py --scale 100k --db /tmp/tenders-100k.db
+#
+# Builds a fresh, fully migrated database and bulk-loads organisations, vendors, tenders,
+# active bids, archived bids (BidLog) and notifications with executemany, one transaction per
+# chunk of tenders. The same --seed and --scale always produce the same rows.
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.money import format_amount  # noqa: E402
+
+# approximate total number of rows per named scale
+SCALES = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+
+# Fixed, so the data doesn't depend on when it was generated, and far enough ahead that every
+# deadline is still in the future: with a past date the tender scheduler (started by the app and
+# the API server) would close every open tender on start-up and the benchmarks would measure
+# a database without open tenders. Publishing and bid dates are in the future too.
+BASE_DATE = date(2100, 1, 1)
+TENDER_CHUNK = 5_000
+
+CITIES = ["Pune", "Mumbai", "Delhi", "New Delhi", "Noida", "Bengaluru", "Hyderabad", "Kolkata",
+          "Chennai", "Ahmedabad", "Jaipur", "Lucknow", "Bhopal", "Nagpur", "Haryana", "Surat"]
+ORG_KINDS = ["Public Works Department", "Municipal Corporation", "Railway Division", "Power Corporation",
+             "Institute of Technology", "Water Supply Board", "Health Department", "Port Trust"]
+VENDOR_WORDS = ["Nova", "Orion", "Vertex", "Summit", "Keystone", "Atlas", "Prime", "Apex", "Zenith",
+                "Pinnacle", "Sterling", "Horizon", "Meridian", "Titan", "Crescent", "Everest"]
+VENDOR_KINDS = ["Trade Links", "Industrial Services", "Global Pvt. Ltd.", "Engineering Works",
+                "Enterprises", "Solutions", "TechnoCorp", "Infra Projects", "Contractors"]
+WORKS = [
+    ("Road Repair and Maintenance", "Resurfacing and repair of arterial roads"),
+    ("Drainage System Upgrade", "Upgradation of the stormwater drainage network"),
+    ("Railway Station Renovation", "Modernisation of passenger amenities"),
+    ("Track Electrification Project", "Electrification of railway track sections"),
+    ("Procurement of Solar Panels", "Supply and installation of high-efficiency solar panels"),
+    ("Solid Waste Management Project", "Design and operation of automated waste collection"),
+    ("Street Lighting Installation", "Installation of LED streetlights with motion sensors"),
+    ("Campus Network Upgrade", "Deployment of Wi-Fi 6 access points and fibre backbone"),
+    ("Water Pipeline Replacement", "Replacement of ageing cast-iron water mains"),
+    ("Hospital Equipment Supply", "Supply of diagnostic and ICU equipment"),
+    ("School Building Construction", "Construction of a three-storey school block"),
+    ("Bridge Strengthening Works", "Structural strengthening of an existing road bridge"),
+]
+SPECS = ["ISO-certified process", "10-year warranty", "BIS approved materials", "on-site maintenance",
+         "IoT monitoring included", "energy-efficient design", "turnkey delivery", "fire-safety compliant"]
+
+
+def plan(total):
+    # row counts per table for roughly `total` rows overall
+    orgs = max(5, total // 5_000)
+    vendors = max(20, total // 100)
+    tenders = max(10, total // 20)
+    return {"orgs": orgs, "vendors": vendors, "tenders": tenders}
+
+
+def _inr(rupees):
+    # Indian digit grouping, like the sample data: 890000 -> '₹8,90,000'
+    return format_amount(rupees * 100, "INR").removesuffix(".00")
+
+
+def _orgs(rng, n):
+    for i in range(1, n + 1):
+        city = rng.choice(CITIES)
+        yield (i, f"{rng.choice(ORG_KINDS)} {city} #{i}", f"tenders{i}@org{i}.gov.in",
+               f"91{rng.randrange(10**9, 10**10)}", city, "password")
+
+
+def _vendors(rng, n):
+    for i in range(1, n + 1):
+        yield (i, f"{rng.choice(VENDOR_WORDS)} {rng.choice(VENDOR_KINDS)} #{i}", f"contact{i}@vendor{i}.in",
+               f"98{rng.randrange(10**8, 10**9)}", rng.choice(CITIES), "password")
+
+
+def _tender_chunk(rng, first, last, counts):
+    """
+    Rows for tenders first..last: (tenders, bids, bid_logs).
+    About 60% stay open (their bids in Bid, some already evaluated); the rest are awarded
+    or withdrawn, with their bids archived in BidLog.
+    """
+    tenders, bids, logs = [], [], []
+    for tid in range(first, last + 1):
+        org = rng.randint(1, counts["orgs"])
+        title, desc = rng.choice(WORKS)
+        city = rng.choice(CITIES)
+        published = BASE_DATE + timedelta(days=rng.randrange(365))
+        opening = published + timedelta(days=rng.randint(1, 5))
+        closing = opening + timedelta(days=rng.randint(10, 45))
+
+        bidders = rng.sample(range(1, counts["vendors"] + 1), min(rng.randint(1, 14), counts["vendors"]))
+        estimate = rng.randrange(2, 500) * 100_000
+        open_tender = rng.random() < 0.6
+        evaluated = open_tender and rng.random() < 0.4
+        winner = None
+        if not open_tender and rng.random() < 0.85:
+            winner = rng.choice(bidders)
+
+        tenders.append((tid, f"SYN-{tid:08d}", org, f"{title} ({city})", f"{desc} in {city}.", city,
+                        "Open" if open_tender else "Closed", opening.isoformat(), closing.isoformat(),
+                        published.isoformat(), winner))
+
+        for vendor in bidders:
+            rupees = int(estimate * rng.uniform(0.85, 1.2)) // 1000 * 1000
+            submitted = (opening + timedelta(days=rng.randint(0, 9))).isoformat()
+            tech_spec = f"{rng.choice(SPECS)}; {rng.choice(SPECS)}"
+            scored = evaluated or not open_tender
+            tech = round(rng.uniform(40, 100), 1) if scored else None
+            fin = round(rng.uniform(40, 100), 1) if scored else None
+            final = round(tech + fin, 1) if scored else None
+
+            if open_tender:
+                bids.append((vendor, tid, submitted, tech_spec, _inr(rupees), rupees * 100, "INR",
+                             "Under Review" if scored else "Submitted", submitted,
+                             tech, fin, final, None))
+            else:
+                if winner is None:
+                    status, is_winner = "Withdrawn", "No"
+                else:
+                    status = "Accepted" if vendor == winner else "Rejected"
+                    is_winner = "Yes" if vendor == winner else "No"
+                logs.append((vendor, tid, submitted, tech_spec, _inr(rupees), rupees * 100, "INR",
+                             status, submitted, tech, fin, final, None, closing.isoformat() + " 18:00:00",
+                             is_winner))
+    return tenders, bids, logs
+
+
+def _notifications(rng, n, counts):
+    titles = [("Bid Submitted", "Your bid has been submitted."),
+              ("Bid Updated", "Your bid was updated."),
+              (":green[TENDER AWARDED]", "Congratulations! A tender has been awarded to your bid."),
+              (":red[TENDER RESULT]", "Your bid was not selected. Thank you for participating.")]
+    for _ in range(n):
+        title, message = rng.choice(titles)
+        ts = datetime(BASE_DATE.year, BASE_DATE.month, BASE_DATE.day) + timedelta(
+            days=rng.randrange(365), seconds=rng.randrange(86400))
+        yield (rng.randint(1, counts["vendors"]), title, message, ts.strftime("%Y-%m-%d %H:%M:%S"),
+               int(rng.random() < 0.7))
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate(path, total, seed=42, verbose=True):
+    os.environ["TENDER_DB_PATH"] = path
+    import setup_db
+    setup_db.DB_PATH = path
+    setup_db.setup_database()
+
+    rng = random.Random(seed)
+    counts = plan(total)
+    conn = sqlite3.connect(path)
+    if conn.execute("SELECT EXISTS (SELECT 1 FROM Tender)").fetchone()[0]:
+        conn.close()
+        raise SystemExit(f"{path} already has data; generate into a new file.")
+
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -200000")
+    started = time.perf_counter()
+    written = {"Organisation": 0, "Vendor": 0, "Tender": 0, "Bid": 0, "BidLog": 0, "Notification": 0}
+
+    def load(table, sql, rows):
+        for batch in _batched(rows, 50_000):
+            with conn:
+                conn.executemany(sql, batch)
+            written[table] += len(batch)
+
+    load("Organisation", "INSERT INTO Organisation (org_id, name, email, phone, address, password) "
+         "VALUES (?, ?, ?, ?, ?, ?)", _orgs(rng, counts["orgs"]))
+    load("Vendor", "INSERT INTO Vendor (vendor_id, name, email, phone, address, password) "
+         "VALUES (?, ?, ?, ?, ?, ?)", _vendors(rng, counts["vendors"]))
+
+    for first in range(1, counts["tenders"] + 1, TENDER_CHUNK):
+        last = min(first + TENDER_CHUNK - 1, counts["tenders"])
+        tenders, bids, logs = _tender_chunk(rng, first, last, counts)
+        with conn:
+            conn.executemany("""
+                INSERT INTO Tender (tender_id, tender_ref_no, org_id, title, description, location, status,
+                                    opening_date, closing_date, publishing_date, winner_vendor_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, tenders)
+            conn.executemany("""
+                INSERT INTO Bid (vendor_id, tender_id, submission_date, technical_spec, financial_spec,
+                                 amount_paise, currency, status, opened_at,
+                                 technical_score, financial_score, final_score, remarks)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, bids)
+            conn.executemany("""
+                INSERT INTO BidLog (vendor_id, tender_id, submission_date, technical_spec, financial_spec,
+                                    amount_paise, currency, status, opened_at,
+                                    technical_score, financial_score, final_score, remarks,
+                                    closed_timestamp, is_winner)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, logs)
+        written["Tender"] += len(tenders)
+        written["Bid"] += len(bids)
+        written["BidLog"] += len(logs)
+        if verbose:
+            print(f"  tenders {last}/{counts['tenders']}", end="\r", flush=True)
+
+    # notifications make up the rest of the row budget
+    n_notifications = max(0, total - sum(written.values()))
+    load("Notification", "INSERT INTO Notification (vendor_id, title, message, timestamp, is_read) "
+         "VALUES (?, ?, ?, ?, ?)", _notifications(rng, n_notifications, counts))
+
+    with conn:
+        setup_db.refresh_leaderboards(conn)
+    conn.execute("PRAGMA optimize")
+    conn.execute("ANALYZE")
+    conn.close()
+
+    if verbose:
+        elapsed = time.perf_counter() - started
+        print(f"Generated {sum(written.values()):,} rows in {elapsed:.1f}s into {path}")
+        print("  " + ", ".join(f"{t}: {n:,}" for t, n in written.items()))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic tender database.")
+    parser.add_argument("--scale", default="10k",
+                        help=f"one of {', '.join(SCALES)} or a row count (default 10k)")
+    parser.add_argument("--db", default=os.environ.get("TENDER_DB_PATH"),
+                        help="output database file (default: $TENDER_DB_PATH)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if not args.db:
+        parser.error("--db or TENDER_DB_PATH is required (refusing to write into the app's database.db)")
+    total = SCALES.get(args.scale.lower()) or int(args.scale)
+    generate(os.path.abspath(args.db), total, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,21 @@
+import os
 import sqlite3
+import threading
 
 
 # should ideally run once after main function is called
-# if you're doing some changes to the schema (not recommended) then try NOT to use ALTER.
-# instead replace the .db file with another one, and old schema with new one (yes, the new file will be empty and not have the previous entries)
+# the CREATE TABLE statements below are the original (version 0) schema -- do not edit them.
+# schema changes go into MIGRATIONS at the bottom of this file, which upgrade existing
+# databases in place (PRAGMA user_version records how far a database has been migrated).
+
+DB_PATH = os.environ.get(
+    "TENDER_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "database.db")
+)
+
 
 def setup_database():
-    conn = sqlite3.connect("database.db")
+    conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
 
     # Vendors table
@@ -200,11 +209,486 @@ def setup_database():
     
     
     conn.commit()
+
+    applied = migrate(conn)
     conn.close()
+    if applied:
+        print(f"Applied schema migrations: {', '.join(str(v) for v in applied)}")
     print("Database setup complete.")
 
-    
+
+# ##################
+# ### MIGRATIONS ###
+# ##################
+
+# Each entry upgrades the schema by one version; its position in the list (1-based) is the version.
+# An entry is either a SQL script or a function taking the connection.
+# Never edit or reorder a migration that has shipped -- append a new one instead.
+
+MIGRATIONS = [
+    # 1: secondary indexes for the queries in db_utils and the dashboards
+    """
+    -- open tenders, newest first (vendor browse / submit tabs)
+    CREATE INDEX IF NOT EXISTS idx_tender_open_pub
+        ON Tender(publishing_date DESC, tender_id DESC) WHERE status = 'Open';
+    -- open tenders of one organisation (delete / edit / evaluate / award screens)
+    CREATE INDEX IF NOT EXISTS idx_tender_open_org
+        ON Tender(org_id, publishing_date DESC) WHERE status = 'Open';
+    -- open tenders filtered by location
+    CREATE INDEX IF NOT EXISTS idx_tender_open_loc
+        ON Tender(location, publishing_date DESC) WHERE status = 'Open';
+    -- all tenders of one organisation, and the admin tender picker
+    CREATE INDEX IF NOT EXISTS idx_tender_org_pub ON Tender(org_id, publishing_date DESC);
+    CREATE INDEX IF NOT EXISTS idx_tender_pub ON Tender(publishing_date DESC);
+    -- distinct location lists (covering)
+    CREATE INDEX IF NOT EXISTS idx_tender_location ON Tender(location);
+    CREATE INDEX IF NOT EXISTS idx_tender_org_location ON Tender(org_id, location);
+
+    -- bids of one tender (the primary key only covers vendor_id first)
+    CREATE INDEX IF NOT EXISTS idx_bid_tender ON Bid(tender_id, final_score DESC);
+    CREATE INDEX IF NOT EXISTS idx_bidlog_tender ON BidLog(tender_id, final_score DESC);
+
+    -- inbox and unread badge
+    CREATE INDEX IF NOT EXISTS idx_notification_vendor ON Notification(vendor_id, timestamp DESC);
+    CREATE INDEX IF NOT EXISTS idx_notification_unread ON Notification(vendor_id) WHERE is_read = 0;
+
+    -- organisation dropdowns (ORDER BY name, covering)
+    CREATE INDEX IF NOT EXISTS idx_org_name ON Organisation(name, org_id);
+    """,
+
+    # 2: FTS5 search index over Tender, kept in sync by triggers
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS TenderSearch USING fts5(
+        tender_ref_no, title, description,
+        content = 'Tender', content_rowid = 'tender_id',
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS trg_tender_search_ai AFTER INSERT ON Tender BEGIN
+        INSERT INTO TenderSearch(rowid, tender_ref_no, title, description)
+        VALUES (new.tender_id, new.tender_ref_no, new.title, new.description);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_tender_search_ad AFTER DELETE ON Tender BEGIN
+        INSERT INTO TenderSearch(TenderSearch, rowid, tender_ref_no, title, description)
+        VALUES ('delete', old.tender_id, old.tender_ref_no, old.title, old.description);
+    END;
+
+    -- only the indexed columns: status changes etc. must not churn the index
+    CREATE TRIGGER IF NOT EXISTS trg_tender_search_au
+    AFTER UPDATE OF tender_id, tender_ref_no, title, description ON Tender BEGIN
+        INSERT INTO TenderSearch(TenderSearch, rowid, tender_ref_no, title, description)
+        VALUES ('delete', old.tender_id, old.tender_ref_no, old.title, old.description);
+        INSERT INTO TenderSearch(rowid, tender_ref_no, title, description)
+        VALUES (new.tender_id, new.tender_ref_no, new.title, new.description);
+    END;
+
+    -- index the tenders that already exist
+    INSERT INTO TenderSearch(TenderSearch) VALUES ('rebuild');
+    """,
+
+    # 3: transactional outbox for notifications (see database/outbox.py)
+    """
+    CREATE TABLE IF NOT EXISTS NotificationOutbox (
+        event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_key TEXT UNIQUE,
+        kind TEXT NOT NULL,
+        tender_id INTEGER,
+        vendor_id INTEGER,
+        title TEXT,
+        message TEXT,
+        status TEXT CHECK(status IN ('Pending','Done','Failed')) DEFAULT 'Pending',
+        attempts INTEGER DEFAULT 0,
+        next_attempt_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        last_error TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        processed_at DATETIME
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_outbox_pending
+        ON NotificationOutbox(next_attempt_at, event_id) WHERE status = 'Pending';
+
+    -- the outbox event a notification was delivered for; makes delivery idempotent
+    ALTER TABLE Notification ADD COLUMN event_id INTEGER;
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_notification_event
+        ON Notification(event_id, vendor_id) WHERE event_id IS NOT NULL;
+    """,
+
+    # 4: open-tender indexes that match the keyset order (publishing_date DESC, tender_id DESC)
+    """
+    DROP INDEX IF EXISTS idx_tender_open_org;
+    CREATE INDEX IF NOT EXISTS idx_tender_open_org
+        ON Tender(org_id, publishing_date DESC, tender_id DESC) WHERE status = 'Open';
+    DROP INDEX IF EXISTS idx_tender_open_loc;
+    CREATE INDEX IF NOT EXISTS idx_tender_open_loc
+        ON Tender(location, publishing_date DESC, tender_id DESC) WHERE status = 'Open';
+    """,
+
+    # 5: denormalised counters, maintained by triggers (repair with `python setup_db.py --recount`)
+    """
+    -- unread notifications per vendor (inbox badge)
+    CREATE TABLE IF NOT EXISTS VendorStats (
+        vendor_id INTEGER PRIMARY KEY,
+        unread_notifications INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (vendor_id) REFERENCES Vendor(vendor_id) ON DELETE CASCADE
+    );
+
+    -- bids received per tender: active (Bid) + archived (BidLog)
+    CREATE TABLE IF NOT EXISTS TenderStats (
+        tender_id INTEGER PRIMARY KEY,
+        bid_count INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (tender_id) REFERENCES Tender(tender_id) ON DELETE CASCADE
+    );
+
+    -- tenders per organisation
+    CREATE TABLE IF NOT EXISTS OrgStats (
+        org_id INTEGER PRIMARY KEY,
+        tender_count INTEGER NOT NULL DEFAULT 0,
+        open_tender_count INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (org_id) REFERENCES Organisation(org_id) ON DELETE CASCADE
+    );
+
+    CREATE TRIGGER IF NOT EXISTS trg_vendorstats_notification_ai AFTER INSERT ON Notification
+    WHEN COALESCE(new.is_read, 0) = 0 BEGIN
+        INSERT INTO VendorStats(vendor_id, unread_notifications) VALUES (new.vendor_id, 1)
+        ON CONFLICT(vendor_id) DO UPDATE SET unread_notifications = unread_notifications + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_vendorstats_notification_ad AFTER DELETE ON Notification
+    WHEN COALESCE(old.is_read, 0) = 0 BEGIN
+        UPDATE VendorStats SET unread_notifications = unread_notifications - 1 WHERE vendor_id = old.vendor_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_vendorstats_notification_au AFTER UPDATE OF is_read, vendor_id ON Notification BEGIN
+        UPDATE VendorStats SET unread_notifications = unread_notifications - 1
+        WHERE vendor_id = old.vendor_id AND COALESCE(old.is_read, 0) = 0;
+        INSERT INTO VendorStats(vendor_id, unread_notifications)
+        SELECT new.vendor_id, 1 WHERE COALESCE(new.is_read, 0) = 0
+        ON CONFLICT(vendor_id) DO UPDATE SET unread_notifications = unread_notifications + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_tenderstats_bid_ai AFTER INSERT ON Bid BEGIN
+        INSERT INTO TenderStats(tender_id, bid_count) VALUES (new.tender_id, 1)
+        ON CONFLICT(tender_id) DO UPDATE SET bid_count = bid_count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_tenderstats_bid_ad AFTER DELETE ON Bid BEGIN
+        UPDATE TenderStats SET bid_count = bid_count - 1 WHERE tender_id = old.tender_id;
+    END;
+
+    -- archiving a bid is Bid delete (-1) + BidLog insert (+1), so the count survives award / withdrawal
+    CREATE TRIGGER IF NOT EXISTS trg_tenderstats_bidlog_ai AFTER INSERT ON BidLog BEGIN
+        INSERT INTO TenderStats(tender_id, bid_count) VALUES (new.tender_id, 1)
+        ON CONFLICT(tender_id) DO UPDATE SET bid_count = bid_count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_tenderstats_bidlog_ad AFTER DELETE ON BidLog BEGIN
+        UPDATE TenderStats SET bid_count = bid_count - 1 WHERE tender_id = old.tender_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_orgstats_tender_ai AFTER INSERT ON Tender BEGIN
+        INSERT INTO OrgStats(org_id, tender_count, open_tender_count)
+        VALUES (new.org_id, 1, new.status = 'Open')
+        ON CONFLICT(org_id) DO UPDATE SET
+            tender_count = tender_count + 1,
+            open_tender_count = open_tender_count + excluded.open_tender_count;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_orgstats_tender_ad AFTER DELETE ON Tender BEGIN
+        UPDATE OrgStats SET
+            tender_count = tender_count - 1,
+            open_tender_count = open_tender_count - (old.status = 'Open')
+        WHERE org_id = old.org_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_orgstats_tender_au AFTER UPDATE OF status, org_id ON Tender BEGIN
+        UPDATE OrgStats SET
+            tender_count = tender_count - 1,
+            open_tender_count = open_tender_count - (old.status = 'Open')
+        WHERE org_id = old.org_id;
+        INSERT INTO OrgStats(org_id, tender_count, open_tender_count)
+        VALUES (new.org_id, 1, new.status = 'Open')
+        ON CONFLICT(org_id) DO UPDATE SET
+            tender_count = tender_count + 1,
+            open_tender_count = open_tender_count + excluded.open_tender_count;
+    END;
+    """,
+
+    # 6: populate the counters for existing rows
+    lambda conn: recount_counters(conn),
+
+    # 7: numeric price parsed from financial_spec (minor units, i.e. paise for INR)
+    """
+    ALTER TABLE Bid ADD COLUMN amount_paise INTEGER;
+    ALTER TABLE Bid ADD COLUMN currency TEXT;
+    ALTER TABLE BidLog ADD COLUMN amount_paise INTEGER;
+    ALTER TABLE BidLog ADD COLUMN currency TEXT;
+
+    -- lowest bid / price ranking per tender
+    CREATE INDEX IF NOT EXISTS idx_bid_tender_amount ON Bid(tender_id, amount_paise);
+    CREATE INDEX IF NOT EXISTS idx_bidlog_tender_amount ON BidLog(tender_id, amount_paise);
+    """,
+
+    # 8: parse the amounts of bids that already exist
+    lambda conn: backfill_bid_amounts(conn),
+
+    # 9: per-tender scoring configuration (see database/scoring.py); no row = defaults
+    """
+    CREATE TABLE IF NOT EXISTS TenderScoring (
+        tender_id INTEGER PRIMARY KEY,
+        method TEXT NOT NULL CHECK(method IN ('SUM','QCBS','L1')) DEFAULT 'SUM',
+        tech_weight REAL NOT NULL DEFAULT 0.7,
+        fin_weight REAL NOT NULL DEFAULT 0.3,
+        min_tech_score REAL NOT NULL DEFAULT 0,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (tender_id) REFERENCES Tender(tender_id)
+            ON DELETE CASCADE ON UPDATE CASCADE
+    );
+    """,
+
+    # 10: precomputed per-tender leaderboards (see database/leaderboard.py)
+    """
+    CREATE TABLE IF NOT EXISTS BidRanking (
+        tender_id INTEGER NOT NULL,
+        vendor_id INTEGER NOT NULL,
+        rank INTEGER,
+        final_score REAL,
+        amount_paise INTEGER,
+        gap_to_l1_paise INTEGER,
+        PRIMARY KEY (tender_id, vendor_id),
+        FOREIGN KEY (vendor_id, tender_id) REFERENCES Bid(vendor_id, tender_id)
+            ON DELETE CASCADE ON UPDATE CASCADE
+    );
+    CREATE INDEX IF NOT EXISTS idx_bidranking_rank ON BidRanking(tender_id, rank);
+
+    CREATE TABLE IF NOT EXISTS TenderLeaderboard (
+        tender_id INTEGER PRIMARY KEY,
+        bid_count INTEGER NOT NULL DEFAULT 0,
+        evaluated INTEGER NOT NULL DEFAULT 0,
+        pending INTEGER NOT NULL DEFAULT 0,
+        leader_vendor_id INTEGER,
+        top_score REAL,
+        l1_paise INTEGER,
+        refreshed_at DATETIME,
+        FOREIGN KEY (tender_id) REFERENCES Tender(tender_id) ON DELETE CASCADE
+    );
+    """,
+
+    # 11: rank the bids that already exist
+    lambda conn: refresh_leaderboards(conn),
+
+    # 12: bid history (db_utils.bid_history_query): per-vendor and newest-first browsing
+    """
+    CREATE INDEX IF NOT EXISTS idx_bid_vendor_date ON Bid(vendor_id, submission_date DESC);
+    CREATE INDEX IF NOT EXISTS idx_bidlog_vendor_date ON BidLog(vendor_id, submission_date DESC);
+    CREATE INDEX IF NOT EXISTS idx_bid_date ON Bid(submission_date DESC);
+    CREATE INDEX IF NOT EXISTS idx_bidlog_date ON BidLog(submission_date DESC);
+    """,
+
+    # 13: tender scheduler (database/scheduler.py): open tenders by closing date
+    """
+    CREATE INDEX IF NOT EXISTS idx_tender_open_closing ON Tender(closing_date) WHERE status = 'Open';
+    """,
+
+    # 14: re-parse amounts stored by the first-number parser and re-rank with them
+    lambda conn: reparse_bid_amounts(conn),
+
+    # 15: re-rank: no L1 price or gaps across currencies
+    lambda conn: refresh_leaderboards(conn),
+]
+
+LATEST_VERSION = len(MIGRATIONS)
+
+
+# counters maintained by the triggers of migration 5, and how to compute them from scratch
+COUNTERS = {
+    "VendorStats": """
+        SELECT v.vendor_id, COUNT(n.notification_id)
+        FROM Vendor v
+        LEFT JOIN Notification n ON n.vendor_id = v.vendor_id AND COALESCE(n.is_read, 0) = 0
+        GROUP BY v.vendor_id
+    """,
+    "TenderStats": """
+        SELECT t.tender_id,
+               (SELECT COUNT(*) FROM Bid b WHERE b.tender_id = t.tender_id)
+             + (SELECT COUNT(*) FROM BidLog l WHERE l.tender_id = t.tender_id)
+        FROM Tender t
+    """,
+    "OrgStats": """
+        SELECT o.org_id, COUNT(t.tender_id), COALESCE(SUM(t.status = 'Open'), 0)
+        FROM Organisation o
+        LEFT JOIN Tender t ON t.org_id = o.org_id
+        GROUP BY o.org_id
+    """,
+}
+
+
+def recount_counters(conn):
+    """
+    Recompute every counter table from the base tables, inside the caller's transaction.
+    Returns {table: number of rows that had drifted} (0 everywhere means the triggers kept up).
+    """
+    drift = {}
+    for table, select in COUNTERS.items():
+        cols = [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+        current = {r[0]: tuple(r[1:]) for r in conn.execute(f"SELECT {', '.join(cols)} FROM {table}")}
+        fresh = {r[0]: tuple(r[1:]) for r in conn.execute(select)}
+        # a missing row reads as all-zero counters
+        drift[table] = sum(1 for k, v in fresh.items() if current.get(k, (0,) * len(v)) != v) + \
+            sum(1 for k in current if k not in fresh)
+
+        conn.execute(f"DELETE FROM {table}")
+        conn.executemany(
+            f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+            [(k,) + v for k, v in fresh.items()]
+        )
+    return drift
+
+def backfill_bid_amounts(conn, batch_size=5000):
+    """
+    Fill amount_paise / currency for Bid and BidLog rows that don't have them yet,
+    walking each table in rowid order in batches. Returns {table: rows updated}.
+    Rows whose financial_spec contains no number stay NULL.
+    """
+    from database.money import parse_amount
+
+    updated = {}
+    for table in ("Bid", "BidLog"):
+        updated[table] = 0
+        last = 0
+        while True:
+            rows = conn.execute(f"""
+                SELECT rowid, financial_spec FROM {table}
+                WHERE rowid > ? AND amount_paise IS NULL AND financial_spec IS NOT NULL
+                ORDER BY rowid LIMIT ?
+            """, (last, batch_size)).fetchall()
+            if not rows:
+                break
+            last = rows[-1][0]
+            params = []
+            for rowid, spec in rows:
+                amount, currency = parse_amount(spec)
+                if amount is not None:
+                    params.append((amount, currency, rowid))
+            conn.executemany(f"UPDATE {table} SET amount_paise = ?, currency = ? WHERE rowid = ?", params)
+            updated[table] += len(params)
+    return updated
+
+
+def reparse_bid_amounts(conn, batch_size=5000):
+    """
+    Parse every stored financial_spec again (after a parse_amount change) and rebuild the
+    leaderboards, whose L1 and gaps come from the amounts. Returns {table: rows priced}.
+    """
+    for table in ("Bid", "BidLog"):
+        conn.execute(f"UPDATE {table} SET amount_paise = NULL, currency = NULL WHERE amount_paise IS NOT NULL")
+    updated = backfill_bid_amounts(conn, batch_size)
+    refresh_leaderboards(conn)
+    return updated
+
+
+# rebuild BidRanking / TenderLeaderboard (all tenders by default)
+def refresh_leaderboards(conn, tender_ids=None):
+    from database.leaderboard import refresh_leaderboards as refresh
+    refresh(conn, tender_ids)
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+_checked = set()   # database paths already known to be at LATEST_VERSION in this process
+_checked_lock = threading.Lock()
+
+
+def ensure_schema():
+    """
+    setup_database(), but only if the database isn't at LATEST_VERSION yet, and checked once
+    per process: after the first call this is a set lookup. For app / API start-up.
+    """
+    if DB_PATH in _checked:
+        return
+    with _checked_lock:
+        if DB_PATH in _checked:
+            return
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            current = get_schema_version(conn)
+        finally:
+            conn.close()
+        if current < LATEST_VERSION:
+            setup_database()
+        _checked.add(DB_PATH)
+
+
+def migrate(conn):
+    """
+    Bring the database up to LATEST_VERSION.
+    Every migration runs in its own write transaction together with the user_version bump,
+    so a failed step leaves the database at the previous version.
+    Returns the list of versions that were applied.
+    """
+    current = get_schema_version(conn)
+    applied = []
+
+    for version, step in enumerate(MIGRATIONS, start=1):
+        if version <= current:
+            continue
+        try:
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+            if callable(step):
+                step(conn)
+            else:
+                for statement in _split_sql(step):
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+
+    if applied:
+        conn.execute("PRAGMA optimize")
+    return applied
+
+
+def _split_sql(script):
+    # split a migration script into complete statements (trigger bodies contain ';' too)
+    statements, buf = [], ""
+    for line in script.splitlines(keepends=True):
+        if line.strip().startswith("--") and not buf.strip():
+            continue
+        buf += line
+        if sqlite3.complete_statement(buf):
+            statements.append(buf.strip())
+            buf = ""
+    if buf.strip():
+        statements.append(buf.strip())
+    return statements
 
 
 if __name__ == "__main__":
-    setup_database()
\ No newline at end of file
+    import sys
+
+    setup_database()
+
+    # python setup_db.py --backfill-amounts   -> parse prices of bids written by older code
+    if "--backfill-amounts" in sys.argv:
+        conn = sqlite3.connect(DB_PATH)
+        with conn:
+            updated = backfill_bid_amounts(conn)
+        conn.close()
+        print("Bid amounts backfilled:", ", ".join(f"{t}: {n}" for t, n in updated.items()))
+
+    # python setup_db.py --recount   -> repair counter drift
+    if "--recount" in sys.argv:
+        conn = sqlite3.connect(DB_PATH)
+        conn.execute("PRAGMA foreign_keys = ON")
+        with conn:
+            drift = recount_counters(conn)
+        conn.close()
+        print("Counters recounted:", ", ".join(f"{t}: {n} drifted" for t, n in drift.items()))
\ No newline at end of file
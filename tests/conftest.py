@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+# database.db_utils opens its pool on import: point it at a scratch database, never database.db
+os.environ.setdefault("TENDER_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="tender-tests-"), "app.db"))
+
+import setup_db  # noqa: E402  (reads TENDER_DB_PATH too)
+from database.connection import ConnectionPool  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # a fresh database at the latest schema version
+    path = str(tmp_path / "tender.db")
+    monkeypatch.setattr(setup_db, "DB_PATH", path)
+    setup_db.setup_database()
+    return path
+
+
+@pytest.fixture(scope="session")
+def app_db():
+    # database.db_utils, on its own scratch database (shared by the tests that use it)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(setup_db, "DB_PATH", os.environ["TENDER_DB_PATH"])
+        setup_db.setup_database()
+    from database import db_utils
+    return db_utils
+
+
+@pytest.fixture
+def pool(db_path):
+    pool = ConnectionPool(db_path)
+    yield pool
+    pool.close_all()
+
+
+def _row_adder(path):
+    # insert one row with a plain connection; returns its rowid
+    def add_row(table, **values):
+        conn = sqlite3.connect(path)
+        try:
+            with conn:
+                cur = conn.execute(
+                    f"INSERT INTO {table} ({', '.join(values)}) VALUES ({', '.join('?' * len(values))})",
+                    tuple(values.values()),
+                )
+            return cur.lastrowid
+        finally:
+            conn.close()
+    return add_row
+
+
+@pytest.fixture
+def add_row(db_path):
+    return _row_adder(db_path)
+
+
+@pytest.fixture
+def add_app_row(app_db):
+    return _row_adder(app_db.DB_PATH)
@@ -0,0 +1,123 @@
+import asyncio
+import base64
+import json
+
+import pytest
+
+import api_server
+from api_server import ApiServer
+from database.models import Outcome
+
+
+def fetch(raw):
+    # send one raw HTTP request to an in-process server; returns (status, headers, body)
+    async def run():
+        api = ApiServer(workers=2)
+        server = await asyncio.start_server(api.handle_client, "127.0.0.1", 0)
+        try:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(raw)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), 30)
+            writer.close()
+            return response
+        finally:
+            server.close()
+            api.pool.shutdown()
+
+    head, _, body = asyncio.run(run()).partition(b"\r\n\r\n")
+    status_line, *lines = head.decode("latin-1").split("\r\n")
+    headers = {k.lower(): v.strip() for k, _, v in (line.partition(":") for line in lines)}
+    return int(status_line.split()[1]), headers, body
+
+
+def get(path, user=None, password=None, extra=b""):
+    auth = b""
+    if user is not None:
+        auth = b"Authorization: Basic " + base64.b64encode(f"{user}:{password}".encode()) + b"\r\n"
+    return fetch(f"GET {path} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n".encode() + auth + extra + b"\r\n")
+
+
+@pytest.fixture(autouse=True)
+def database(app_db):
+    return app_db
+
+
+def test_admin_endpoints_disabled_without_password(monkeypatch):
+    monkeypatch.setattr(api_server.db, "ADMIN_PASSWORD", None)
+    status, _, body = get("/admin/bids/export", "admin", "admin123")
+    assert status == 503
+    assert "TENDER_ADMIN_PASSWORD" in json.loads(body)["error"]
+
+
+def test_admin_endpoints_check_the_password(monkeypatch):
+    monkeypatch.setattr(api_server.db, "ADMIN_PASSWORD", "s3cret")
+    assert get("/admin/bids/export", "admin", "admin123")[0] == 401
+    status, headers, _ = get("/admin/bids/export", "admin", "s3cret")
+    assert status == 200 and headers["content-type"].startswith("text/csv")
+
+
+@pytest.fixture
+def vendor(add_app_row):
+    email = f"api{add_app_row('Organisation', name='Org', password='pw')}@example.com"
+    add_app_row("Vendor", name="Acme", email=email, password="pw")
+    return email, "pw"
+
+
+def cursor_token(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+@pytest.mark.parametrize("token", [
+    "@@not-base64@@",
+    cursor_token("just a string"),
+    cursor_token([1, 2, 3]),
+    cursor_token([{"a": 1}, 5]),
+    cursor_token([[1], 5]),
+    cursor_token([None, 5]),
+    cursor_token([True, 5]),
+    cursor_token(["2030-01-01", "x"]),
+])
+def test_bad_cursor_is_rejected(vendor, token):
+    status, _, body = get(f"/tenders?after={token}", *vendor)
+    assert status == 400
+    assert json.loads(body) == {"error": "Invalid 'after' cursor."}
+
+
+@pytest.mark.parametrize("key", ["2030-01-01", 3, 2.5])
+def test_good_cursor_is_accepted(vendor, key):
+    assert get(f"/tenders?after={cursor_token([key, 7])}", *vendor)[0] == 200
+
+
+def test_header_over_the_limit():
+    status, headers, _ = get("/health", extra=b"X-Big: " + b"a" * 100_000 + b"\r\n")
+    assert status == 431 and headers["connection"] == "close"
+
+
+def test_too_many_headers():
+    extra = b"".join(b"X-H%d: 1\r\n" % i for i in range(api_server.MAX_HEADERS + 1))
+    assert get("/health", extra=extra)[0] == 431
+
+
+@pytest.mark.parametrize("error, status", [
+    (api_server.NOT_FOUND, 404),
+    (api_server.CONFLICT, 409),
+    (api_server.DB_ERROR, 503),
+    (None, 409),
+])
+def test_write_error_kind_sets_the_status(vendor, monkeypatch, error, status):
+    monkeypatch.setattr(api_server.db, "submit_bid", lambda *args: Outcome(False, "nope", error))
+    body = b'{"technical_spec": "t", "financial_spec": "\\u20b91,00,000"}'
+    auth = base64.b64encode(":".join(vendor).encode())
+    response = fetch(b"POST /tenders/T1/bids HTTP/1.1\r\nHost: test\r\nConnection: close\r\n"
+                     b"Authorization: Basic " + auth + b"\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+    assert response[0] == status
+    assert json.loads(response[2]) == {"error": "nope"}
+
+
+def test_submit_to_unknown_tender_is_404(vendor):
+    body = b'{"technical_spec": "t", "financial_spec": "500000"}'
+    auth = base64.b64encode(":".join(vendor).encode())
+    response = fetch(b"POST /tenders/NO-SUCH-REF/bids HTTP/1.1\r\nHost: test\r\nConnection: close\r\n"
+                     b"Authorization: Basic " + auth + b"\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+    assert response[0] == 404
@@ -0,0 +1,78 @@
+import sqlite3
+
+import setup_db
+from database.connection import ALL_TABLES, ConnectionPool
+
+
+def make_pool(path):
+    commits = []
+    return ConnectionPool(str(path), on_commit=commits.append), commits
+
+
+def test_unit_of_work_sees_schema_created_after_it_started(tmp_path, monkeypatch):
+    path = tmp_path / "fresh.db"
+    monkeypatch.setattr(setup_db, "DB_PATH", str(path))
+    pool, _ = make_pool(path)
+
+    with pool.unit_of_work() as conn:
+        setup_db.ensure_schema()
+        assert conn.execute("SELECT COUNT(*) FROM Organisation").fetchone() == (0,)
+
+
+def test_commit_from_the_same_pool_keeps_other_tables_cached(tmp_path):
+    path = tmp_path / "t.db"
+    with sqlite3.connect(path) as setup:
+        setup.execute("CREATE TABLE t (x INTEGER)")
+    pool, commits = make_pool(path)
+
+    reader, writer = pool.acquire(), pool.acquire()
+    with writer.transaction():
+        writer.execute("INSERT INTO t VALUES (1)")
+    pool.release(writer)
+    pool.release(reader)  # handed out next
+
+    with pool.unit_of_work() as conn:
+        assert conn is reader
+    assert commits == [{"t"}]
+
+
+def test_commit_from_another_process_invalidates_everything(tmp_path):
+    path = tmp_path / "t.db"
+    with sqlite3.connect(path) as setup:
+        setup.execute("CREATE TABLE t (x INTEGER)")
+    pool, commits = make_pool(path)
+    with pool.unit_of_work():
+        pass
+
+    with sqlite3.connect(path) as other:
+        other.execute("INSERT INTO t VALUES (1)")
+    with pool.unit_of_work():
+        pass
+    assert commits == [{ALL_TABLES}]
+
+
+def test_statements_are_reported_once_from_fetch_and_close(tmp_path):
+    reported = []
+    pool = ConnectionPool(str(tmp_path / "t.db"), on_statement=lambda conn, sql, *rest: reported.append(sql))
+    conn = pool.connection()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(5)])
+    conn.commit()
+    assert len(reported) == 2
+
+    conn.execute("SELECT COUNT(*) FROM t").fetchone()
+    assert reported[-1] == "SELECT COUNT(*) FROM t"
+
+    cur = conn.execute("SELECT x FROM t")
+    cur.fetchmany(2)
+    assert reported[-1] != "SELECT x FROM t"
+    cur.close()
+    assert reported[-1] == "SELECT x FROM t"
+
+    cur = conn.execute("SELECT x FROM t WHERE x > 2")
+    cur.fetchmany(1)
+    del cur  # collected half-read: dropped, not reported
+    assert reported[-1] == "SELECT x FROM t"
+    assert len(reported) == 4
+    conn.close()
+    pool.close_all()
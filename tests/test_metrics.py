@@ -0,0 +1,13 @@
+def calls(db):
+    return {name: series.histogram.count for name, series in db.metrics.functions.items()}
+
+
+def test_helper_calls_are_timed_once(app_db, add_app_row):
+    vendor_id = add_app_row("Vendor", name="Acme", email="metrics@example.com", password="pw")
+    app_db.metrics.reset()
+
+    app_db.get_vendor_bids(vendor_id)      # alias of get_bid_history
+    app_db.get_bids_for_vendor("metrics@example.com")
+    app_db.get_vendor_unread_count(vendor_id)
+
+    assert calls(app_db) == {"get_bid_history": 2, "get_vendor_unread_count": 1}
@@ -0,0 +1,55 @@
+import pytest
+
+from database.money import format_amount, parse_amount
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("₹8,90,000", (89000000, "INR")),
+    ("Rs. 14.5 lakh", (145000000, "INR")),
+    ("INR 2.1 Cr", (2100000000, "INR")),
+    ("$12,500.75", (1250075, "USD")),
+    ("8.9L", (89000000, "INR")),
+    ("12k", (1200000, "INR")),
+    ("Rs500", (50000, "INR")),
+    ("500 USD", (50000, "USD")),
+    ("890000", (89000000, "INR")),
+    ("₹8,90,000.", (89000000, "INR")),
+    # the amount is the marked number, not the first one
+    ("GST 18% extra, total ₹8,90,000", (89000000, "INR")),
+    ("Quote valid for 90 days: ₹9,10,000", (91000000, "INR")),
+    ("Phase 2: ₹5,00,000", (50000000, "INR")),
+    ("ISO9001 certified, ₹10,00,000", (100000000, "INR")),
+    ("₹ 5 L", (50000000, "INR")),
+    ("EUR 1.000,50", (100050, "EUR")),
+    ("rsvp by Friday, $100", (10000, "USD")),
+    ("₹8,90,000 (₹8,90,000 all inclusive)", (89000000, "INR")),
+])
+def test_parse_amount(text, expected):
+    assert parse_amount(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    None,
+    "",
+    "to be quoted",
+    "Phase 2: 500000",             # two plain numbers
+    "₹8,00,000 + GST ₹1,44,000",   # two different marked amounts
+    "1.000",                       # one, or a thousand?
+    "18%",
+    "90 days",
+])
+def test_parse_amount_unpriced(text):
+    assert parse_amount(text) == (None, None)
+
+
+@pytest.mark.parametrize("minor_units, currency, expected", [
+    (89000000, "INR", "₹8,90,000.00"),
+    (100000000000, "INR", "₹1,00,00,00,000.00"),
+    (1250075, "USD", "$12,500.75"),
+    (0, "INR", "₹0.00"),
+    (-5000, "INR", "-₹50.00"),
+    (-1250075, "USD", "-$12,500.75"),
+    (None, "INR", "-"),
+])
+def test_format_amount(minor_units, currency, expected):
+    assert format_amount(minor_units, currency) == expected
@@ -0,0 +1,109 @@
+import sqlite3
+import threading
+
+import pytest
+
+from database import outbox
+
+
+@pytest.fixture
+def vendor_id(add_row):
+    return add_row("Vendor", name="Acme", email="acme@example.com", password="pw")
+
+
+def notifications(db_path, vendor_id):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT title FROM Notification WHERE vendor_id = ?", (vendor_id,)).fetchall()
+    finally:
+        conn.close()
+
+
+def make_due(db_path):
+    # skip the retry backoff
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE NotificationOutbox SET next_attempt_at = datetime('now', '-1 second')")
+    conn.close()
+
+
+def enqueue_direct(pool, vendor_id, title="Hello"):
+    conn = pool.connection()
+    try:
+        with conn.transaction():
+            outbox.enqueue(conn.cursor(), "direct", vendor_id=vendor_id, title=title, message="msg")
+    finally:
+        conn.close()
+
+
+def test_failed_event_is_retried_and_delivered_once(pool, db_path, vendor_id, monkeypatch):
+    deliver = outbox.DELIVERERS["direct"]
+    failures = []
+
+    def flaky(cur, event):
+        if not failures:
+            failures.append(event["event_id"])
+            deliver(cur, event)  # rolled back with the event's savepoint
+            raise RuntimeError("boom")
+        deliver(cur, event)
+
+    monkeypatch.setitem(outbox.DELIVERERS, "direct", flaky)
+    enqueue_direct(pool, vendor_id, "Bad")
+    enqueue_direct(pool, vendor_id, "Good")
+    worker = outbox.NotificationWorker(pool.connection)
+
+    assert worker.run_once() == 2
+    assert notifications(db_path, vendor_id) == [("Good",)]  # the other event is not held up
+
+    make_due(db_path)
+    assert worker.run_once() == 1
+    make_due(db_path)
+    assert worker.run_once() == 0
+    assert sorted(notifications(db_path, vendor_id)) == [("Bad",), ("Good",)]
+
+
+def test_event_processed_twice_is_delivered_once(pool, db_path, vendor_id):
+    enqueue_direct(pool, vendor_id)
+    outbox.NotificationWorker(pool.connection).run_once()
+
+    # e.g. a worker that delivered but whose status update was lost
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE NotificationOutbox SET status = 'Pending'")
+    conn.close()
+    assert outbox.NotificationWorker(pool.connection).run_once() == 1
+    assert notifications(db_path, vendor_id) == [("Hello",)]
+
+
+def test_concurrent_workers_deliver_once(pool, db_path, vendor_id):
+    for i in range(50):
+        enqueue_direct(pool, vendor_id, f"n{i}")
+    workers = [outbox.NotificationWorker(pool.connection, batch_size=10) for _ in range(2)]
+
+    def drain(worker):
+        while worker.run_once():
+            pass
+
+    threads = [threading.Thread(target=drain, args=(w,)) for w in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(notifications(db_path, vendor_id)) == sorted((f"n{i}",) for i in range(50))
+
+
+def test_event_gives_up_after_max_attempts(pool, db_path, vendor_id, monkeypatch):
+    def broken(cur, event):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(outbox.DELIVERERS, "direct", broken)
+    enqueue_direct(pool, vendor_id)
+    worker = outbox.NotificationWorker(pool.connection, max_attempts=2)
+    for _ in range(3):
+        make_due(db_path)
+        worker.run_once()
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT status, attempts, last_error FROM NotificationOutbox").fetchone() == (
+        "Failed", 2, "boom")
+    conn.close()
@@ -0,0 +1,74 @@
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from database.connection import ConnectionPool
+from database.scheduler import TenderScheduler
+
+TODAY = date(2030, 6, 15)
+
+
+@pytest.fixture
+def tenders(add_row):
+    # closing date -> tender_id; a tender is open up to and including its closing date
+    org_id = add_row("Organisation", name="City", email="city@example.com", password="pw")
+    return {
+        days: add_row("Tender", tender_ref_no=f"T{days}", org_id=org_id, title="Roads", status="Open",
+                      closing_date=(TODAY + timedelta(days=days)).isoformat())
+        for days in (-30, -1, 0, 1)
+    }
+
+
+def statuses(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute("SELECT tender_id, status FROM Tender"))
+    finally:
+        conn.close()
+
+
+def test_close_due_closes_only_past_deadline(pool, db_path, tenders):
+    assert TenderScheduler(pool.connection).close_due(TODAY) == 2
+    assert statuses(db_path) == {
+        tenders[-30]: "Closed", tenders[-1]: "Closed", tenders[0]: "Open", tenders[1]: "Open",
+    }
+    assert TenderScheduler(pool.connection).close_due(TODAY) == 0
+
+
+def test_close_due_leaves_awarded_tenders_alone(pool, db_path, tenders):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE Tender SET status = 'Awarded' WHERE tender_id = ?", (tenders[-1],))
+    conn.close()
+    assert TenderScheduler(pool.connection).close_due(TODAY) == 1
+    assert statuses(db_path)[tenders[-1]] == "Awarded"
+
+
+def test_close_due_from_two_processes(db_path, add_row, tenders):
+    org_id = add_row("Organisation", name="Port", email="port@example.com", password="pw")
+    for i in range(200):
+        add_row("Tender", tender_ref_no=f"P{i}", org_id=org_id, title="Dredging", status="Open",
+                closing_date=(TODAY - timedelta(days=1 + i % 7)).isoformat())
+
+    # one pool each, as two app / API processes would have
+    pools = [ConnectionPool(db_path), ConnectionPool(db_path)]
+    closed = []
+    start = threading.Barrier(len(pools))
+
+    def run(pool):
+        start.wait()
+        closed.append(TenderScheduler(pool.connection, batch_size=25).close_due(TODAY))
+
+    threads = [threading.Thread(target=run, args=(p,)) for p in pools]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for p in pools:
+        p.close_all()
+
+    assert sum(closed) == 202
+    assert sum(status == "Closed" for status in statuses(db_path).values()) == 202
+    assert statuses(db_path)[tenders[0]] == "Open"
@@ -0,0 +1,68 @@
+import sqlite3
+from itertools import count
+
+import pandas as pd
+import pytest
+
+from database.leaderboard import refresh_leaderboards
+from database.scoring import score_bids
+
+_refs = count()
+
+
+def bids(*rows):
+    return pd.DataFrame(rows, columns=["vendor_id", "technical_score", "amount_paise", "currency"])
+
+
+def test_l1_normalisation():
+    scored = score_bids(bids((1, 80, 100_000, "INR"), (2, 90, 200_000, "INR")), {"method": "L1"})
+    assert scored["final_score"].tolist() == [100.0, 50.0]
+
+
+def test_disqualified_bid_does_not_set_l1():
+    scored = score_bids(bids((1, 20, 50_000, "INR"), (2, 90, 100_000, "INR")),
+                        {"method": "L1", "min_tech_score": 50})
+    assert scored["final_score"].tolist() == [0.0, 100.0]
+
+
+def test_mixed_currencies_are_refused():
+    with pytest.raises(ValueError, match="more than one currency"):
+        score_bids(bids((1, 80, 100_000, "INR"), (2, 90, 1_500, "USD")), {"method": "L1"})
+
+
+def test_currency_of_unqualified_bid_is_ignored():
+    scored = score_bids(bids((1, 80, 100_000, "INR"), (2, 10, 1_500, "USD")),
+                        {"method": "L1", "min_tech_score": 50})
+    assert scored["final_score"].tolist() == [100.0, 0.0]
+
+
+def add_tender(add_row, prices):
+    # an open tender with one bid per (amount_paise, currency)
+    org_id = add_row("Organisation", name="City", email=f"city{next(_refs)}@example.com", password="pw")
+    tender_id = add_row("Tender", tender_ref_no=f"T{next(_refs)}", org_id=org_id, title="Roads", status="Open")
+    for amount, currency in prices:
+        vendor_id = add_row("Vendor", name="V", email=f"v{next(_refs)}@example.com", password="pw")
+        add_row("Bid", vendor_id=vendor_id, tender_id=tender_id, technical_spec="t", financial_spec="f",
+                amount_paise=amount, currency=currency, technical_score=80)
+    return tender_id
+
+
+def test_leaderboard_l1_within_one_currency(db_path, add_row):
+    single = add_tender(add_row, [(150_000, "USD"), (100_000, "USD")])
+    mixed = add_tender(add_row, [(9_000_000, "INR"), (100_000, "USD")])
+    conn = sqlite3.connect(db_path)
+    with conn:
+        refresh_leaderboards(conn)
+    l1 = dict(conn.execute("SELECT tender_id, l1_paise FROM TenderLeaderboard"))
+    gaps = dict(conn.execute("SELECT tender_id, group_concat(gap_to_l1_paise) FROM BidRanking GROUP BY tender_id"))
+    conn.close()
+
+    assert l1[single] == 100_000 and sorted(map(int, gaps[single].split(","))) == [0, 50_000]
+    assert l1[mixed] is None and gaps[mixed] is None
+
+
+def test_score_tender_refuses_mixed_currencies(app_db, add_app_row):
+    tender_id = add_tender(add_app_row, [(9_000_000, "INR"), (100_000, "USD")])
+    result = app_db.score_tender(tender_id)
+    assert not result.ok and "more than one currency" in result.message
+    assert result.scores is None
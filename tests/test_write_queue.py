@@ -0,0 +1,148 @@
+import sqlite3
+import threading
+from concurrent.futures import TimeoutError
+
+import pytest
+
+from database import write_queue
+from database.models import DB_ERROR
+from database.write_queue import WriteQueue
+
+
+@pytest.fixture
+def table(pool):
+    conn = pool.connection()
+    conn.execute("CREATE TABLE t (x INTEGER UNIQUE)")
+    conn.close()
+
+
+@pytest.fixture
+def writer(pool, table):
+    queue = WriteQueue(pool.connection)
+    yield queue
+    queue.stop()
+    queue.join(5)
+
+
+def insert(batch, x):
+    batch.cursor.execute("INSERT INTO t VALUES (?)", (x,))
+    return x
+
+
+def insert_then_fail(batch, x):
+    insert(batch, x)
+    batch.defer(lambda cur, items: cur.execute("INSERT INTO t VALUES (-1)"), [x])
+    raise ValueError("bad item")
+
+
+def stall(queue):
+    # occupy the writer until the returned event is set
+    started, release = threading.Event(), threading.Event()
+    queue.submit(lambda batch: started.set() or release.wait(5))
+    started.wait(5)
+    return release
+
+
+def rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted(r[0] for r in conn.execute("SELECT x FROM t"))
+    finally:
+        conn.close()
+
+
+def test_bad_item_rolls_back_only_its_own_savepoint(writer, db_path):
+    # queued before the writer starts, so all three land in one batch
+    futures = [writer.submit(insert, 1), writer.submit(insert_then_fail, 2), writer.submit(insert, 3)]
+    writer.start()
+
+    assert futures[0].result(5) == 1 and futures[2].result(5) == 3
+    with pytest.raises(ValueError, match="bad item"):
+        futures[1].result(5)
+    assert rows(db_path) == [1, 3]  # neither its insert nor its deferred work was kept
+    assert (writer.batches, writer.writes) == (1, 3)
+
+
+def test_writer_survives_a_failed_batch(writer, db_path):
+    def failing_deferred(batch, x):
+        insert(batch, x)
+        batch.defer(lambda cur, items: cur.execute("INSERT INTO no_such_table VALUES (1)"), [x])
+
+    writer.start()
+    with pytest.raises(sqlite3.OperationalError):
+        writer.call(failing_deferred, 1)
+    assert writer.call(insert, 2) == 2
+    assert writer.is_alive()
+    assert rows(db_path) == [2]
+
+
+class Fatal(BaseException):
+    pass
+
+
+def test_writer_survives_a_base_exception(writer, db_path):
+    def fatal(batch, x):
+        insert(batch, x)
+        raise Fatal()
+
+    writer.start()
+    with pytest.raises(Fatal):
+        writer.call(fatal, 1)
+    assert writer.call(insert, 2) == 2
+    assert writer.is_alive()
+    assert rows(db_path) == [2]
+
+
+def test_writer_survives_a_missing_connection(pool, table, db_path):
+    attempts = []
+
+    def get_connection():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise sqlite3.OperationalError("unable to open database file")
+        return pool.connection()
+
+    queue = WriteQueue(get_connection)
+    queue.start()
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            queue.call(insert, 1)
+        assert queue.call(insert, 2) == 2
+    finally:
+        queue.stop()
+    assert rows(db_path) == [2]
+
+
+def test_stalled_writer_times_out_and_cancels(writer, db_path):
+    writer.start()
+    release = stall(writer)
+    try:
+        with pytest.raises(TimeoutError, match="nothing was written"):
+            writer.call(insert, 1, timeout=0.2)
+    finally:
+        release.set()
+    assert writer.call(insert, 2) == 2
+    assert rows(db_path) == [2]  # the timed-out write was cancelled, not run late
+
+
+def test_queued_outcome_reports_a_stalled_writer(app_db, add_app_row, monkeypatch):
+    vendor_id = add_app_row("Vendor", name="Acme", email="queue@example.com", password="pw")
+    stalled = WriteQueue(app_db.get_connection)
+    stalled.start()
+    monkeypatch.setattr(app_db, "_write_queue", stalled)
+    monkeypatch.setattr(write_queue, "WRITE_TIMEOUT", 0.5)
+    try:
+        release = stall(stalled)
+        try:
+            result = app_db.create_notification(vendor_id, "Hello", "msg")
+            read = app_db.mark_vendor_notifications_read(vendor_id)
+        finally:
+            release.set()
+        assert not result.ok and result.error == DB_ERROR
+        assert "nothing was written" in result.message
+        assert not read.ok and read.error == DB_ERROR and read.marked == 0
+
+        # the writer is free again: the next write goes through
+        assert app_db.create_notification(vendor_id, "Hello", "msg").ok
+    finally:
+        stalled.stop()